@@ -4,8 +4,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Airtable Configuration
-AIRTABLE_TOKEN = os.environ["AIRTABLE_TOKEN"]
-BASE_ID = os.environ["AIRTABLE_BASE_ID"]
+AIRTABLE_TOKEN = os.environ.get("AIRTABLE_TOKEN")
+BASE_ID = os.environ.get("AIRTABLE_BASE_ID")
 
 # Table Names
 T_APPLICANTS = os.environ.get("APPLICANTS_TABLE", "Applicants")
@@ -17,12 +17,49 @@ T_SHORTLISTED = os.environ.get("SHORTLISTED_TABLE", "Shortlisted Leads")
 # Field Names
 LINK_FIELD = os.environ.get("APPLICANT_LINK_FIELD", "Applicant ID")
 SHORTLIST_LINK_FIELD = os.environ.get("SHORTLIST_LINK_FIELD", "Applicant ID")
+FINGERPRINT_FIELD = os.environ.get("FINGERPRINT_FIELD", "Compressed Fingerprint")
+# Reverse-link fields on Applicants (Airtable names them after the linked table by default)
+PERSONAL_LINKS_FIELD = os.environ.get("PERSONAL_LINKS_FIELD", T_PERSONAL)
+EXPERIENCE_LINKS_FIELD = os.environ.get("EXPERIENCE_LINKS_FIELD", T_EXPERIENCE)
+SALARY_LINKS_FIELD = os.environ.get("SALARY_LINKS_FIELD", T_SALARY)
+REVERSE_LINK_FIELDS = {
+    T_PERSONAL: PERSONAL_LINKS_FIELD,
+    T_EXPERIENCE: EXPERIENCE_LINKS_FIELD,
+    T_SALARY: SALARY_LINKS_FIELD,
+}
+NAME_FIELD = os.environ.get("APPLICANT_NAME_FIELD", "Applicant ID")
+CREATED_FIELD = os.environ.get("APPLICANT_CREATED_FIELD", "Created")
 
 # LLM Configuration
-GROQ_API_KEY = os.environ["GROQ_API_KEY"]
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 LLM_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
 MAX_TOKENS = 500
 MAX_RETRIES = 3
+LLM_WORKERS = int(os.environ.get("LLM_WORKERS", "8"))
+LLM_LEASE_SECONDS = float(os.environ.get("LLM_LEASE_SECONDS", "120"))
+LLM_MAX_ATTEMPTS = int(os.environ.get("LLM_MAX_ATTEMPTS", "3"))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "60"))
+
+# LLM Providers, in priority order: comma-separated kind:model[@base_url] entries.
+# kind is groq or openai (any OpenAI-compatible chat-completions endpoint, local servers included).
+LLM_PROVIDERS = os.environ.get("LLM_PROVIDERS", f"groq:{LLM_MODEL}")
+OPENAI_COMPAT_API_KEY = os.environ.get("OPENAI_COMPAT_API_KEY")
+OPENAI_COMPAT_REQUESTS_PER_MINUTE = float(os.environ.get("OPENAI_COMPAT_REQUESTS_PER_MINUTE", "60"))
+# Hedging: after the primary's p95 latency, send the same request to the next provider too
+LLM_HEDGING = os.environ.get("LLM_HEDGING", "on").lower() not in ("0", "off", "false", "no")
+LLM_HEDGE_INITIAL_DELAY = float(os.environ.get("LLM_HEDGE_INITIAL_DELAY", "10"))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# LLM Gating (full evaluation, short-form prompt or templated summary per applicant)
+LLM_GATING = os.environ.get("LLM_GATING", "on").lower() not in ("0", "off", "false", "no")
+LLM_GATE_MIN_COMPLETENESS = float(os.environ.get("LLM_GATE_MIN_COMPLETENESS", "0.5"))
+LLM_GATE_TEMPLATE_FAILURES = int(os.environ.get("LLM_GATE_TEMPLATE_FAILURES", "2"))
+SHORT_FORM_MAX_TOKENS = int(os.environ.get("SHORT_FORM_MAX_TOKENS", "200"))
+
+# Duplicate Detection (reuse evaluations across repeat applications)
+DUPLICATE_FIELD = os.environ.get("DUPLICATE_FIELD", "Duplicate Of")
+DEDUP_SIMHASH_DISTANCE = int(os.environ.get("DEDUP_SIMHASH_DISTANCE", "10"))
+DEDUP_MAX_DIFF_FIELDS = int(os.environ.get("DEDUP_MAX_DIFF_FIELDS", "6"))
 
 # Business Rules
 TIER1_COMPANIES = {
@@ -36,4 +73,75 @@ ALLOWED_LOCATIONS = {
 
 MAX_HOURLY_RATE = 100.0
 MIN_AVAILABILITY = 20.0
-MIN_EXPERIENCE_YEARS = 4.0
\ No newline at end of file
+MIN_EXPERIENCE_YEARS = 4.0
+
+# Alias -> allowed location (e.g. "usa": "us"); FX rates are USD per unit of currency
+LOCATION_ALIASES = {}
+FX_RATES_TO_USD = {"USD": 1.0}
+
+# Local State
+STATE_DIR = os.environ.get("PIPELINE_STATE_DIR", ".pipeline")
+JOURNAL_PATH = os.path.join(STATE_DIR, "journal.jsonl")
+JOB_QUEUE_PATH = os.path.join(STATE_DIR, "llm_jobs.sqlite3")
+METRICS_PATH = os.path.join(STATE_DIR, "metrics.json")
+
+# Cold Archive (applicants moved out of the hot tables by `manual_tools archive`)
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", os.path.join(STATE_DIR, "archive"))
+ARCHIVE_COMPRESSION = os.environ.get("ARCHIVE_COMPRESSION", "gzip")
+ARCHIVE_MIN_AGE_DAYS = float(os.environ.get("ARCHIVE_MIN_AGE_DAYS", "90"))
+# Fields Airtable computes (created time, formulas, lookups...); never written back by `restore`.
+# Read from each table's schema when the token may; these names are always skipped.
+ARCHIVE_COMPUTED_FIELDS = {f.strip() for f in os.environ.get("ARCHIVE_COMPUTED_FIELDS", "Created At").split(",") if f.strip()}
+
+# Consistency Check, Search and What-If (`manual_tools verify` / `search` / `simulate`)
+VERIFY_WORKERS = int(os.environ.get("VERIFY_WORKERS", str(os.cpu_count() or 1)))
+VERIFY_REPORT_PATH = os.path.join(STATE_DIR, "drift_report.json")
+SEARCH_INDEX_PATH = os.path.join(STATE_DIR, "search_index.json")
+SIMULATION_REPORT_PATH = os.path.join(STATE_DIR, "simulation.json")
+
+# Reference Data (business rules; the values above are the defaults)
+# Source: empty for config.py, a JSON file path, an http(s) URL, or "airtable:<table name>"
+REFERENCE_DATA_SOURCE = os.environ.get("REFERENCE_DATA_SOURCE", "")
+REFERENCE_DATA_TTL = float(os.environ.get("REFERENCE_DATA_TTL", "300"))
+REFERENCE_DATA_CACHE_PATH = os.path.join(STATE_DIR, "reference_data.json")
+
+# Retry Policy (applied per HTTP request, separately for Airtable and Groq)
+RETRY_BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", "30.0"))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30.0"))
+
+# Rate Limits (per process; divided evenly across shards when running --shard i/N)
+AIRTABLE_REQUESTS_PER_SECOND = float(os.environ.get("AIRTABLE_REQUESTS_PER_SECOND", "5"))
+GROQ_REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30"))
+
+# Adaptive Concurrency (AIMD window per backend; LLM_WORKERS caps the Groq window)
+AIRTABLE_MAX_CONCURRENCY = int(os.environ.get("AIRTABLE_MAX_CONCURRENCY", "5"))
+AIMD_DECREASE_FACTOR = float(os.environ.get("AIMD_DECREASE_FACTOR", "0.5"))
+AIMD_LATENCY_SPIKE_FACTOR = float(os.environ.get("AIMD_LATENCY_SPIKE_FACTOR", "3.0"))
+
+# Watch / Daemon Mode
+WATCH_POLL_SECONDS = float(os.environ.get("WATCH_POLL_SECONDS", "15"))
+WATCH_BATCH_WINDOW = float(os.environ.get("WATCH_BATCH_WINDOW", "2.0"))
+WATCH_MAX_BATCH = int(os.environ.get("WATCH_MAX_BATCH", "25"))
+WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "0"))
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+
+# Cost / Time Estimation (dry run)
+LLM_INPUT_COST_PER_MTOK = float(os.environ.get("LLM_INPUT_COST_PER_MTOK", "0.11"))
+LLM_OUTPUT_COST_PER_MTOK = float(os.environ.get("LLM_OUTPUT_COST_PER_MTOK", "0.34"))
+
+# Environment variable behind each required secret, checked only when a client is built
+_REQUIRED_ENV = {
+    "AIRTABLE_TOKEN": "AIRTABLE_TOKEN",
+    "BASE_ID": "AIRTABLE_BASE_ID",
+    "GROQ_API_KEY": "GROQ_API_KEY",
+}
+
+def require_setting(name):
+    """Return a required setting, failing with a clear message if it is unset"""
+    value = globals().get(name)
+    if not value:
+        raise RuntimeError(f"Missing required environment variable {_REQUIRED_ENV.get(name, name)}")
+    return value
\ No newline at end of file
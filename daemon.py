@@ -0,0 +1,265 @@
+import json
+import time
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import *
+from utils.helpers import safe_get_field
+from utils.profiling import tracer
+from utils.journal import hash_inputs
+
+# Pipeline stages in execution order
+STAGES = ("compress", "shortlist", "llm")
+
+class ChangeBatcher:
+    """Thread-safe accumulator of changed applicants and the stages they need"""
+    def __init__(self):
+        self._pending = {}
+        self._first_change = None
+        self._cond = threading.Condition()
+
+    def add(self, applicant_id, stages):
+        with self._cond:
+            self._pending.setdefault(applicant_id, set()).update(stages)
+            if self._first_change is None:
+                self._first_change = time.monotonic()
+            self._cond.notify_all()
+
+    def next_batch(self, window, max_size, timeout):
+        """Block until a micro-batch is ready.
+
+        A batch closes `window` seconds after its first change or as soon as it
+        holds `max_size` applicants. Returns {} when `timeout` passes first.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._pending:
+                    closes_at = self._first_change + window
+                    if len(self._pending) >= max_size or now >= closes_at:
+                        break
+                    wait = min(closes_at, deadline) - now
+                else:
+                    wait = deadline - now
+                if wait <= 0:
+                    return {}
+                self._cond.wait(wait)
+
+            batch = dict(list(self._pending.items())[:max_size])
+            for applicant_id in batch:
+                del self._pending[applicant_id]
+            self._first_change = time.monotonic() if self._pending else None
+            return batch
+
+class PipelineDaemon:
+    """Long-running pipeline: warm clients, change notifications, micro-batched stages"""
+    def __init__(self, pipeline, poll_interval=WATCH_POLL_SECONDS, webhook_port=WEBHOOK_PORT,
+                 batch_window=WATCH_BATCH_WINDOW, max_batch=WATCH_MAX_BATCH):
+        self.pipeline = pipeline
+        self.client = pipeline.client
+        self.poll_interval = poll_interval
+        self.webhook_port = webhook_port
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batcher = ChangeBatcher()
+        self.server = None
+        # (table, record ID) -> content hash last seen or written by us. Polls
+        # overlap in time, so this is what stops a change being processed twice
+        # and stops our own Compressed JSON writes from re-triggering the pipeline.
+        self._seen = {}
+        self._last_poll = None
+        self._since = None
+
+    # ------------------------------------------------------------------
+    # Change intake
+    # ------------------------------------------------------------------
+    def child_tables(self):
+        return {
+            T_PERSONAL: self.client.personal,
+            T_EXPERIENCE: self.client.experience,
+            T_SALARY: self.client.salary,
+        }
+
+    def notify(self, table_name, record_id=None, applicant_id=None):
+        """Queue the stages affected by a change to one record"""
+        if table_name == T_APPLICANTS:
+            applicant_id = applicant_id or record_id
+            stages = ("shortlist", "llm")
+        elif table_name in self.child_tables():
+            if not applicant_id and record_id:
+                child = self.child_tables()[table_name].get(record_id)
+                links = safe_get_field(child, LINK_FIELD, [])
+                applicant_id = links[0] if links else None
+            stages = STAGES
+        else:
+            raise ValueError(f"Unknown table {table_name!r}")
+
+        if not applicant_id:
+            return False
+        if self.client.shard and not self.client.shard.contains(applicant_id):
+            return False
+        self.batcher.add(applicant_id, stages)
+        return True
+
+    def poll_changes(self):
+        """Queue records modified since the previous poll"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self._since is None:
+            # First poll only establishes the watermark
+            self._since = now
+            return 0
+
+        # Overlap a few seconds to tolerate clock skew; duplicates collapse in the batcher
+        since = (self._since - datetime.timedelta(seconds=5)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        formula = f"IS_AFTER(LAST_MODIFIED_TIME(), '{since}')"
+        changes = 0
+
+        with tracer.span("watch poll", cat="watch"):
+            for table_name, table in self.child_tables().items():
+                for record in table.all(formula=formula):
+                    if not self._is_new_content(table_name, record["id"], record.get("fields", {})):
+                        continue
+                    for applicant_id in safe_get_field(record, LINK_FIELD, []):
+                        changes += self.notify(table_name, applicant_id=applicant_id)
+
+            fields = ["Compressed JSON", *REVERSE_LINK_FIELDS.values()]
+            for record in self.client.applicants.all(formula=formula, fields=fields):
+                table_name = self._applicant_change(record)
+                if table_name:
+                    changes += self.notify(table_name, applicant_id=record["id"])
+
+        self._since = now
+        return changes
+
+    def _applicant_change(self, record):
+        """What changed on an applicant since it was last seen, as the table to notify (None if nothing).
+
+        A child row deleted (or linked) shows up only in the reverse-link
+        fields, and calls for recompression like any child-table change.
+        """
+        changed = None
+        for table_name, field in REVERSE_LINK_FIELDS.items():
+            links = sorted(safe_get_field(record, field) or [])
+            if self._is_new_content(f"{table_name} links", record["id"], links):
+                changed = changed or table_name
+        if self._is_new_content(T_APPLICANTS, record["id"], safe_get_field(record, "Compressed JSON")):
+            changed = changed or T_APPLICANTS
+        return changed
+
+    def _is_new_content(self, table_name, record_id, content):
+        content_hash = hash_inputs(content)
+        if self._seen.get((table_name, record_id)) == content_hash:
+            return False
+        self._seen[(table_name, record_id)] = content_hash
+        return True
+
+    def start_webhook(self):
+        """Serve POST /notify on WEBHOOK_HOST:port in a background thread"""
+        daemon = self
+
+        class WebhookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != "/notify":
+                    return self._reply(404, {"error": "not found"})
+                if WEBHOOK_SECRET and self.headers.get("X-Webhook-Secret") != WEBHOOK_SECRET:
+                    return self._reply(403, {"error": "bad secret"})
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                    events = payload if isinstance(payload, list) else [payload]
+                    queued = sum(
+                        daemon.notify(e.get("table", T_APPLICANTS), e.get("record_id"), e.get("applicant"))
+                        for e in events
+                    )
+                except Exception as e:
+                    return self._reply(400, {"error": str(e)})
+                self._reply(202, {"queued": queued})
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((WEBHOOK_HOST, self.webhook_port), WebhookHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"🔔 Webhook listening on http://{WEBHOOK_HOST}:{self.server.server_port}/notify")
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+    def process_batch(self, batch):
+        """Run only the affected stages for each applicant in a micro-batch"""
+        results = {"success": [], "failed": []}
+        print(f"\n⚡ Micro-batch of {len(batch)} applicants")
+
+        for applicant_id, stages in batch.items():
+            with tracer.span("watch applicant", cat="watch", applicant=applicant_id):
+                try:
+                    self._process_applicant(applicant_id, stages)
+                    results["success"].append(applicant_id)
+                except Exception as e:
+                    results["failed"].append((applicant_id, str(e)))
+                    print(f"  ❌ {applicant_id}: {e}")
+        return results
+
+    def _process_applicant(self, applicant_id, stages):
+        if "compress" in stages:
+            with tracer.span("compress", cat="stage", applicant=applicant_id):
+                result = self.pipeline.compressor.compress_applicant_data(applicant_id)
+            if not result["success"]:
+                raise RuntimeError(f"compression failed: {result['error']}")
+            print(f"  📦 {applicant_id}: recompressed")
+
+        record = self.client.get_applicant(applicant_id)
+        # Our own writes must not come back as changes on the next poll
+        self._applicant_change(record)
+
+        if "shortlist" in stages and safe_get_field(record, "Shortlist Status") != "yes":
+            with tracer.span("shortlist", cat="stage", applicant=applicant_id):
+                self.pipeline.shortlister.shortlist_applicant(record)
+
+        if "llm" in stages:
+            with tracer.span("llm_evaluate", cat="stage", applicant=applicant_id):
+                result = self.pipeline.llm_evaluator.evaluate_applicant(record)
+            if not result["success"]:
+                raise RuntimeError(f"LLM evaluation failed: {result['error']}")
+            if not result.get("skipped"):
+                print(f"  🤖 {applicant_id}: scored {result['evaluation']['score']}/10")
+
+    def run(self):
+        """Serve notifications and process micro-batches until interrupted"""
+        print("👀 Watch mode: waiting for changes (Ctrl+C to stop)")
+        if self.webhook_port:
+            self.start_webhook()
+        if self.poll_interval:
+            print(f"🔁 Polling for modified records every {self.poll_interval:g}s")
+
+        try:
+            while True:
+                if self.poll_interval and (
+                    self._last_poll is None or time.monotonic() - self._last_poll >= self.poll_interval
+                ):
+                    self._last_poll = time.monotonic()
+                    try:
+                        self.poll_changes()
+                    except Exception as e:
+                        print(f"  ⚠️  Poll failed: {e}")
+
+                timeout = self.poll_interval or 60.0
+                if self.poll_interval:
+                    timeout = max(0.1, self._last_poll + self.poll_interval - time.monotonic())
+                batch = self.batcher.next_batch(self.batch_window, self.max_batch, timeout)
+                if batch:
+                    self.process_batch(batch)
+        except KeyboardInterrupt:
+            print("\n👋 Watch mode stopped")
+        finally:
+            if self.server:
+                self.server.shutdown()
@@ -1,21 +1,47 @@
 
 import argparse
 import datetime
-from processors.compressor import DataCompressor
-from processors.shortlister import ApplicantShortlister  
-from processors.llm_evaluator import LLMEvaluator
+from functools import cached_property
 from utils.airtable_client import airtable
+from utils.profiling import Profiler, tracer, default_profile_prefix
+from utils.journal import RunJournal
+from utils.sharding import Shard, apply_shard
+from utils.job_queue import JobQueue
+from utils.metrics import metrics, save_profile
+from config import JOURNAL_PATH, JOB_QUEUE_PATH, WATCH_POLL_SECONDS, WEBHOOK_PORT
 
 class ContractorPipeline:
-    def __init__(self):
-        self.compressor = DataCompressor()
-        self.shortlister = ApplicantShortlister()
-        self.llm_evaluator = LLMEvaluator()
+    def __init__(self, shard=None):
         self.client = airtable
+        self.shard = shard
+        self._single_applicant = None
+        if shard:
+            apply_shard(self.client, shard)
     
-    def get_applicants_for_processing(self, mode="new_only"):
+    # Processors are built on first use; --dry-run never touches the LLM stack.
+    @cached_property
+    def compressor(self):
+        from processors.compressor import DataCompressor
+        return DataCompressor()
+    
+    @cached_property
+    def shortlister(self):
+        from processors.shortlister import ApplicantShortlister
+        return ApplicantShortlister()
+    
+    @cached_property
+    def llm_evaluator(self):
+        from processors.llm_evaluator import LLMEvaluator
+        return LLMEvaluator()
+    
+    def _state_path(self, path):
+        """Local state file for this process (suffixed per shard)"""
+        return self.shard.state_path(path) if self.shard else path
+    
+    def get_applicants_for_processing(self, mode="new_only", all_applicants=None):
         """Get applicants that need processing based on mode"""
-        all_applicants = self.client.get_all_applicants()
+        if all_applicants is None:
+            all_applicants = self.client.get_all_applicants()
         
         if mode == "all":
             return all_applicants
@@ -31,69 +57,76 @@ class ContractorPipeline:
         else:
             return []
     
-    def run_full_pipeline(self, mode="new_only", single_applicant=None):
+    def run_full_pipeline(self, mode="new_only", single_applicant=None, resume=False):
         """Run the complete processing pipeline"""
         print("🚀 Starting Contractor Application Pipeline")
         print(f"📅 {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
         
+        self.journal = RunJournal(self._state_path(JOURNAL_PATH)).start(resume=resume)
+        if self.shard:
+            print(f"🧩 Shard {self.shard}: only records hashing to this shard are processed")
+        
         # Handle single applicant mode
+        self._single_applicant = single_applicant
         if single_applicant:
             print(f"🎯 Processing single applicant: {single_applicant}")
+            if self.shard and not self.shard.contains(single_applicant):
+                print(f"⏭️  {single_applicant} belongs to another shard; nothing to do")
+                self.journal.finish()
+                return {"message": "No work needed"}
             applicants_to_process = [self.client.get_applicant(single_applicant)]
         else:
             # Get applicants to process
             applicants_to_process = self.get_applicants_for_processing(mode)
             print(f"📊 Found {len(applicants_to_process)} applicants to process (mode: {mode})")
         
-        if not applicants_to_process:
-            print("✅ No applicants need processing. Pipeline complete.")
-            return {"message": "No work needed"}
+        # No early exit on an empty list: the fingerprint sweep, shortlisting and
+        # jobs left in the queue by a crashed run each decide their own work.
         
         # Phase 1: Compression
         print("\n📦 PHASE 1: Data Compression")
         print("-" * 40)
-        compression_results = self._run_compression_phase(applicants_to_process, mode)
+        with tracer.span("phase:compression", cat="phase"):
+            compression_results = self._run_compression_phase(applicants_to_process, mode)
         
         # Phase 2: Shortlisting (only for successfully compressed)
         print("\n⭐ PHASE 2: Shortlisting Evaluation") 
         print("-" * 40)
-        shortlist_results = self._run_shortlisting_phase()
+        with tracer.span("phase:shortlisting", cat="phase"):
+            shortlist_results = self._run_shortlisting_phase()
         
         # Phase 3: LLM Evaluation (only for successfully compressed)
         print("\n🤖 PHASE 3: LLM Evaluation")
         print("-" * 40)
-        llm_results = self._run_llm_phase()
+        with tracer.span("phase:llm", cat="phase"):
+            llm_results = self._run_llm_phase(mode)
         # llm_results = {"success": [], "failed": [], "skipped": [], "total_tokens": 0}
         
         # Summary Report
         self._print_pipeline_summary(compression_results, shortlist_results, llm_results)
+        self.journal.finish()
+        save_profile()
         
-        return {
+        results = {
             "compression": compression_results,
             "shortlisting": shortlist_results,
             "llm_evaluation": llm_results,
             "pipeline_completed": datetime.datetime.now().isoformat()
         }
+        phases = (compression_results, shortlist_results, llm_results)
+        if not any(phase["success"] or phase["failed"] for phase in phases):
+            print("✅ No applicants needed processing.")
+            results["message"] = "No work needed"
+        return results
     
     def _run_compression_phase(self, applicants_to_process, mode):
         """Run the compression phase"""
-        if mode == "all":
-            # Force recompression for all
-            results = {"success": [], "failed": [], "skipped": []}
-            for applicant in applicants_to_process:
-                record_id = applicant["id"]
-                print(f"  📦 Recompressing applicant {record_id}")
-                result = self.compressor.compress_applicant_data(record_id)
-                
-                if result["success"]:
-                    results["success"].append(record_id)
-                else:
-                    results["failed"].append((record_id, result["error"]))
-                    print(f"  ❌ Failed: {result['error']}")
-        else:
-            # Normal compression (skip existing)
-            results = self.compressor.compress_all_applicants()
+        # Child-row fingerprints decide what gets recompressed, so even --mode all
+        # only rewrites applicants whose linked rows changed. Other modes sweep
+        # the whole base to pick up edits to already-compressed applicants.
+        sweep = applicants_to_process if mode == "all" or self._single_applicant else None
+        results = self.compressor.compress_all_applicants(journal=self.journal, applicants=sweep)
         
         print(f"  ✅ Compressed: {len(results['success'])}")
         print(f"  ❌ Failed: {len(results['failed'])}")  
@@ -103,11 +136,13 @@ class ContractorPipeline:
     
     def _run_shortlisting_phase(self):
         """Run the shortlisting phase"""
-        results = self.shortlister.shortlist_all_applicants()
+        results = self.shortlister.shortlist_all_applicants(journal=self.journal)
         
         print(f"  ✅ Shortlisted: {len(results['success'])}")
         print(f"  ❌ Failed: {len(results['failed'])}")
         print(f"  ⏭️  Ineligible: {len(results['ineligible'])}")
+        if results.get("skipped"):
+            print(f"  ♻️  Already done before interruption: {len(results['skipped'])}")
         
         # Show shortlisted candidates
         if results['success']:
@@ -117,15 +152,34 @@ class ContractorPipeline:
         
         return results
     
-    def _run_llm_phase(self):
+    def _run_llm_phase(self, mode="new_only"):
         """Run the LLM evaluation phase"""
-        results = self.llm_evaluator.evaluate_all_applicants()
+        queue = JobQueue(self._state_path(JOB_QUEUE_PATH))
+        try:
+            results = self.llm_evaluator.evaluate_all_applicants(
+                force_reprocess=(mode == "all"), journal=self.journal, queue=queue
+            )
+        finally:
+            queue.close()
         
         print(f"  ✅ Evaluated: {len(results['success'])}")
         print(f"  ❌ Failed: {len(results['failed'])}")
         print(f"  ⏭️  Skipped: {len(results['skipped'])}")
         print(f"  🎯 Total Tokens Used: {results.get('total_tokens', 0)}")
-        
+        tiers = results.get("tiers", {})
+        if tiers.get("short") or tiers.get("template"):
+            print(f"  🚦 Gated: {tiers['short']} short-form, {tiers['template']} templated (no tokens)")
+        hedging = results.get("hedging", {})
+        if hedging.get("hedged") or hedging.get("failovers"):
+            print(f"  🏎️  Hedged: {hedging['hedged']} requests ({hedging['hedge_wins']} won by a backup provider), "
+                  f"{hedging['failovers']} failovers, extra spend {hedging['extra_tokens']} tokens (${hedging['extra_cost']:.4f})")
+        reused = results.get("reused", {})
+        if reused.get("duplicate") or reused.get("near"):
+            print(f"  👯 Duplicates: {reused['duplicate']} evaluations reused, {reused['near']} near-duplicates re-scored on their differences")
+        repairs = results.get("repairs", {})
+        if repairs.get("local") or repairs.get("follow_up"):
+            print(f"  🩹 Repaired replies: {repairs['local']} fixed locally, {repairs['follow_up']} needed a missing-fields follow-up")
+
         return results
     
     def _print_pipeline_summary(self, compression, shortlisting, llm):
@@ -148,6 +202,21 @@ class ContractorPipeline:
         print(f"  • Failed: {len(llm['failed'])}")
         print(f"  • Skipped (no changes): {len(llm['skipped'])}")
         print(f"  • Total API tokens used: {llm.get('total_tokens', 0)}")
+        if llm.get("tiers"):
+            tiers = llm["tiers"]
+            print(f"  • Tiers: {tiers['full']} full, {tiers['short']} short-form, {tiers['template']} templated")
+        
+        writes = self.client.write_stats
+        print(f"\nAirtable Writes:")
+        print(f"  • Applicant updates sent: {writes['sent']}")
+        print(f"  • No-op updates elided: {writes['elided']}")
+        print(f"  • Unchanged fields dropped from updates: {writes['fields_elided']}")
+        
+        print(f"\nConcurrency (AIMD windows):")
+        for name, backend in metrics.items():
+            if backend.controller:
+                window = backend.controller.summary()
+                print(f"  • {name}: window {window['window']:g} (peak {window['peak_window']:g}, {window['window_cuts']} cuts)")
         
         print(f"\n✅ Pipeline completed at {datetime.datetime.now().strftime('%H:%M:%S')}")
 
@@ -157,23 +226,59 @@ def main():
                        help="Processing mode: new_only, changed, or all")
     parser.add_argument("--applicant", help="Process single applicant by record ID")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be processed without doing it")
+    parser.add_argument("--shard", type=Shard.parse, metavar="i/N",
+                       help="Process only records in shard i of N (stable hash of record ID, 0-based)")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue an interrupted run, skipping steps recorded in the journal")
+    parser.add_argument("--watch", action="store_true",
+                       help="Run as a daemon, processing changed applicants in micro-batches")
+    parser.add_argument("--poll-interval", type=float, default=WATCH_POLL_SECONDS,
+                       help="Watch mode: seconds between polls for modified records (0 disables polling)")
+    parser.add_argument("--webhook-port", type=int, default=WEBHOOK_PORT,
+                       help="Watch mode: serve POST /notify on this port (0 disables the webhook)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Write a cProfile dump (PREFIX.prof) and Chrome trace (PREFIX.trace.json)")
     
     args = parser.parse_args()
     
-    pipeline = ContractorPipeline()
+    pipeline = ContractorPipeline(shard=args.shard)
+    
+    if args.watch:
+        from daemon import PipelineDaemon
+        daemon = PipelineDaemon(pipeline, poll_interval=args.poll_interval, webhook_port=args.webhook_port)
+        if args.profile is not None:
+            with Profiler(args.profile or default_profile_prefix("watch")):
+                daemon.run()
+        else:
+            daemon.run()
+        return
     
     if args.dry_run:
-        applicants = pipeline.get_applicants_for_processing(args.mode)
+        from processors.estimator import RunEstimator, print_estimate
+        if args.applicant:
+            all_applicants = [pipeline.client.get_applicant(args.applicant)]
+            applicants = all_applicants
+        else:
+            all_applicants = pipeline.client.get_all_applicants()
+            applicants = pipeline.get_applicants_for_processing(args.mode, all_applicants)
         print(f"🔍 DRY RUN: Would process {len(applicants)} applicants")
         for applicant in applicants[:5]:  # Show first 5
             name = applicant.get("fields", {}).get("Name", "Unknown")
             print(f"  • {applicant['id']}: {name}")
         if len(applicants) > 5:
             print(f"  • ... and {len(applicants) - 5} more")
+        
+        # Phases sweep the whole base (fingerprints decide the actual work)
+        print_estimate(RunEstimator().estimate(all_applicants, mode=args.mode))
         return
     
     try:
-        results = pipeline.run_full_pipeline(mode=args.mode, single_applicant=args.applicant)
+        run_kwargs = {"mode": args.mode, "single_applicant": args.applicant, "resume": args.resume}
+        if args.profile is not None:
+            with Profiler(args.profile or default_profile_prefix("pipeline")):
+                results = pipeline.run_full_pipeline(**run_kwargs)
+        else:
+            results = pipeline.run_full_pipeline(**run_kwargs)
         
         # Exit codes for automation
         if results.get("message") == "No work needed":
@@ -1,18 +1,47 @@
 
+import os
+import time
 import argparse
 import json
-from processors.decompressor import DataDecompressor
-from processors.compressor import DataCompressor
-from processors.llm_evaluator import LLMEvaluator
+from functools import cached_property
+from config import (
+    NAME_FIELD, FINGERPRINT_FIELD, ARCHIVE_MIN_AGE_DAYS, VERIFY_WORKERS, VERIFY_REPORT_PATH, SIMULATION_REPORT_PATH,
+)
 from utils.airtable_client import airtable
+from utils.helpers import formula_string
+from utils.profiling import Profiler, tracer, default_profile_prefix
 
 class ManualTools:
     def __init__(self):
-        self.decompressor = DataDecompressor()
-        self.compressor = DataCompressor()
-        self.llm_evaluator = LLMEvaluator()
         self.client = airtable
     
+    # Processors are imported and built on first use so that read-only
+    # commands (view, list) never load the LLM stack.
+    @cached_property
+    def decompressor(self):
+        from processors.decompressor import DataDecompressor
+        return DataDecompressor()
+    
+    @cached_property
+    def compressor(self):
+        from processors.compressor import DataCompressor
+        return DataCompressor()
+    
+    @cached_property
+    def llm_evaluator(self):
+        from processors.llm_evaluator import LLMEvaluator
+        return LLMEvaluator()
+    
+    @cached_property
+    def archiver(self):
+        from processors.archiver import ApplicantArchiver
+        return ApplicantArchiver()
+    
+    @cached_property
+    def verifier(self):
+        from processors.verifier import ConsistencyVerifier
+        return ConsistencyVerifier()
+    
     def decompress_for_editing(self, applicant_id):
         """Decompress applicant data for manual editing"""
         print(f"🔧 Decompressing applicant {applicant_id} for manual editing...")
@@ -35,9 +64,13 @@ class ManualTools:
         """Recompress and re-evaluate after manual edits"""
         print(f"🔄 Reprocessing applicant {applicant_id} after manual edits...")
         
+        # Load the current record first so unchanged fields aren't rewritten
+        applicant = self.client.get_applicant(applicant_id)
+        
         # Step 1: Recompress
         print("  📦 Step 1: Recompressing data...")
-        compress_result = self.compressor.compress_applicant_data(applicant_id)
+        with tracer.span("compress", cat="stage", applicant=applicant_id):
+            compress_result = self.compressor.compress_applicant_data(applicant_id, applicant=applicant)
         
         if not compress_result["success"]:
             print(f"  ❌ Compression failed: {compress_result['error']}")
@@ -47,8 +80,9 @@ class ManualTools:
         
         # Step 2: Re-evaluate with LLM
         print("  🤖 Step 2: Re-evaluating with LLM...")
-        applicant_record = self.client.get_applicant(applicant_id)
-        llm_result = self.llm_evaluator.evaluate_applicant(applicant_record)
+        applicant_record = self.client.cached_applicant(applicant_id)
+        with tracer.span("llm_evaluate", cat="stage", applicant=applicant_id):
+            llm_result = self.llm_evaluator.evaluate_applicant(applicant_record)
         
         if llm_result["success"] and not llm_result.get("skipped"):
             score = llm_result["evaluation"]["score"]
@@ -58,7 +92,8 @@ class ManualTools:
         else:
             print(f"  ❌ LLM evaluation failed: {llm_result['error']}")
         
-        print("✅ Reprocessing complete")
+        elided = self.client.write_stats["elided"]
+        print(f"✅ Reprocessing complete ({elided} no-op writes skipped)" if elided else "✅ Reprocessing complete")
         return True
     
     def view_applicant_summary(self, applicant_id):
@@ -116,42 +151,231 @@ class ManualTools:
         except Exception as e:
             print(f"❌ Error retrieving applicant data: {e}")
     
-    def list_recent_applicants(self, limit=10):
-        """List recent applicants with basic info"""
+    def list_recent_applicants(self, limit=10, after=None, status=None, pending=False):
+        """List recent applicants with basic info, newest first"""
         print(f"📋 Recent Applicants (last {limit})")
         print("=" * 60)
         
-        applicants = self.client.get_all_applicants()
-        
-        # Sort by creation date if available, otherwise just take first N
-        recent_applicants = applicants[-limit:] if len(applicants) > limit else applicants
+        # Only the fields behind the indicators; never the Compressed JSON itself
+        fields = [NAME_FIELD, "Shortlist Status", "LLM Score", FINGERPRINT_FIELD]
+        applicants = self.client.recent_applicants(limit, fields, self._list_formula(after, status, pending))
         
-        for applicant in recent_applicants:
+        for applicant in applicants:
             record_id = applicant["id"]
             fields = applicant.get("fields", {})
-            
-            # Try to get name from compressed JSON or fallback
-            name = "Unknown"
-            if fields.get("Compressed JSON"):
-                try:
-                    data = json.loads(fields["Compressed JSON"])
-                    name = data.get("personal", {}).get("name", "Unknown")
-                except:
-                    pass
+            name = fields.get(NAME_FIELD, "Unknown")
             
             status_indicators = []
-            if fields.get("Compressed JSON"):
+            if fields.get(FINGERPRINT_FIELD):
                 status_indicators.append("📦")
-            if fields.get("Shortlist Status") == "Shortlisted":
+            if fields.get("Shortlist Status") in ("yes", "Shortlisted"):
                 status_indicators.append("⭐")
-            if fields.get("LLM Summary"):
+            if fields.get("LLM Score") is not None:
                 status_indicators.append("🤖")
             
             status_str = "".join(status_indicators) if status_indicators else "⚪"
             print(f"  {status_str} {record_id}: {name}")
+        
+        if not applicants:
+            print("  (no applicants)")
+        elif len(applicants) == limit:
+            print(f"➡️  Next page: python manual_tools.py list --limit {limit} --after {self._next_cursor(applicants, after)}")
+        return applicants
+    
+    def _next_cursor(self, applicants, after=None):
+        """Cursor after the last row shown: its createdTime plus every ID already shown with that createdTime.
+
+        Seeding creates 10 records per request, so createdTime alone would skip
+        the rest of a batch that straddles a page boundary.
+        """
+        last = applicants[-1]["createdTime"]
+        shown = [a["id"] for a in applicants if a["createdTime"] == last]
+        previous, *previous_ids = (after or "").split(",")
+        if previous == last:
+            shown = previous_ids + shown
+        return ",".join([last, *shown])
+    
+    def _list_formula(self, after, status, pending):
+        """Airtable formula for the list filters (None when unfiltered)"""
+        conditions = []
+        if after:
+            # "<createdTime>[,<shown ID>...]": at or before that time, minus the IDs already shown
+            created, *shown = after.split(",")
+            conditions.append(f"NOT(IS_AFTER(CREATED_TIME(), {formula_string(created)}))")
+            conditions += [f"RECORD_ID() != {formula_string(record_id)}" for record_id in shown if record_id]
+        if status:
+            conditions.append(f"{{Shortlist Status}} = {formula_string(status)}")
+        if pending:
+            conditions.append("{LLM Summary} = BLANK()")
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else f"AND({', '.join(conditions)})"
+
+    def archive_finished(self, min_age_days=ARCHIVE_MIN_AGE_DAYS, limit=None, dry_run=False):
+        """Move finished applicants older than `min_age_days` to the local cold archive"""
+        print(f"🧊 Archiving finished applicants older than {min_age_days:g} days{' (dry run)' if dry_run else ''}...")
+        results = self.archiver.archive_applicants(min_age_days, limit=limit, dry_run=dry_run)
+        print(f"  • Archived: {len(results['success'])}")
+        print(f"  • Failed: {len(results['failed'])}")
+        print(f"  • Skipped: {len(results['skipped'])}")
+        return results
+    
+    def restore_archived(self, applicant_id):
+        """Re-create an archived applicant and its child rows in Airtable"""
+        print(f"♻️  Restoring archived applicant {applicant_id}...")
+        result = self.archiver.restore_applicant(applicant_id)
+        if not result["success"]:
+            print(f"❌ Failed to restore: {result['error']}")
+            return False
+        rows = ", ".join(f"{count} {table}" for table, count in result["restored"].items() if count)
+        print(f"✅ Restored as {result['record_id']} ({rows or 'no linked rows'})")
+        print(f"💡 View it with: python manual_tools.py view --applicant {result['record_id']}")
+        return True
+
+    @cached_property
+    def simulator(self):
+        from processors.simulator import ThresholdSimulator
+        return ThresholdSimulator()
+
+    def verify_consistency(self, workers=VERIFY_WORKERS, output=VERIFY_REPORT_PATH):
+        """Compare every Compressed JSON with its child rows and write a drift report (read-only)"""
+        print("🔍 Verifying Compressed JSON against child tables...")
+        report = self.verifier.verify(workers=workers)
+        
+        if output == "-":
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        
+        counts = report["counts"]
+        print(f"  • Applicants: {counts['applicants']}")
+        print(f"  • Consistent: {counts['consistent']}")
+        for status in ("drift", "missing_json", "invalid_json", "stale_fingerprint"):
+            if counts.get(status):
+                print(f"  • {status.replace('_', ' ').capitalize()}: {counts[status]}")
+        orphans = sum(len(rows) for rows in report["orphans"].values())
+        if orphans:
+            print(f"  • Orphaned child rows: {orphans}")
+        if output != "-":
+            print(f"📄 Drift report written to {output}")
+        return report
+
+    def search_applicants(self, query, limit=20, rebuild=False, offline=False):
+        """Search the local index of Compressed JSON (refreshed incrementally first)"""
+        from utils.search_index import SearchIndex
+        index = SearchIndex.load()
+        if not offline:
+            changed = index.refresh(self.client, rebuild=rebuild)
+            print(f"🗂️  Index: {len(index)} applicants ({changed} {'indexed' if rebuild else 'updated'})")
+        
+        started = time.perf_counter()
+        try:
+            matches = index.search(query)
+        except ValueError as e:
+            print(f"❌ Bad query: {e}")
+            return []
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        # Most experienced first
+        ranked = sorted(matches, key=lambda record_id: -(index.docs[record_id].get("years") or 0))
+        print(f"🔎 {len(ranked)} matches for {query!r} in {elapsed_ms:.1f} ms")
+        for record_id in ranked[:limit]:
+            doc = index.docs[record_id]
+            rate = f"{doc['rate']} {doc.get('currency') or ''}/hr".replace(" /", "/") if doc.get("rate") is not None else "rate N/A"
+            hours = f"{doc['availability']} hrs/wk" if doc.get("availability") is not None else "hours N/A"
+            print(f"  👤 {record_id}: {doc.get('name') or 'Unknown'} — {doc.get('years', 0):.1f} yrs, {rate}, "
+                  f"{hours}, {doc.get('location') or 'location N/A'}")
+        if len(ranked) > limit:
+            print(f"  … {len(ranked) - limit} more (use --limit)")
+        return ranked
+
+    def show_rules(self, refresh=False):
+        """Print the business rules currently in effect (revalidated against their source first with `refresh`)"""
+        from utils.reference_data import reference_data
+        rules = reference_data.refresh() if refresh else reference_data.get()
+        summary = rules.summary()
+        print(f"📏 Rules from {reference_data.source or 'config.py'} (version {summary['version'][:16]})")
+        print(f"  • Tier-1 companies: {', '.join(sorted(rules.tier1))}")
+        print(f"  • Allowed locations: {', '.join(sorted(rules.allowed_locations))} "
+              f"(+{summary['location_aliases']} aliases)")
+        print(f"  • FX rates to USD: {', '.join(f'{c} {r:g}' for c, r in sorted(rules.fx_rates.items()))}")
+        print(f"  • Max rate ${rules.max_hourly_rate:g}/hr, min availability {rules.min_availability:g} hrs/wk, "
+              f"min experience {rules.min_experience_years:g} yrs")
+        if refresh:
+            print(f"  • Refresh: {reference_data.stats}")
+        return summary
+
+    def simulate_thresholds(self, rates=None, availability=None, years=None, limit=30, max_ids=100,
+                            output=SIMULATION_REPORT_PATH):
+        """What-if over shortlisting thresholds: eligible counts and flips per combination (read-only)"""
+        from processors.simulator import parse_values
+        grid = {
+            "max_hourly_rate": parse_values(rates) if rates else None,
+            "min_availability": parse_values(availability) if availability else None,
+            "min_experience_years": parse_values(years) if years else None,
+        }
+        print("🧮 Simulating shortlisting thresholds...")
+        report = self.simulator.run(grid, max_ids=max_ids)
+        
+        if output == "-":
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        
+        base = report["baseline"]
+        seconds = report["seconds"]
+        combinations = report["combinations"]
+        print(f"  • Applicants: {report['applicants']} (loaded in {seconds['load']:.1f}s, "
+              f"inputs extracted in {seconds['extract']:.2f}s)")
+        print(f"  • Current: rate ≤ ${base['max_hourly_rate']:g}, ≥ {base['min_availability']:g} hrs/wk, "
+              f"≥ {base['min_experience_years']:g} yrs → {base['eligible']} eligible")
+        print(f"  • {len(combinations)} combinations simulated in {seconds['simulate'] * 1000:.1f} ms")
+        print(f"    {'max rate':>9} {'min hrs':>8} {'min yrs':>8} {'eligible':>9} {'gained':>7} {'lost':>6}")
+        for row in combinations[:limit]:
+            print(f"    {row['max_hourly_rate']:>9g} {row['min_availability']:>8g} {row['min_experience_years']:>8g} "
+                  f"{row['eligible']:>9} {'+' + str(row['gained']):>7} {'-' + str(row['lost']):>6}")
+        if len(combinations) > limit:
+            print(f"    … {len(combinations) - limit} more (use --limit)")
+        if output != "-":
+            print(f"📄 Report with flipped applicant IDs written to {output}")
+        return report
+
+def run_command(tools, args):
+    """Dispatch a parsed subcommand to ManualTools"""
+    if args.command == "decompress":
+        tools.decompress_for_editing(args.applicant)
+    elif args.command == "reprocess":
+        tools.reprocess_after_edit(args.applicant)
+    elif args.command == "view":
+        tools.view_applicant_summary(args.applicant)
+    elif args.command == "list":
+        tools.list_recent_applicants(args.limit, after=args.after, status=args.status, pending=args.pending)
+    elif args.command == "archive":
+        tools.archive_finished(args.older_than, limit=args.limit, dry_run=args.dry_run)
+    elif args.command == "restore":
+        tools.restore_archived(args.applicant)
+    elif args.command == "search":
+        tools.search_applicants(" ".join(args.query), limit=args.limit, rebuild=args.rebuild, offline=args.offline)
+    elif args.command == "verify":
+        tools.verify_consistency(workers=args.workers, output=args.output)
+    elif args.command == "simulate":
+        tools.simulate_thresholds(args.rate, args.availability, args.years, limit=args.limit,
+                                  max_ids=args.max_ids, output=args.output)
+    elif args.command == "rules":
+        tools.show_rules(refresh=args.refresh)
 
 def main():
     parser = argparse.ArgumentParser(description="Manual Tools for Contractor Application Management")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Write a cProfile dump (PREFIX.prof) and Chrome trace (PREFIX.trace.json)")
     
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
@@ -170,6 +394,48 @@ def main():
     # List command
     list_parser = subparsers.add_parser("list", help="List recent applicants")
     list_parser.add_argument("--limit", type=int, default=10, help="Number of applicants to show")
+    list_parser.add_argument("--after", metavar="CURSOR",
+                            help="Continue a listing from the cursor printed under the previous page")
+    list_parser.add_argument("--status", help="Only applicants with this Shortlist Status")
+    list_parser.add_argument("--pending", action="store_true", help="Only applicants without an LLM Summary")
+    
+    # Archive command
+    archive_parser = subparsers.add_parser("archive", help="Move finished applicants to the local cold archive")
+    archive_parser.add_argument("--older-than", type=float, default=ARCHIVE_MIN_AGE_DAYS, metavar="DAYS",
+                               help="Only applicants created more than DAYS ago")
+    archive_parser.add_argument("--limit", type=int, help="Archive at most this many applicants")
+    archive_parser.add_argument("--dry-run", action="store_true", help="List what would be archived")
+    
+    # Restore command
+    restore_parser = subparsers.add_parser("restore", help="Restore an archived applicant")
+    restore_parser.add_argument("--applicant", required=True, help="Archived applicant record ID")
+    
+    # Search command
+    search_parser = subparsers.add_parser("search", help="Search applicants by technology, company, title, location, rate")
+    search_parser.add_argument("query", nargs="+",
+                              help='e.g. tech:go AND tier1 AND loc:germany AND rate<80 (OR, NOT, -term and parentheses work too)')
+    search_parser.add_argument("--limit", type=int, default=20, help="Number of matches to show")
+    search_parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from every applicant")
+    search_parser.add_argument("--offline", action="store_true", help="Query the local index without refreshing it")
+    
+    # Verify command
+    verify_parser = subparsers.add_parser("verify", help="Check Compressed JSON against child tables (read-only)")
+    verify_parser.add_argument("--workers", type=int, default=VERIFY_WORKERS, help="Worker processes for the compare step")
+    verify_parser.add_argument("--output", default=VERIFY_REPORT_PATH, help="Drift report path ('-' for stdout)")
+    
+    # Simulate command
+    simulate_parser = subparsers.add_parser("simulate", help="What-if of shortlisting thresholds (read-only)")
+    simulate_parser.add_argument("--rate", metavar="VALUES", help="MAX_HOURLY_RATE values, e.g. 80,90,100 or 60:150:5")
+    simulate_parser.add_argument("--availability", metavar="VALUES", help="MIN_AVAILABILITY values")
+    simulate_parser.add_argument("--years", metavar="VALUES", help="MIN_EXPERIENCE_YEARS values")
+    simulate_parser.add_argument("--limit", type=int, default=30, help="Combinations to print")
+    simulate_parser.add_argument("--max-ids", type=int, default=100,
+                                help="Flipped applicant IDs kept per combination and direction")
+    simulate_parser.add_argument("--output", default=SIMULATION_REPORT_PATH, help="Report path ('-' for stdout)")
+    
+    # Rules command
+    rules_parser = subparsers.add_parser("rules", help="Show the business rules in effect")
+    rules_parser.add_argument("--refresh", action="store_true", help="Revalidate against the source, ignoring the TTL")
     
     args = parser.parse_args()
     
@@ -180,14 +446,11 @@ def main():
     tools = ManualTools()
     
     try:
-        if args.command == "decompress":
-            tools.decompress_for_editing(args.applicant)
-        elif args.command == "reprocess":
-            tools.reprocess_after_edit(args.applicant)
-        elif args.command == "view":
-            tools.view_applicant_summary(args.applicant)
-        elif args.command == "list":
-            tools.list_recent_applicants(args.limit)
+        if args.profile is not None:
+            with Profiler(args.profile or default_profile_prefix(args.command)):
+                run_command(tools, args)
+        else:
+            run_command(tools, args)
     
     except Exception as e:
         print(f"💥 Command failed: {e}")
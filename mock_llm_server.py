@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Approximate characters per token used for the reported usage
+CHARS_PER_TOKEN = 4
+
+class MockBehaviour:
+    """Knobs for the mock server; every rate is a probability per request"""
+    def __init__(self, latency_median=0.5, latency_sigma=0.3, stall_rate=0.0, stall_seconds=30.0,
+                 rate_429=0.0, retry_after=1.0, max_concurrency=0, malformed_rate=0.0,
+                 truncated_rate=0.0, seed=0):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.max_concurrency = max_concurrency
+        self.malformed_rate = malformed_rate
+        self.truncated_rate = truncated_rate
+        self.seed = seed
+
+class MockLLMServer:
+    """Local OpenAI-compatible chat-completions server returning evaluation JSON.
+
+    Each request draws its latency and failure mode from an RNG seeded by
+    (seed, prompt, attempt number for that prompt), so a run replays
+    identically whatever the thread interleaving, and a retried prompt gets a
+    fresh draw.
+    """
+    def __init__(self, behaviour=None, host="127.0.0.1", port=0):
+        self.behaviour = behaviour or MockBehaviour()
+        self.host = host
+        self.port = port
+        self.server = None
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "malformed": 0, "truncated": 0, "stalled": 0}
+        self._attempts = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.server.server_port}/v1"
+
+    def _rng(self, prompt):
+        digest = hashlib.sha1(prompt.encode()).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.behaviour.seed}:{digest}:{attempt}"), digest
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def handle(self, payload):
+        """Return (status, headers, body) for one chat-completions request"""
+        b = self.behaviour
+        prompt = "".join(m.get("content", "") for m in payload.get("messages", []))
+        rng, digest = self._rng(prompt)
+        self._count("requests")
+
+        with self._lock:
+            over_capacity = b.max_concurrency and self._in_flight >= b.max_concurrency
+            self._in_flight += 1
+        try:
+            if over_capacity or rng.random() < b.rate_429:
+                self._count("rate_limited")
+                return 429, {"Retry-After": f"{b.retry_after:g}"}, {
+                    "error": {"message": "Rate limit reached (mock)", "type": "rate_limit_exceeded"}
+                }
+
+            if rng.random() < b.stall_rate:
+                self._count("stalled")
+                time.sleep(b.stall_seconds)
+            else:
+                time.sleep(b.latency_median * math.exp(b.latency_sigma * rng.gauss(0, 1)))
+
+            content = json.dumps(self._evaluation(prompt, digest))
+            finish_reason = "stop"
+            roll = rng.random()
+            if roll < b.malformed_rate:
+                self._count("malformed")
+                content = f"Here is the evaluation:\n```json\n{content[:-1]}\n```"
+            elif roll < b.malformed_rate + b.truncated_rate:
+                self._count("truncated")
+                content = content[: rng.randint(1, max(1, len(content) - 1))]
+                finish_reason = "length"
+            else:
+                self._count("ok")
+
+            prompt_tokens = math.ceil(len(prompt) / CHARS_PER_TOKEN)
+            completion_tokens = math.ceil(len(content) / CHARS_PER_TOKEN)
+            return 200, {}, {
+                "id": f"chatcmpl-mock-{digest[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _evaluation(self, prompt, digest):
+        """Schema-valid evaluation, deterministic per prompt"""
+        name = "The candidate"
+        try:
+            name = json.loads(prompt).get("input", {}).get("personal", {}).get("name") or name
+        except (ValueError, AttributeError):
+            pass
+        score = int(digest[:8], 16) % 10 + 1
+        return {
+            "summary": f"{name} has a relevant engineering background (mock evaluation {digest[:8]}).",
+            "score": score,
+            "issues": [] if score > 5 else ["No details on specific projects or achievements"],
+            "follow_ups": ["Can you describe a recent project you led?"],
+        }
+
+    def start(self):
+        """Serve in a background thread; returns the OpenAI-style base URL"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                    return self._reply(404, {}, {"error": {"message": "not found"}})
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError as e:
+                    return self._reply(400, {}, {"error": {"message": str(e)}})
+                self._reply(*mock.handle(payload))
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    return self._reply(200, {}, mock.stats)
+                self._reply(404, {}, {"error": {"message": "not found"}})
+
+            def _reply(self, status, headers, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock OpenAI-compatible LLM server for load and latency testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-median", type=float, default=0.5, help="Median response latency (seconds)")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="Log-normal spread of the latency")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of requests that stall")
+    parser.add_argument("--stall-seconds", type=float, default=30.0, help="How long a stalled request takes")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests rejected with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with a 429")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Reject with 429 beyond this many in-flight requests (0 = unlimited)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of replies with non-JSON wrapping")
+    parser.add_argument("--truncated-rate", type=float, default=0.0, help="Share of replies cut short")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    behaviour = MockBehaviour(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+        rate_429=args.rate_429, retry_after=args.retry_after, max_concurrency=args.max_concurrency,
+        malformed_rate=args.malformed_rate, truncated_rate=args.truncated_rate, seed=args.seed,
+    )
+    server = MockLLMServer(behaviour, host=args.host, port=args.port)
+    base_url = server.start()
+    print(f"🧪 Mock LLM server on {base_url}/chat/completions")
+    print(f"💡 Point the pipeline at it: LLM_PROVIDERS=openai:mock@{base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n👋 Stopped. {server.stats}")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import datetime
+from collections import Counter
+from functools import cached_property
+from config import *
+from utils.airtable_client import airtable
+from utils.archive import ColdArchive
+from utils.helpers import safe_get_field
+from utils.job_queue import JobQueue
+from utils.journal import hash_inputs
+from utils.retry import error_status
+from utils.profiling import tracer
+from utils.search_index import SearchIndex
+
+# Airtable field types whose values are computed and rejected on create
+COMPUTED_FIELD_TYPES = {
+    "createdTime", "lastModifiedTime", "createdBy", "lastModifiedBy", "autoNumber",
+    "formula", "rollup", "count", "multipleLookupValues", "button",
+}
+
+def _computed_applicant_fields():
+    """Applicant fields Airtable computes itself; they can't be written back on restore"""
+    return {CREATED_FIELD, T_SHORTLISTED, *REVERSE_LINK_FIELDS.values()}
+
+class ApplicantArchiver:
+    """Moves finished applicants (and their child rows) to the local cold archive and back"""
+    def __init__(self, archive=None):
+        self.client = airtable
+        self.archive = archive or ColdArchive()
+        self._computed = {}
+
+    @cached_property
+    def compressor(self):
+        from processors.compressor import DataCompressor
+        return DataCompressor()
+
+    @cached_property
+    def llm_evaluator(self):
+        from processors.llm_evaluator import LLMEvaluator
+        return LLMEvaluator()
+
+    def _link_tables(self):
+        """(table, link field) pairs for every table whose rows belong to one applicant"""
+        return [(table, LINK_FIELD) for table in self.client.child_tables()] + [
+            (self.client.shortlisted, SHORTLIST_LINK_FIELD)
+        ]
+
+    def _is_finished(self, applicant, cutoff):
+        """Compressed, with an LLM evaluation that is current for its JSON, and created before `cutoff`"""
+        return (
+            applicant.get("createdTime", "") < cutoff
+            and bool(safe_get_field(applicant, "Compressed JSON"))
+            and self.llm_evaluator._is_current(applicant)
+        )
+
+    def archive_applicants(self, min_age_days=ARCHIVE_MIN_AGE_DAYS, limit=None, dry_run=False):
+        """Archive every finished applicant older than `min_age_days`, then batch-delete it from Airtable"""
+        cutoff = (
+            datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=min_age_days)
+        ).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        formula = (
+            f"AND(IS_BEFORE(CREATED_TIME(), '{cutoff}'), "
+            "NOT({Compressed JSON} = BLANK()), NOT({LLM Summary} = BLANK()))"
+        )
+        results = {"success": [], "failed": [], "skipped": []}
+
+        with tracer.span("archive_candidates"):
+            candidates = self.client.applicants.all(formula=formula)
+        finished = []
+        for applicant in candidates:
+            if self._is_finished(applicant, cutoff):
+                finished.append(applicant)
+            else:
+                results["skipped"].append((applicant["id"], "Pipeline work pending"))
+        if limit:
+            finished = finished[:limit]
+
+        print(f"🧊 {len(finished)} finished applicants created before {cutoff[:10]}")
+        if dry_run:
+            for applicant in finished:
+                print(f"  • {applicant['id']}: {safe_get_field(applicant, NAME_FIELD) or 'Unknown'}")
+                results["skipped"].append((applicant["id"], "Dry run"))
+            return results
+        if not finished:
+            return results
+
+        # One scan per table covers every applicant being archived
+        indexes = [(table, self.client.linked_index(table, link_field)) for table, link_field in self._link_tables()]
+        to_delete = {table.name: [] for table, _ in indexes}
+        archived = []
+        for applicant in finished:
+            record_id = applicant["id"]
+            children = {table.name: index.get(record_id, []) for table, index in indexes}
+            if record_id in self.archive:
+                # An earlier run archived it but its deletes failed part-way; re-archiving
+                # now would replace that entry with one missing the rows already deleted
+                stored = self.archive.read(record_id)["children"]
+                stored_ids = {r["id"] for rows in stored.values() for r in rows}
+                added = [r.id for records in children.values() for r in records if r.id not in stored_ids]
+                if added:
+                    results["failed"].append((record_id, f"Already archived, but {len(added)} rows were linked since"))
+                    print(f"  ❌ {record_id}: already archived, but rows {', '.join(added)} were linked since; not deleted")
+                    continue
+                print(f"  ♻️  {record_id}: already archived, finishing its deletes")
+            else:
+                try:
+                    self.archive.write(applicant, {name: [r.to_airtable() for r in records] for name, records in children.items()})
+                except Exception as e:
+                    results["failed"].append((record_id, f"Archive write failed: {e}"))
+                    print(f"  ❌ {record_id}: archive write failed: {e}")
+                    continue
+            for table_name, records in children.items():
+                to_delete[table_name] += [r.id for r in records]
+            archived.append(record_id)
+
+        # Child rows first: a crash mid-way leaves live applicants with fewer rows, never orphans
+        try:
+            for table, _ in indexes:
+                self.client.delete_records(table, to_delete[table.name])
+            self.client.delete_records(self.client.applicants, archived)
+        except Exception as e:
+            results["failed"] += [(record_id, f"Delete failed: {e}") for record_id in archived]
+            print(f"  ❌ Batch delete failed ({e}); archived copies are kept, re-run to finish")
+            return results
+
+        results["success"] = archived
+        # Queued LLM jobs for these applicants would only 404 now
+        if os.path.exists(JOB_QUEUE_PATH):
+            queue = JobQueue()
+            queue.remove(archived)
+            queue.close()
+        # Deletions never show up in the search index's modified-since refresh
+        if os.path.exists(SEARCH_INDEX_PATH):
+            index = SearchIndex.load()
+            for record_id in archived:
+                index.remove(record_id)
+            index.save()
+        deleted = sum(len(ids) for ids in to_delete.values())
+        print(f"  ✅ Archived {len(archived)} applicants and {deleted} linked rows to {self.archive.directory}")
+        return results
+
+    def _computed_fields(self, table):
+        """Fields of `table` that Airtable computes: ARCHIVE_COMPUTED_FIELDS plus any the schema reports"""
+        if table.name not in self._computed:
+            names = set(ARCHIVE_COMPUTED_FIELDS)
+            try:
+                names |= {f.name for f in table.schema().fields if f.type in COMPUTED_FIELD_TYPES}
+            except Exception:
+                pass  # the token may lack schema.bases:read; fall back to the configured names
+            self._computed[table.name] = names
+        return self._computed[table.name]
+
+    def _existing_rows(self, table, applicant):
+        """Rows of `table` already linked to `applicant` (left by an interrupted restore)"""
+        reverse_field = T_SHORTLISTED if table.name == T_SHORTLISTED else REVERSE_LINK_FIELDS[table.name]
+        return self.client.records_by_id(table, applicant.get("fields", {}).get(reverse_field, []))
+
+    def restore_applicant(self, record_id):
+        """Re-create an archived applicant and its rows in Airtable; returns the new record ID.
+
+        Re-running an interrupted restore reuses the applicant it created and
+        only creates the rows that are still missing.
+        """
+        if record_id not in self.archive:
+            restored_as = self.archive.index.get(record_id, {}).get("restored_as")
+            error = f"already restored as {restored_as}" if restored_as else "not in the archive"
+            return {"success": False, "error": f"{record_id} is {error}"}
+
+        entry = self.archive.read(record_id)
+        applicant = None
+        new_id = self.archive.index[record_id].get("restoring_as")
+        if new_id:
+            try:
+                applicant = self.client.get_applicant(new_id)
+            except Exception as e:
+                if error_status(e) != 404:
+                    return {"success": False, "error": f"Could not read partial restore {new_id}: {e}"}
+        if applicant is None:
+            computed = _computed_applicant_fields() | self._computed_fields(self.client.applicants)
+            fields = {k: v for k, v in entry["applicant"].get("fields", {}).items() if k not in computed}
+            applicant = self.client.applicants.create(fields)
+            new_id = applicant["id"]
+            self.archive.mark_restoring(record_id, new_id)
+
+        restored = {}
+        for table, link_field in self._link_tables():
+            computed = self._computed_fields(table)
+
+            def writable(fields):
+                return {**{k: v for k, v in fields.items() if k not in computed}, link_field: [new_id]}
+
+            rows = [writable(r.get("fields", {})) for r in entry["children"].get(table.name, [])]
+            # Skip rows an earlier attempt already created (matched on their writable fields)
+            existing = Counter(hash_inputs(writable(r.fields())) for r in self._existing_rows(table, applicant))
+            missing = []
+            for row in rows:
+                key = hash_inputs(row)
+                if existing[key]:
+                    existing[key] -= 1
+                else:
+                    missing.append(row)
+            if missing:
+                try:
+                    table.batch_create(missing)
+                except Exception as e:
+                    return {"success": False, "error": f"{table.name} rows not created ({e}); re-run restore to finish"}
+            restored[table.name] = len(rows)
+
+        # Child rows have new IDs: store the fingerprint they now produce
+        result = self.compressor.compress_applicant_data(new_id)
+        if not result["success"]:
+            print(f"  ⚠️  {new_id}: fingerprint not refreshed ({result['error']}); the next run recompresses it")
+
+        self.archive.mark_restored(record_id, new_id)
+        return {"success": True, "record_id": new_id, "restored": restored}
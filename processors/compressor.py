@@ -1,109 +1,162 @@
 import json
 from utils.airtable_client import airtable
-from utils.helpers import safe_get_field, retry_with_backoff
+from utils.helpers import safe_get_field
+from utils.profiling import tracer
+from utils.journal import hash_inputs
+from config import FINGERPRINT_FIELD
 import datetime
 
+# Up to this many explicitly passed applicants, child rows are fetched by ID instead of scanning the child tables
+TARGETED_FETCH_MAX = 10
+
+def child_fingerprint(personal_recs, exp_recs, salary_recs):
+    """Fingerprint of an applicant's linked child rows (record IDs + content hashes)"""
+    rows = sorted(
+        (table, record.id, hash_inputs(record.fields()))
+        for table, records in (("personal", personal_recs), ("experience", exp_recs), ("salary", salary_recs))
+        for record in records
+    )
+    return hash_inputs(rows)
+
+def build_json_structure(personal_recs, exp_recs, salary_recs):
+    """Compressed JSON structure for an applicant's (personal, experience, salary) typed rows"""
+    # Personal details
+    personal_obj = {}
+    if personal_recs:
+        p = personal_recs[0]
+        if p.full_name:
+            personal_obj["name"] = p.full_name
+        if p.email:
+            personal_obj["email"] = p.email
+        if p.location:
+            personal_obj["location"] = p.location
+        if p.linkedin:
+            personal_obj["linkedin"] = p.linkedin
+    
+    # Experience
+    experience_list = []
+    for record in exp_recs:
+        exp_item = {}
+        if record.company:
+            exp_item["company"] = record.company
+        if record.title:
+            exp_item["title"] = record.title
+        if record.start:
+            exp_item["start"] = record.start
+        if record.end:
+            exp_item["end"] = record.end
+        if record.technologies:
+            exp_item["technologies"] = record.technologies
+        
+        if exp_item:
+            experience_list.append(exp_item)
+    
+    # Salary preferences
+    salary_obj = {}
+    if salary_recs:
+        s = salary_recs[0]
+        if s.preferred_rate is not None:
+            salary_obj["preferred_rate"] = s.preferred_rate
+        if s.minimum_rate is not None:
+            salary_obj["minimum_rate"] = s.minimum_rate
+        if s.currency:
+            salary_obj["currency"] = s.currency
+        if s.availability is not None:
+            salary_obj["availability"] = s.availability
+    
+    return {
+        "personal": personal_obj,
+        "experience": experience_list,
+        "salary": salary_obj
+    }
+
 class DataCompressor:
     def __init__(self):
         self.client = airtable
     
-    def compress_applicant_data(self, applicant_record_id):
-        """Compress data from child tables into JSON"""
+    def compress_applicant_data(self, applicant_record_id, children=None, applicant=None):
+        """Compress data from child tables into JSON.
+        
+        `children` is an optional (personal, experience, salary) tuple of
+        already-fetched linked rows; otherwise they are fetched by ID from the
+        reverse links on `applicant` (read fresh when not given).
+        """
         try:
-            # Get linked records
-            personal_records = self.client.linked_records(self.client.personal, applicant_record_id)
-            experience_records = self.client.linked_records(self.client.experience, applicant_record_id)
-            salary_records = self.client.linked_records(self.client.salary, applicant_record_id)
-            
-            # Build JSON structure
-            json_data = self._build_json_structure(
-                personal_records, experience_records, salary_records
-            )
-            
-            # Update applicant record with compressed JSON
-            compressed_json = json.dumps(json_data, ensure_ascii=False)
-            self.client.update_applicant(applicant_record_id, {
-                "Compressed JSON": compressed_json,
-            })
-            
+            if children is None:
+                if applicant is None:
+                    applicant = self.client.get_applicant(applicant_record_id)
+                children = self.client.linked_children(applicant)
+            json_data = self._compress(applicant_record_id, *children)
             return {"success": True, "json_data": json_data}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def _build_json_structure(self, personal_recs, exp_recs, salary_recs):
-        """Build the compressed JSON structure"""
-        # Personal details
-        personal_obj = {}
-        if personal_recs:
-            p = personal_recs[0].get("fields", {})
-            if p.get("Full Name"):
-                personal_obj["name"] = p["Full Name"]
-            if p.get("Email"):
-                personal_obj["email"] = p["Email"]
-            if p.get("Location"):
-                personal_obj["location"] = p["Location"]
-            if p.get("LinkedIn"):
-                personal_obj["linkedin"] = p["LinkedIn"]
-        
-        # Experience
-        experience_list = []
-        for record in exp_recs:
-            fields = record.get("fields", {})
-            exp_item = {}
-            if fields.get("Company"):
-                exp_item["company"] = fields["Company"]
-            if fields.get("Title"):
-                exp_item["title"] = fields["Title"]
-            if fields.get("Start"):
-                exp_item["start"] = fields["Start"]
-            if fields.get("End"):
-                exp_item["end"] = fields["End"]
-            if fields.get("Technologies"):
-                exp_item["technologies"] = fields["Technologies"]
-            
-            if exp_item:
-                experience_list.append(exp_item)
+    def _compress(self, applicant_record_id, personal_records, experience_records, salary_records):
+        """Build the JSON and write it together with the child-row fingerprint"""
+        # Build JSON structure
+        with tracer.span("build_json", applicant=applicant_record_id):
+            json_data = self._build_json_structure(
+                personal_records, experience_records, salary_records
+            )
         
-        # Salary preferences
-        salary_obj = {}
-        if salary_recs:
-            s = salary_recs[0].get("fields", {})
-            if s.get("Preferred Rate") is not None:
-                salary_obj["preferred_rate"] = s["Preferred Rate"]
-            if s.get("Minimum Rate") is not None:
-                salary_obj["minimum_rate"] = s["Minimum Rate"]
-            if s.get("Currency"):
-                salary_obj["currency"] = s["Currency"]
-            if s.get("Availability (hrs/wk)") is not None:
-                salary_obj["availability"] = s["Availability (hrs/wk)"]
+        # Update applicant record with compressed JSON
+        compressed_json = json.dumps(json_data, ensure_ascii=False)
+        self.client.update_applicant(applicant_record_id, {
+            "Compressed JSON": compressed_json,
+            FINGERPRINT_FIELD: child_fingerprint(personal_records, experience_records, salary_records),
+        })
         
-        return {
-            "personal": personal_obj,
-            "experience": experience_list,
-            "salary": salary_obj
-        }
+        return json_data
+    
+    def _build_json_structure(self, personal_recs, exp_recs, salary_recs):
+        """Build the compressed JSON structure"""
+        return build_json_structure(personal_recs, exp_recs, salary_recs)
     
-    @retry_with_backoff()
-    def compress_all_applicants(self):
-        """Compress all applicants that need compression"""
-        applicants = self.client.get_all_applicants()
+    def compress_all_applicants(self, journal=None, applicants=None):
+        """Compress applicants whose child rows changed since their last compression.
+        
+        Child tables are read once and indexed by link (small batches fetch
+        their rows by ID instead); an applicant is only
+        rewritten when the fingerprint of its child rows differs from the one
+        stored alongside its Compressed JSON.
+        """
+        sweep = applicants is None
+        if sweep:
+            applicants = self.client.get_all_applicants()
         results = {"success": [], "failed": [], "skipped": []}
         
+        if not sweep and len(applicants) <= TARGETED_FETCH_MAX:
+            children_of = {a["id"]: self.client.linked_children(a) for a in applicants}
+        else:
+            indexes = [self.client.linked_index(table) for table in self.client.child_tables()]
+            children_of = {
+                a["id"]: tuple(index.get(a["id"], []) for index in indexes) for a in applicants
+            }
+        
         for applicant in applicants:
             record_id = applicant["id"]
-            existing_json = safe_get_field(applicant, "Compressed JSON")
+            children = children_of[record_id]
+            
+            # Skip if the stored payload was built from exactly these child rows
+            fingerprint = child_fingerprint(*children)
+            if safe_get_field(applicant, "Compressed JSON") and safe_get_field(applicant, FINGERPRINT_FIELD) == fingerprint:
+                results["skipped"].append(record_id)
+                continue
             
-            # Skip if already compressed (unless forced)
-            if existing_json:
+            # Compression reads only the child rows, so their fingerprint is the step's input
+            if journal and journal.is_done(record_id, "compress", fingerprint):
                 results["skipped"].append(record_id)
                 continue
             
             print(f"  📦 Compressing applicant {record_id}")
-            result = self.compress_applicant_data(record_id)
+            with tracer.span("compress", cat="stage", applicant=record_id):
+                result = self.compress_applicant_data(record_id, children=children)
             
             if result["success"]:
                 results["success"].append(record_id)
+                if journal:
+                    journal.record(record_id, "compress", fingerprint)
             else:
                 results["failed"].append((record_id, result["error"]))
                 print(f"  ❌ Failed to compress {record_id}: {result['error']}")
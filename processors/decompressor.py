@@ -20,7 +20,7 @@ class DataDecompressor:
             json_data = json.loads(compressed_json)
             
             # Clear existing child records
-            self._clear_existing_records(applicant_record_id)
+            self._clear_existing_records(applicant)
             
             # Recreate from JSON
             self._create_personal_record(applicant_record_id, json_data.get("personal", {}))
@@ -32,12 +32,12 @@ class DataDecompressor:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def _clear_existing_records(self, applicant_record_id):
+    def _clear_existing_records(self, applicant):
         """Delete existing child records"""
-        for table in [self.client.personal, self.client.experience, self.client.salary]:
-            existing_records = self.client.linked_records(table, applicant_record_id)
+        children = self.client.linked_children(applicant)
+        for table, existing_records in zip(self.client.child_tables(), children):
             for record in existing_records:
-                table.delete(record["id"])
+                table.delete(record.id)
     
     def _create_personal_record(self, applicant_record_id, personal_data):
         """Create personal details record"""
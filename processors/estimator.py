@@ -0,0 +1,184 @@
+import json
+import math
+from collections import Counter
+from config import *
+from utils.airtable_client import airtable, RECORD_ID_CHUNK
+from utils.helpers import safe_get_field
+from utils.metrics import load_profile
+from utils.ratelimit import airtable_limiter, groq_limiter
+from processors.compressor import DataCompressor, child_fingerprint
+from processors.shortlister import ApplicantShortlister
+from processors.llm_evaluator import LLMEvaluator
+from processors.gating import TIER_SHORT, TIER_TEMPLATE
+
+# pyairtable lists records 100 per request
+PAGE_SIZE = 100
+
+# Used until a real run has saved measured values to METRICS_PATH
+DEFAULT_AIRTABLE_LATENCY = 0.3
+DEFAULT_GROQ_LATENCY = 2.0
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+def _pages(count):
+    return max(1, math.ceil(count / PAGE_SIZE))
+
+class RunEstimator:
+    """Predicts Airtable requests, LLM tokens, cost and wall time for a pipeline run without writing"""
+    def __init__(self):
+        self.client = airtable
+        self.compressor = DataCompressor()
+        self.shortlister = ApplicantShortlister()
+        self.evaluator = LLMEvaluator()
+        self.profile = load_profile()
+
+    def estimate(self, applicants, mode="new_only", workers=LLM_WORKERS):
+        """Simulate the three phases over `applicants` using only reads.
+
+        Like run_full_pipeline, every mode sweeps the whole base; `--mode all`
+        additionally re-evaluates applicants whose evaluation is current.
+        """
+        force_reprocess = mode == "all"
+        personal = self.client.linked_index(self.client.personal)
+        experience = self.client.linked_index(self.client.experience)
+        salary = self.client.linked_index(self.client.salary)
+        table_sizes = {
+            T_PERSONAL: sum(len(v) for v in personal.values()),
+            T_EXPERIENCE: sum(len(v) for v in experience.values()),
+            T_SALARY: sum(len(v) for v in salary.values()),
+        }
+        applicant_pages = _pages(len(applicants))
+
+        compression = {"requests": Counter(), "recompress": 0}
+        shortlisting = {"requests": Counter(), "evaluated": 0, "eligible": 0}
+        llm = {"requests": Counter(), "calls": 0, "input_tokens": 0, "output_tokens": 0, "tiers": Counter()}
+
+        compression["requests"][("GET", T_APPLICANTS)] += applicant_pages
+        for table_name, size in table_sizes.items():
+            compression["requests"][("GET", table_name)] += _pages(size)
+        shortlisting["requests"][("GET", T_APPLICANTS)] += applicant_pages
+        llm["requests"][("GET", T_APPLICANTS)] += applicant_pages
+
+        chars_per_token = self.profile.get("groq", {}).get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)
+        output_tokens = self.profile.get("groq", {}).get("avg_completion_tokens", MAX_TOKENS / 2)
+
+        for applicant in applicants:
+            record_id = applicant["id"]
+            children = (personal.get(record_id, []), experience.get(record_id, []), salary.get(record_id, []))
+
+            # Phase 1: fingerprint check decides whether the JSON is rebuilt
+            json_data = self.compressor._build_json_structure(*children)
+            stored_json = safe_get_field(applicant, "Compressed JSON")
+            if not stored_json or safe_get_field(applicant, FINGERPRINT_FIELD) != child_fingerprint(*children):
+                compression["recompress"] += 1
+                compression["requests"][("PATCH", T_APPLICANTS)] += 1
+            else:
+                json_data = json.loads(stored_json)
+
+            # Phase 2: every not-yet-shortlisted applicant fetches its child rows by ID
+            would_shortlist = False
+            if safe_get_field(applicant, "Shortlist Status") != "yes":
+                shortlisting["evaluated"] += 1
+                for table_name, size in table_sizes.items():
+                    shortlisting["requests"][("GET", table_name)] += self._child_fetches(applicant, table_name, size)
+                would_shortlist = self._would_shortlist(*children)
+                if would_shortlist:
+                    shortlisting["eligible"] += 1
+                    shortlisting["requests"][("POST", T_SHORTLISTED)] += 1
+                    shortlisting["requests"][("PATCH", T_APPLICANTS)] += 1
+
+            # Phase 3: skipped when the evaluated JSON hash and gating tier still match (unless --mode all)
+            if would_shortlist:
+                applicant = {**applicant, "fields": {**applicant.get("fields", {}), "Shortlist Status": "yes"}}
+            tier = self.evaluator.gate.decide(applicant, json_data)["tier"]
+            unchanged = (
+                safe_get_field(applicant, "LLM Data Hash") == self.evaluator._data_hash(json_data, tier)
+                and safe_get_field(applicant, "LLM Summary")
+            )
+            if force_reprocess or not unchanged:
+                llm["tiers"][tier] += 1
+                llm["requests"][("PATCH", T_APPLICANTS)] += 1
+                if tier == TIER_TEMPLATE:
+                    continue
+                if tier == TIER_SHORT:
+                    prompt = self.evaluator._build_short_prompt(json_data)
+                    llm["output_tokens"] += min(output_tokens, SHORT_FORM_MAX_TOKENS)
+                else:
+                    prompt = self.evaluator._build_evaluation_prompt(json_data)
+                    llm["output_tokens"] += output_tokens
+                llm["calls"] += 1
+                llm["input_tokens"] += len(prompt) / chars_per_token
+
+        for phase in (compression, shortlisting, llm):
+            phase["airtable_requests"] = sum(phase["requests"].values())
+            phase["seconds"] = self._airtable_seconds(phase["airtable_requests"])
+        llm["seconds"] += self._llm_seconds(llm["calls"], workers)
+        llm["cost"] = (
+            llm["input_tokens"] * LLM_INPUT_COST_PER_MTOK + llm["output_tokens"] * LLM_OUTPUT_COST_PER_MTOK
+        ) / 1_000_000
+
+        return {"mode": mode, "compression": compression, "shortlisting": shortlisting, "llm_evaluation": llm}
+
+    def _child_fetches(self, applicant, table_name, table_size):
+        """Requests AirtableClient.linked_children spends on one child table"""
+        fields = applicant.get("fields", {})
+        if not any(field in fields for field in REVERSE_LINK_FIELDS.values()):
+            return _pages(table_size)
+        return math.ceil(len(fields.get(REVERSE_LINK_FIELDS[table_name], [])) / RECORD_ID_CHUNK)
+
+    def _would_shortlist(self, personal_recs, exp_recs, salary_recs):
+        return (
+            self.shortlister._evaluate_experience(exp_recs)["meets_criteria"]
+            and self.shortlister._evaluate_compensation(salary_recs)["meets_criteria"]
+            and self.shortlister._evaluate_location(personal_recs)["meets_criteria"]
+        )
+
+    def _airtable_seconds(self, requests):
+        """Sequential requests, each bounded by measured latency or the rate limit"""
+        latency = self.profile.get("airtable", {}).get("avg_latency", DEFAULT_AIRTABLE_LATENCY)
+        return requests * max(latency, 1.0 / airtable_limiter.rate)
+
+    def _llm_seconds(self, calls, workers):
+        """LLM jobs run at the learned AIMD window (at most `workers`), capped by the Groq rate limit"""
+        if not calls:
+            return 0.0
+        groq = self.profile.get("groq", {})
+        latency = groq.get("avg_latency", DEFAULT_GROQ_LATENCY)
+        window = min(max(1, workers), groq.get("window", workers))
+        throughput = min(window / latency, groq_limiter.rate)
+        return calls / throughput
+
+def format_duration(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 5400:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+def print_estimate(estimate):
+    """Print a per-phase dry-run report"""
+    titles = {
+        "compression": ("📦 PHASE 1: Data Compression", "recompress", "applicants would be (re)compressed"),
+        "shortlisting": ("⭐ PHASE 2: Shortlisting", "eligible", "applicants would be shortlisted"),
+        "llm_evaluation": ("🤖 PHASE 3: LLM Evaluation", "calls", "LLM calls"),
+    }
+    total_requests = total_seconds = 0
+    print(f"\n🧮 Estimating a --mode {estimate['mode']} run")
+    for phase, (title, key, label) in titles.items():
+        data = estimate[phase]
+        print(f"\n{title}")
+        print(f"  • {data[key]} {label}")
+        for (method, table), count in sorted(data["requests"].items()):
+            print(f"  • Airtable {method} {table}: {count}")
+        if phase == "llm_evaluation":
+            tiers = data["tiers"]
+            print(f"  • Gating: {tiers['full']} full, {tiers['short']} short-form, {tiers['template']} templated")
+            print(f"  • Tokens: ~{data['input_tokens']:,.0f} input / ~{data['output_tokens']:,.0f} output")
+            print(f"  • Estimated LLM cost: ${data['cost']:.4f}")
+        print(f"  ⏱️  Estimated time: {format_duration(data['seconds'])}")
+        total_requests += data["airtable_requests"]
+        total_seconds += data["seconds"]
+
+    print("\n" + "=" * 60)
+    print(f"📈 ESTIMATE: {total_requests} Airtable requests, "
+          f"{estimate['llm_evaluation']['calls']} LLM calls, "
+          f"${estimate['llm_evaluation']['cost']:.4f}, ~{format_duration(total_seconds)}")
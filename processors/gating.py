@@ -0,0 +1,132 @@
+from config import *
+from utils.helpers import calculate_experience_years, safe_get_field
+from utils.records import PersonalDetails, WorkExperience, SalaryPreference
+from processors.shortlister import ApplicantShortlister
+
+# Evaluation tiers, most to least expensive
+TIER_FULL = "full"
+TIER_SHORT = "short"
+TIER_TEMPLATE = "template"
+
+# Compressed JSON fields that count towards completeness (plus one for a usable role)
+COMPLETENESS_FIELDS = (
+    ("personal", "name"), ("personal", "email"), ("personal", "location"), ("personal", "linkedin"),
+    ("salary", "preferred_rate"), ("salary", "currency"), ("salary", "availability"),
+)
+
+def completeness_score(json_data):
+    """Fraction (0-1) of the profile fields an evaluation relies on that are filled in"""
+    filled = sum(
+        1 for section, key in COMPLETENESS_FIELDS
+        if json_data.get(section, {}).get(key) not in (None, "")
+    )
+    roles = json_data.get("experience", [])
+    if any(role.get("company") and role.get("title") and role.get("start") for role in roles):
+        filled += 1
+    elif roles:
+        filled += 0.5
+    return filled / (len(COMPLETENESS_FIELDS) + 1)
+
+def _records_from_json(json_data):
+    """Typed (personal, experience, salary) rows rebuilt from Compressed JSON"""
+    personal = json_data.get("personal", {})
+    salary = json_data.get("salary", {})
+    personal_recs = [PersonalDetails(id="", full_name=personal.get("name"), location=personal.get("location", ""))] if personal else []
+    exp_recs = [
+        WorkExperience(
+            id="", company=role.get("company", ""), title=role.get("title"),
+            start=role.get("start"), end=role.get("end"),
+        )
+        for role in json_data.get("experience", [])
+    ]
+    salary_recs = [SalaryPreference(
+        id="", preferred_rate=salary.get("preferred_rate"),
+        currency=salary.get("currency", ""), availability=salary.get("availability"),
+    )] if salary else []
+    return personal_recs, exp_recs, salary_recs
+
+class EvaluationGate:
+    """Decides how much LLM effort an applicant gets before any tokens are spent.
+
+    Shortlisted applicants always get the full evaluation. Profiles that are
+    mostly empty, or that fail `LLM_GATE_TEMPLATE_FAILURES` or more shortlist
+    rules, get a deterministic templated summary. Anything in between (one
+    failed rule) gets the cheaper short-form prompt.
+    """
+    def __init__(self, enabled=LLM_GATING):
+        self.enabled = enabled
+        self.rules = ApplicantShortlister()
+
+    def decide(self, applicant_record, json_data):
+        """Return the tier, a reason, the completeness score and the failed rules"""
+        completeness = completeness_score(json_data)
+        decision = {"tier": TIER_FULL, "reason": "", "completeness": completeness, "failures": []}
+        if not self.enabled:
+            decision["reason"] = "Gating disabled"
+            return decision
+        if safe_get_field(applicant_record, "Shortlist Status") == "yes":
+            decision["reason"] = "Shortlisted"
+            return decision
+
+        personal_recs, exp_recs, salary_recs = _records_from_json(json_data)
+        checks = {
+            "Experience": self.rules._evaluate_experience(exp_recs),
+            "Compensation": self.rules._evaluate_compensation(salary_recs),
+            "Location": self.rules._evaluate_location(personal_recs),
+        }
+        decision["failures"] = [
+            f"{name}: {check['reason']}" for name, check in checks.items() if not check["meets_criteria"]
+        ]
+
+        if completeness < LLM_GATE_MIN_COMPLETENESS:
+            decision["tier"] = TIER_TEMPLATE
+            decision["reason"] = f"Profile {completeness:.0%} complete"
+        elif len(decision["failures"]) >= LLM_GATE_TEMPLATE_FAILURES:
+            decision["tier"] = TIER_TEMPLATE
+            decision["reason"] = f"Fails {len(decision['failures'])} shortlist rules"
+        elif decision["failures"]:
+            decision["tier"] = TIER_SHORT
+            decision["reason"] = "Fails 1 shortlist rule"
+        else:
+            decision["reason"] = "Meets shortlist rules"
+        return decision
+
+def templated_evaluation(json_data, decision):
+    """Deterministic evaluation (same schema as the LLM output) for gated-out applicants"""
+    personal = json_data.get("personal", {})
+    salary = json_data.get("salary", {})
+    roles = json_data.get("experience", [])
+    _, exp_recs, _ = _records_from_json(json_data)
+
+    parts = [f"{personal.get('name', 'Candidate')}"]
+    if roles:
+        latest = max(roles, key=lambda role: role.get("start") or "")
+        parts.append(
+            f"{calculate_experience_years(exp_recs):.1f} yrs experience across {len(roles)} roles, "
+            f"most recently {latest.get('title', 'N/A')} at {latest.get('company', 'N/A')}"
+        )
+    if personal.get("location"):
+        parts.append(f"based in {personal['location']}")
+    if salary:
+        parts.append(
+            f"asking {salary.get('preferred_rate', 'N/A')} {salary.get('currency', '')}/hr "
+            f"for {salary.get('availability', 'N/A')} hrs/wk"
+        )
+    summary = "Auto-summary (not LLM-evaluated): " + ", ".join(parts) + "."
+    if decision["failures"]:
+        summary += " Not shortlisted: " + "; ".join(decision["failures"]) + "."
+
+    missing = [
+        f"{section} {key.replace('_', ' ')}" for section, key in COMPLETENESS_FIELDS
+        if json_data.get(section, {}).get(key) in (None, "")
+    ]
+    if not roles:
+        missing.append("work experience")
+
+    return {
+        "summary": summary,
+        # One point per shortlist rule passed (templated applicants pass at most one)
+        "score": 1 + max(0, 3 - len(decision["failures"])),
+        "issues": decision["failures"] + [f"Missing {field}" for field in missing],
+        "follow_ups": [f"Could you provide your {field}?" for field in missing[:3]],
+    }
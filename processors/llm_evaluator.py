@@ -1,18 +1,33 @@
+import os
 import json
-import time
+import socket
 import hashlib
-from groq import Groq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, partial
 from config import *
 from utils.airtable_client import airtable
-from utils.helpers import safe_get_field, retry_with_backoff
+from utils.helpers import safe_get_field
+from utils.llm_providers import ProviderChain, build_providers
+from utils.job_queue import JobQueue, PRIORITY_SHORTLISTED, PRIORITY_DEFAULT
+from utils.profiling import tracer
+from utils.retry import error_status
+from utils.journal import hash_inputs
+from utils.dedup import DedupIndex
+from utils.llm_output import load_json, coerce_evaluation, parse_evaluation, build_missing_fields_prompt, REQUIRED_FIELDS
+from processors.gating import EvaluationGate, templated_evaluation, TIER_FULL, TIER_SHORT, TIER_TEMPLATE
 from config import MAX_TOKENS
 import datetime
 
 class LLMEvaluator:
     def __init__(self):
         self.client = airtable
-        self.groq_client = Groq(api_key=GROQ_API_KEY)
-        self.model = LLM_MODEL
+        self.gate = EvaluationGate()
+    
+    @cached_property
+    def llm(self):
+        """Provider chain from LLM_PROVIDERS; SDK clients are built on first call"""
+        return ProviderChain(build_providers())
     
 
     # def _build_evaluation_prompt(self, json_data):
@@ -116,64 +131,64 @@ class LLMEvaluator:
         return json.dumps(prompt, indent=2)
 
 
-    def _parse_llm_response(self, response_text):
-        """Parse structured response from LLM"""
-        lines = response_text.strip().split('\n')
-        print("LLM raw response lines:", lines)
-        print("\n\n")
-        result = {
-            "summary": "",
-            "score": 0,
-            "issues": "",
-            "follow_ups": ""
+    def _build_short_prompt(self, json_data):
+        """Compact prompt for applicants that fail a shortlist rule (no worked example)"""
+        prompt = {
+            "task": "Recruiting analyst: evaluate this candidate briefly.",
+            "rules": [
+                "Output ONLY valid JSON matching output_schema.",
+                "Summary <= 40 words; score is an integer 1-10.",
+            ],
+            "output_schema": {
+                "summary": "string", "score": "integer", "issues": ["string"], "follow_ups": ["max 1 string"]
+            },
+            "input": json_data,
         }
-        
-        current_section = None
-        content_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith("Summary:"):
-                if current_section:
-                    result[current_section] = '\n'.join(content_lines).strip()
-                current_section = "summary"
-                content_lines = [line[8:].strip()]
-            elif line.startswith("Score:"):
-                if current_section:
-                    result[current_section] = '\n'.join(content_lines).strip()
-                current_section = "score"
-                try:
-                    result["score"] = int(line[6:].strip())
-                except ValueError:
-                    result["score"] = 0
-                content_lines = []
-            elif line.startswith("Issues:"):
-                if current_section:
-                    result[current_section] = '\n'.join(content_lines).strip()
-                current_section = "issues"
-                content_lines = [line[7:].strip()]
-            elif line.startswith("Follow-Ups:"):
-                if current_section:
-                    result[current_section] = '\n'.join(content_lines).strip()
-                current_section = "follow_ups"
-                content_lines = [line[11:].strip()]
-            elif current_section and line:
-                content_lines.append(line)
-        
-        # Handle last section
-        if current_section and content_lines:
-            result[current_section] = '\n'.join(content_lines).strip()
-        
-        return result
-    
+        return json.dumps(prompt, separators=(",", ":"), ensure_ascii=False)
+
+    def _build_delta_prompt(self, match):
+        """Prompt that re-scores a near-duplicate from its match's evaluation and the differing fields"""
+        previous = {k: match["evaluation"].get(k) for k in ("summary", "score", "follow_ups")}
+        prompt = {
+            "task": (
+                "Recruiting analyst: update a previous candidate evaluation. The profile is identical "
+                "to the one evaluated except for `changes`; adjust for those differences only."
+            ),
+            "rules": [
+                "Output ONLY valid JSON matching output_schema.",
+                "Summary <= 75 words; score is an integer 1-10.",
+            ],
+            "output_schema": {
+                "summary": "string", "score": "integer", "issues": ["string"], "follow_ups": ["max 3 strings"]
+            },
+            "previous_evaluation": previous,
+            "changes": match["diff"],
+        }
+        return json.dumps(prompt, separators=(",", ":"), ensure_ascii=False, default=str)
+
     def _get_json_hash(self, json_data):
         """Generate hash of JSON data to detect changes"""
         json_str = json.dumps(json_data, sort_keys=True)
         return hashlib.md5(json_str.encode()).hexdigest()
     
-    @retry_with_backoff()
-    def evaluate_applicant(self, applicant_record):
-        """Evaluate single applicant with LLM"""
+    def _data_hash(self, json_data, tier):
+        """LLM Data Hash for an evaluation; gated tiers are tagged so a tier change re-evaluates"""
+        json_hash = self._get_json_hash(json_data)
+        return json_hash if tier == TIER_FULL else f"{tier}:{json_hash}"
+    
+    def _is_current(self, applicant_record):
+        """True when the stored evaluation matches the applicant's JSON and gating tier"""
+        try:
+            json_data = json.loads(safe_get_field(applicant_record, "Compressed JSON"))
+        except (TypeError, ValueError):
+            return False
+        tier = self.gate.decide(applicant_record, json_data)["tier"]
+        return bool(safe_get_field(applicant_record, "LLM Summary")) and (
+            safe_get_field(applicant_record, "LLM Data Hash") == self._data_hash(json_data, tier)
+        )
+    
+    def evaluate_applicant(self, applicant_record, dedup=None):
+        """Evaluate single applicant with LLM (reusing a duplicate's evaluation from `dedup` when possible)"""
         record_id = applicant_record["id"]
         compressed_json = safe_get_field(applicant_record, "Compressed JSON")
         
@@ -185,72 +200,166 @@ class LLMEvaluator:
         except Exception as e:
             return {"success": False, "error": f"Invalid JSON: {e}"}
         
-        # Check if we need to re-evaluate (data changed)
-        current_hash = self._get_json_hash(json_data)
+        decision = self.gate.decide(applicant_record, json_data)
+        tier = decision["tier"]
+        
+        # Check if we need to re-evaluate (data or gating tier changed)
+        current_hash = self._data_hash(json_data, tier)
         stored_hash = safe_get_field(applicant_record, "LLM Data Hash")
         
         if stored_hash == current_hash and safe_get_field(applicant_record, "LLM Summary"):
             return {"success": True, "skipped": True, "reason": "No changes detected"}
         
+        if tier == TIER_TEMPLATE:
+            evaluation = templated_evaluation(json_data, decision)
+            self._write_evaluation(applicant_record, evaluation, current_hash)
+            return {"success": True, "skipped": False, "tier": tier, "gate_reason": decision["reason"],
+                    "evaluation": evaluation, "tokens_used": 0}
+        
+        # An earlier applicant with the same identity or a near-identical history
+        # lends its evaluation: copied as is, or re-scored for the differences only
+        match = dedup.find(record_id, json_data) if dedup is not None else None
+        if match and (match["evaluation"]["tier"] != tier or len(match["diff"]) > DEDUP_MAX_DIFF_FIELDS):
+            match = None
+        if match and match["match"] == "duplicate":
+            evaluation = {k: v for k, v in match["evaluation"].items() if k != "tier"}
+            self._write_evaluation(applicant_record, evaluation, current_hash, match)
+            dedup.add(record_id, json_data, {**evaluation, "tier": tier})
+            return {"success": True, "skipped": False, "tier": tier, "gate_reason": decision["reason"],
+                    "evaluation": evaluation, "tokens_used": 0, "dedup": match}
+        
         try:
             # Call LLM
             # print("user data",json_data)
-            prompt = self._build_evaluation_prompt(json_data)
+            with tracer.span("build_prompt", applicant=record_id, tier=tier):
+                if match:
+                    prompt, max_tokens = self._build_delta_prompt(match), SHORT_FORM_MAX_TOKENS
+                elif tier == TIER_SHORT:
+                    prompt, max_tokens = self._build_short_prompt(json_data), SHORT_FORM_MAX_TOKENS
+                else:
+                    prompt, max_tokens = self._build_evaluation_prompt(json_data), MAX_TOKENS
             
-            response = self.groq_client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=MAX_TOKENS,
-                temperature=0.3,
-                response_format={
-                    "type" : "json_object"
-                    # "type": "json_schema",
-                    # "json_schema": {
-                    #     "type": "object",
-                    #     "properties": {
-                    #         "summary": {"type": "string"},
-                    #         "score": {"type": "integer"},
-                    #         "issues": {"type": "array", "items": {"type": "string"}},
-                    #         "follow_ups": {"type": "array", "items": {"type": "string"}}
-                    #     },
-                    #     "required": ["summary", "score", "follow_ups"]
-                    # }
-                }
-            )
+            with tracer.span("llm completion", cat="api", applicant=record_id):
+                # Any JSON object is usable: missing fields are cheaper to re-ask than a failover
+                provider, response = self.llm.complete(
+                    validate=partial(_is_evaluation_response, fields=()),
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=0.3,
+                    response_format={
+                        "type" : "json_object"
+                        # "type": "json_schema",
+                        # "json_schema": {
+                        #     "type": "object",
+                        #     "properties": {
+                        #         "summary": {"type": "string"},
+                        #         "score": {"type": "integer"},
+                        #         "issues": {"type": "array", "items": {"type": "string"}},
+                        #         "follow_ups": {"type": "array", "items": {"type": "string"}}
+                        #     },
+                        #     "required": ["summary", "score", "follow_ups"]
+                        # }
+                    }
+                )
             
-            response_text = response.choices[0].message.content
-            stripped_response = response_text.strip()
-            try:
-                parsed_result = json.loads(stripped_response)
-            except json.JSONDecodeError:
-                parsed_result = self._parse_llm_response(response_text)
+            tokens_used = _total_tokens(response)
+            parsed_result, missing, repaired = parse_evaluation(response.choices[0].message.content)
+            repair = "local" if repaired else None
+            if missing:
+                repair = "follow_up"
+                # Re-ask for just the fields local repair couldn't recover
+                with tracer.span("llm follow-up", cat="api", applicant=record_id, missing=",".join(missing)):
+                    _, follow_up = self.llm.complete(
+                        validate=partial(_is_evaluation_response, fields=tuple(missing)),
+                        messages=[{"role": "user", "content": build_missing_fields_prompt(json_data, parsed_result, missing)}],
+                        max_tokens=SHORT_FORM_MAX_TOKENS,
+                        temperature=0.3,
+                        response_format={"type": "json_object"},
+                    )
+                tokens_used += _total_tokens(follow_up)
+                recovered, _, _ = parse_evaluation(follow_up.choices[0].message.content)
+                parsed_result = {**parsed_result, **{k: recovered[k] for k in missing if k in recovered}}
+                missing = [k for k in missing if k not in parsed_result]
+                if missing:
+                    return {"success": False, "error": f"LLM response missing {', '.join(missing)}"}
 
             # print(f"LLM Response for {record_id} \nParsed: {parsed_result}")
             # Update Airtable record
-            followups_text = "\n".join(parsed_result["follow_ups"])
-            update_fields = {
-                "LLM Summary": parsed_result["summary"],
-                "LLM Score": parsed_result["score"],
-                "LLM Follow-Ups": followups_text,
-            }
-            
-            self.client.update_applicant(record_id, update_fields)
+            self._write_evaluation(applicant_record, parsed_result, current_hash, match)
+            if dedup is not None:
+                dedup.add(record_id, json_data, {**parsed_result, "tier": tier})
             
             return {
                 "success": True,
                 "skipped": False,
+                "tier": tier,
+                "gate_reason": decision["reason"],
                 "evaluation": parsed_result,
-                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else 0
+                "tokens_used": tokens_used,
+                "repair": repair,
+                "dedup": match,
+                "provider": provider.name,
             }
             
         except Exception as e:
             return {"success": False, "error": f"LLM evaluation failed: {e}"}
     
-    def evaluate_all_applicants(self, force_reprocess=False):
-        """Evaluate all applicants with LLM"""
+    def _write_evaluation(self, applicant_record, evaluation, data_hash, match=None):
+        """Write evaluation fields, flagging (or clearing) the duplicate link"""
+        update_fields = {
+            "LLM Summary": evaluation["summary"],
+            "LLM Score": evaluation["score"],
+            "LLM Follow-Ups": "\n".join(evaluation["follow_ups"]),
+            "LLM Data Hash": data_hash,
+        }
+        if match:
+            label = "duplicate" if match["match"] == "duplicate" else f"near-duplicate, {len(match['diff'])} fields differ"
+            update_fields[DUPLICATE_FIELD] = f"{match['record_id']} ({label}; via {match['via']})"
+        elif safe_get_field(applicant_record, DUPLICATE_FIELD):
+            update_fields[DUPLICATE_FIELD] = ""
+        self.client.update_applicant(applicant_record["id"], update_fields)
+    
+    def build_dedup_index(self, applicants):
+        """Index applicants whose stored evaluation is current for their Compressed JSON"""
+        index = DedupIndex()
+        for applicant in applicants:
+            stored_hash = safe_get_field(applicant, "LLM Data Hash") or ""
+            tier, _, json_hash = stored_hash.rpartition(":")
+            tier = tier or TIER_FULL
+            if tier == TIER_TEMPLATE or not safe_get_field(applicant, "LLM Summary"):
+                continue
+            try:
+                json_data = json.loads(safe_get_field(applicant, "Compressed JSON"))
+            except (TypeError, ValueError):
+                continue
+            if json_hash != self._get_json_hash(json_data):
+                continue
+            index.add(applicant["id"], json_data, {
+                "summary": safe_get_field(applicant, "LLM Summary"),
+                "score": safe_get_field(applicant, "LLM Score"),
+                "issues": [],
+                "follow_ups": [q for q in (safe_get_field(applicant, "LLM Follow-Ups") or "").split("\n") if q],
+                "tier": tier,
+            })
+        return index
+    
+    def evaluate_all_applicants(self, force_reprocess=False, journal=None, queue=None, workers=LLM_WORKERS):
+        """Evaluate all applicants with LLM.
+
+        Applicants are enqueued in a durable job queue (shortlisted first, then
+        newest) and drained by a pool of worker threads.
+        """
         applicants = self.client.get_all_applicants()
         results = {"success": [], "failed": [], "skipped": []}
-        total_tokens = 0
+        tiers = {TIER_FULL: 0, TIER_SHORT: 0, TIER_TEMPLATE: 0}
+        reused = {"duplicate": 0, "near": 0}
+        repairs = {"local": 0, "follow_up": 0}
+        dedup = self.build_dedup_index(applicants)
+        queue = queue or JobQueue()
+        by_id = {}
+        released = queue.release_orphaned_leases()
+        if released:
+            print(f"  ♻️  Re-queued {released} jobs leased by a crashed run")
         
         for applicant in applicants:
             record_id = applicant["id"]
@@ -260,25 +369,118 @@ class LLMEvaluator:
                 results["skipped"].append((record_id, "No compressed JSON"))
                 continue
             
-            print(f"  🤖 Evaluating applicant {record_id} with LLM")
-            result = self.evaluate_applicant(applicant)
+            input_hash = hash_inputs(safe_get_field(applicant, "Compressed JSON"))
+            if journal and journal.is_done(record_id, "llm", input_hash):
+                results["skipped"].append((record_id, "Completed before interruption"))
+                continue
             
-            if result["success"]:
-                if result.get("skipped"):
-                    results["skipped"].append((record_id, result["reason"]))
-                    print(f"    ⏭️  Skipped: {result['reason']}")
-                else:
-                    results["success"].append(record_id)
-                    total_tokens += result.get("tokens_used", 0)
-                    score = result["evaluation"]["score"]
-                    print(f"    ✅ Evaluated: Score {score}/10, {result.get('tokens_used', 0)} tokens")
+            shortlisted = safe_get_field(applicant, "Shortlist Status") == "yes"
+            queued = queue.enqueue(
+                record_id,
+                PRIORITY_SHORTLISTED if shortlisted else PRIORITY_DEFAULT,
+                _created_timestamp(applicant),
+                input_hash,
+                needs_work=force_reprocess or not self._is_current(applicant),
+            )
+            if queued:
+                by_id[record_id] = applicant
             else:
-                results["failed"].append((record_id, result["error"]))
-                print(f"    ❌ Failed: {result['error']}")
-            
-            # Rate limiting - small delay between requests
-            time.sleep(0.5)
+                results["skipped"].append((record_id, "Already evaluated"))
+        
+        print(f"  📥 Queue: {queue.counts()}")
+        tokens = [0]
+        lock = threading.Lock()
         
-        return {**results, "total_tokens": total_tokens}
+        def worker(worker_id):
+            owner = f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+            while True:
+                record_id = queue.lease(owner)
+                if record_id is None:
+                    return
+                # Jobs left over from an earlier run aren't in this sweep's snapshot
+                applicant = by_id.get(record_id)
+                if applicant is None:
+                    try:
+                        applicant = self.client.get_applicant(record_id)
+                    except Exception as e:
+                        if error_status(e) == 404:
+                            # Deleted or archived since it was queued
+                            queue.remove([record_id])
+                            results["skipped"].append((record_id, "Applicant no longer exists"))
+                            print(f"  ⏭️  {record_id} no longer exists; dropped from the queue")
+                        elif queue.fail(record_id, f"Lookup failed: {e}") == "failed":
+                            results["failed"].append((record_id, f"Lookup failed: {e}"))
+                            print(f"  ❌ {record_id}: lookup failed: {e}")
+                        else:
+                            print(f"  ⚠️  {record_id}: lookup failed, re-queued: {e}")
+                        continue
+                input_hash = hash_inputs(safe_get_field(applicant, "Compressed JSON"))
+                
+                print(f"  🤖 Evaluating applicant {record_id} with LLM")
+                with tracer.span("llm_evaluate", cat="stage", applicant=record_id):
+                    try:
+                        result = self.evaluate_applicant(applicant, dedup=dedup)
+                    except Exception as e:
+                        result = {"success": False, "error": f"LLM evaluation failed: {e}"}
+                
+                if result["success"]:
+                    queue.complete(record_id)
+                    if result.get("skipped"):
+                        results["skipped"].append((record_id, result["reason"]))
+                        print(f"    ⏭️  Skipped: {result['reason']}")
+                    else:
+                        results["success"].append(record_id)
+                        with lock:
+                            tokens[0] += result.get("tokens_used", 0)
+                            tiers[result["tier"]] += 1
+                            if result.get("dedup"):
+                                reused[result["dedup"]["match"]] += 1
+                            if result.get("repair"):
+                                repairs[result["repair"]] += 1
+                        score = result["evaluation"]["score"]
+                        if result.get("dedup"):
+                            match = result["dedup"]
+                            print(f"    👯 {match['match'].capitalize()} of {match['record_id']} (via {match['via']}): "
+                                  f"Score {score}/10, {result.get('tokens_used', 0)} tokens")
+                        elif result["tier"] == TIER_TEMPLATE:
+                            print(f"    📝 Templated ({result['gate_reason']}): Score {score}/10, no tokens")
+                        else:
+                            print(f"    ✅ Evaluated ({result['tier']}): Score {score}/10, {result.get('tokens_used', 0)} tokens")
+                    if journal:
+                        journal.record(record_id, "llm", input_hash)
+                elif queue.fail(record_id, result["error"]) == "failed":
+                    results["failed"].append((record_id, result["error"]))
+                    print(f"    ❌ Failed: {result['error']}")
+                else:
+                    print(f"    ⚠️  Failed, re-queued: {result['error']}")
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for future in [pool.submit(worker, n) for n in range(max(1, workers))]:
+                future.result()
+        
+        return {**results, "total_tokens": tokens[0], "tiers": tiers, "reused": reused,
+                "repairs": repairs, "hedging": dict(self.llm.stats)}
+
+def _is_evaluation_response(response, fields=REQUIRED_FIELDS):
+    """True when a completion's content parses into a JSON object holding every one of `fields` (after local repair)"""
+    try:
+        content = response.choices[0].message.content
+    except (AttributeError, IndexError, TypeError):
+        return False
+    data, _ = load_json(content)
+    if not isinstance(data, dict):
+        return False
+    return not set(fields) & set(coerce_evaluation(data)[1])
+
+def _total_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
+def _created_timestamp(record):
+    """Record createdTime as epoch seconds (0 when missing)"""
+    created = record.get("createdTime")
+    if not created:
+        return 0.0
+    return datetime.datetime.fromisoformat(created.replace("Z", "+00:00")).timestamp()
 
 # ===================================
\ No newline at end of file
@@ -2,6 +2,9 @@ import json
 from config import *
 from utils.airtable_client import airtable
 from utils.helpers import calculate_experience_years, safe_get_field
+from utils.profiling import tracer
+from utils.journal import hash_inputs
+from utils.reference_data import reference_data
 import datetime
 import re
 
@@ -11,7 +14,6 @@ class ApplicantShortlister:
     
     def evaluate_applicant(self, applicant_record):
         """Evaluate single applicant against shortlisting criteria"""
-        record_id = applicant_record["id"]
         compressed_json = safe_get_field(applicant_record, "Compressed JSON")
         
         if not compressed_json:
@@ -23,9 +25,7 @@ class ApplicantShortlister:
             return {"eligible": False, "reason": f"Invalid JSON: {e}"}
         
         # Get linked records for detailed evaluation
-        personal_recs = self.client.linked_records(self.client.personal, record_id)
-        experience_recs = self.client.linked_records(self.client.experience, record_id)
-        salary_recs = self.client.linked_records(self.client.salary, record_id)
+        personal_recs, experience_recs, salary_recs = self.client.linked_children(applicant_record)
         
         # Evaluate criteria
         experience_result = self._evaluate_experience(experience_recs)
@@ -68,16 +68,17 @@ class ApplicantShortlister:
     
     def _evaluate_experience(self, experience_records):
         """Evaluate experience criteria"""
+        rules = reference_data.get()
         years = calculate_experience_years(experience_records)
         tier1_company, tier1_name = self._check_tier1_experience(experience_records)
         
-        meets_years = years >= MIN_EXPERIENCE_YEARS
+        meets_years = years >= rules.min_experience_years
         meets_tier1 = tier1_company
         meets_criteria = meets_years or meets_tier1
         
         reasons = []
         if meets_years:
-            reasons.append(f"Experience ≥ {MIN_EXPERIENCE_YEARS} years ({years:.1f} yrs)")
+            reasons.append(f"Experience ≥ {rules.min_experience_years} years ({years:.1f} yrs)")
         if meets_tier1:
             reasons.append(f"Tier-1 company: {tier1_name}")
         
@@ -89,11 +90,10 @@ class ApplicantShortlister:
         }
     
     def _check_tier1_experience(self, experience_records):
-        tier1 = {t.lower() for t in TIER1_COMPANIES}
+        rules = reference_data.get()
         for rec in experience_records:
-            company = safe_get_field(rec, "Company", "").strip().lower()
-            if any(t in company for t in tier1):
-                return True, safe_get_field(rec, "Company")
+            if rules.is_tier1(rec.company):
+                return True, rec.company
         return False, ""
     
     def _evaluate_compensation(self, salary_records):
@@ -101,30 +101,39 @@ class ApplicantShortlister:
         if not salary_records:
             return {"meets_criteria": False, "reason": "No salary information"}
         
-        currency = safe_get_field(salary_records[0], "Currency", "").strip().upper()
-        preferred_rate = safe_get_field(salary_records[0], "Preferred Rate")
-        availability = safe_get_field(salary_records[0], "Availability (hrs/wk)")
+        rules = reference_data.get()
+        salary = salary_records[0]
+        currency = (salary.currency or "").strip().upper()
+        preferred_rate = salary.preferred_rate
+        availability = salary.availability
         
+        # Non-USD rates are converted with the reference FX table before the cap applies
         try:
-            rate_ok = currency == "USD" and float(preferred_rate) <= MAX_HOURLY_RATE
+            rate_usd = rules.to_usd(preferred_rate, currency)
         except (TypeError, ValueError):
-            rate_ok = False
+            rate_usd = None
+        rate_ok = rate_usd is not None and rate_usd <= rules.max_hourly_rate
         
         try:
-            availability_ok = float(availability) >= MIN_AVAILABILITY
+            availability_ok = float(availability) >= rules.min_availability
         except (TypeError, ValueError):
             availability_ok = False
         
         meets_criteria = rate_ok and availability_ok
         
         if meets_criteria:
-            reason = f"Compensation: ≤ ${MAX_HOURLY_RATE}/hr USD and ≥ {MIN_AVAILABILITY} hrs/wk"
+            reason = f"Compensation: ≤ ${rules.max_hourly_rate}/hr USD and ≥ {rules.min_availability} hrs/wk"
         else:
             issues = []
             if not rate_ok:
-                issues.append(f"Rate: {preferred_rate} {currency} (needs ≤ ${MAX_HOURLY_RATE} USD)")
+                if currency not in rules.fx_rates:
+                    issues.append(f"Rate: {preferred_rate} {currency} (no FX rate for {currency or 'blank currency'})")
+                elif currency != "USD" and rate_usd is not None:
+                    issues.append(f"Rate: {preferred_rate} {currency} (≈ ${rate_usd:.2f} USD, needs ≤ ${rules.max_hourly_rate} USD)")
+                else:
+                    issues.append(f"Rate: {preferred_rate} {currency} (needs ≤ ${rules.max_hourly_rate} USD)")
             if not availability_ok:
-                issues.append(f"Availability: {availability} hrs/wk (needs ≥ {MIN_AVAILABILITY})")
+                issues.append(f"Availability: {availability} hrs/wk (needs ≥ {rules.min_availability})")
             reason = "; ".join(issues)
         
         return {"meets_criteria": meets_criteria, "reason": reason}
@@ -134,8 +143,8 @@ class ApplicantShortlister:
         if not personal_records:
             return {"meets_criteria": False, "reason": "No location information"}
         
-        location = safe_get_field(personal_records[0], "Location", "").strip().lower()
-        meets_criteria = any(allowed in location for allowed in ALLOWED_LOCATIONS)
+        location = (personal_records[0].location or "").strip().lower()
+        meets_criteria = reference_data.get().region(location) is not None
         
         if meets_criteria:
             reason = "Location: Approved region"
@@ -179,10 +188,10 @@ class ApplicantShortlister:
             print(f"❗ Airtable create failed for {app_id}: {e}")
             return {"shortlisted": False, "reason": f"Error creating shortlist: {e}"}
 
-    def shortlist_all_applicants(self):
+    def shortlist_all_applicants(self, journal=None):
         """Evaluate and shortlist all eligible applicants"""
         applicants = self.client.get_all_applicants()
-        results = {"success": [], "failed": [], "ineligible": []}
+        results = {"success": [], "failed": [], "ineligible": [], "skipped": []}
         
         for applicant in applicants:
             record_id = applicant["id"]
@@ -191,14 +200,28 @@ class ApplicantShortlister:
             if safe_get_field(applicant, "Shortlist Status") == "yes":
                 continue
             
+            # Rules version included: a rules change re-evaluates applicants done under the old rules
+            input_hash = hash_inputs([safe_get_field(applicant, "Compressed JSON"), reference_data.get().version])
+            if journal and journal.is_done(record_id, "shortlist", input_hash):
+                results["skipped"].append(record_id)
+                continue
+            
             print(f"⭐ Evaluating applicant {record_id}")
-            result = self.shortlist_applicant(applicant)
+            with tracer.span("shortlist", cat="stage", applicant=record_id):
+                try:
+                    result = self.shortlist_applicant(applicant)
+                except Exception as e:
+                    result = {"shortlisted": False, "reason": f"Error evaluating applicant: {e}"}
             
             if result["shortlisted"]:
                 results["success"].append((record_id, result["reasons"]))
             elif "Error" in result["reason"]:
                 results["failed"].append((record_id, result["reason"]))
+                continue
             else:
                 results["ineligible"].append((record_id, result["reason"]))
+            
+            if journal:
+                journal.record(record_id, "shortlist", input_hash)
         
         return results
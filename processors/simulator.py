@@ -0,0 +1,194 @@
+import datetime
+import json
+import time
+from config import *
+from utils.airtable_client import airtable
+from utils.helpers import calculate_experience_years
+from utils.profiling import tracer
+from utils.reference_data import reference_data, THRESHOLDS
+from processors.shortlister import ApplicantShortlister
+
+def parse_values(spec):
+    """Threshold values from a spec such as "80,90,100" or "80:120:5" (start:stop:step, inclusive)"""
+    values = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ":" in part:
+            start, stop, step = (float(x) for x in part.split(":"))
+            if step <= 0 or stop < start:
+                raise ValueError(f"Bad range {part!r}; use start:stop:step with step > 0")
+            values.update(round(start + i * step, 6) for i in range(int(round((stop - start) / step)) + 1))
+        else:
+            values.add(float(part))
+    return sorted(values)
+
+def threshold_masks(values, thresholds, at_least):
+    """{threshold: bitset of indexes whose value is >= it (`at_least`) or <= it}; None never qualifies.
+
+    Values are sorted once and each index is set exactly once, so the cost is
+    one pass over the values plus one bytes -> int conversion per threshold.
+    """
+    order = sorted(((v, i) for i, v in enumerate(values) if v is not None), reverse=at_least)
+    mask = bytearray((len(values) + 7) // 8)
+    masks = {}
+    position = 0
+    for threshold in sorted(set(thresholds), reverse=at_least):
+        while position < len(order) and (
+            order[position][0] >= threshold if at_least else order[position][0] <= threshold
+        ):
+            i = order[position][1]
+            mask[i >> 3] |= 1 << (i & 7)
+            position += 1
+        masks[threshold] = int.from_bytes(mask, "little")
+    return masks
+
+def members(bits, ids, limit=None):
+    """IDs at the set bits of `bits` (lowest first), at most `limit` of them"""
+    found = []
+    for byte_index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        while byte:
+            low = byte & -byte
+            found.append(ids[byte_index * 8 + low.bit_length() - 1])
+            if limit is not None and len(found) >= limit:
+                return found
+            byte ^= low
+    return found
+
+class RuleInputs:
+    """Per-applicant shortlist rule inputs, extracted once: numeric columns plus fixed-rule bitsets"""
+    def __init__(self, ids, years, rates, availability, tier1, location, compressed=None):
+        self.ids = ids
+        self.years = years
+        self.rates = rates  # USD; None when missing or without an FX rate
+        self.availability = availability
+        self.tier1 = tier1  # bitset: a Tier-1 role (meets experience at any threshold)
+        self.location = location  # bitset: an approved location
+        # bitset: a valid Compressed JSON, which the shortlister requires before any rule
+        self.compressed = (1 << len(ids)) - 1 if compressed is None else compressed
+
+    @classmethod
+    def extract(cls, applicant_ids, children_of, shortlister, compressed_json=None):
+        """Inputs for `applicant_ids` from their (personal, experience, salary) typed rows.
+
+        `compressed_json` lists each applicant's Compressed JSON; when given,
+        applicants without a parseable one are never eligible.
+        """
+        rules = reference_data.get()
+        years, rates, availability = [], [], []
+        tier1 = bytearray((len(applicant_ids) + 7) // 8)
+        location = bytearray(len(tier1))
+        compressed = None
+        if compressed_json is not None:
+            compressed = bytearray(len(tier1))
+            for i, payload in enumerate(compressed_json):
+                if _valid_json(payload):
+                    compressed[i >> 3] |= 1 << (i & 7)
+            compressed = int.from_bytes(compressed, "little")
+        for i, record_id in enumerate(applicant_ids):
+            personal, experience, salary = children_of(record_id)
+            years.append(calculate_experience_years(experience))
+            if shortlister._check_tier1_experience(experience)[0]:
+                tier1[i >> 3] |= 1 << (i & 7)
+            if shortlister._evaluate_location(personal)["meets_criteria"]:
+                location[i >> 3] |= 1 << (i & 7)
+            rate = hours = None
+            if salary:
+                try:
+                    rate = rules.to_usd(salary[0].preferred_rate, salary[0].currency)
+                except (TypeError, ValueError):
+                    pass
+                try:
+                    hours = float(salary[0].availability)
+                except (TypeError, ValueError):
+                    pass
+            rates.append(rate)
+            availability.append(hours)
+        return cls(list(applicant_ids), years, rates, availability,
+                   int.from_bytes(tier1, "little"), int.from_bytes(location, "little"), compressed)
+
+def _valid_json(payload):
+    """Mirrors the shortlister: a non-empty Compressed JSON that parses"""
+    if not payload:
+        return False
+    try:
+        json.loads(payload)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def simulate(inputs, grid, baseline, max_ids=100):
+    """Eligible counts and flips vs `baseline` for every combination in `grid`.
+
+    `grid` and `baseline` are keyed by THRESHOLDS; grid values are lists.
+    Each combination is a handful of big-int ANDs/ORs over one bit per
+    applicant, mirroring the shortlister: compressed AND
+    (years >= min OR tier1) AND rate <= max AND availability >= min AND location.
+    """
+    rate_masks = threshold_masks(inputs.rates, grid["max_hourly_rate"] + [baseline["max_hourly_rate"]], at_least=False)
+    hours_masks = threshold_masks(inputs.availability, grid["min_availability"] + [baseline["min_availability"]], at_least=True)
+    years_masks = threshold_masks(inputs.years, grid["min_experience_years"] + [baseline["min_experience_years"]], at_least=True)
+
+    def eligible(rate, hours, years):
+        return (inputs.compressed & rate_masks[rate] & hours_masks[hours] & inputs.location
+                & (years_masks[years] | inputs.tier1))
+
+    base = eligible(baseline["max_hourly_rate"], baseline["min_availability"], baseline["min_experience_years"])
+    combinations = []
+    for rate in grid["max_hourly_rate"]:
+        for hours in grid["min_availability"]:
+            for years in grid["min_experience_years"]:
+                bits = eligible(rate, hours, years)
+                gained, lost = bits & ~base, base & ~bits
+                combinations.append({
+                    "max_hourly_rate": rate, "min_availability": hours, "min_experience_years": years,
+                    "eligible": bits.bit_count(),
+                    "gained": gained.bit_count(), "lost": lost.bit_count(),
+                    "gained_ids": members(gained, inputs.ids, max_ids) if gained else [],
+                    "lost_ids": members(lost, inputs.ids, max_ids) if lost else [],
+                })
+    return {"baseline": {**baseline, "eligible": base.bit_count()}, "combinations": combinations}
+
+class ThresholdSimulator:
+    """Read-only what-if of shortlisting thresholds over every applicant"""
+    def __init__(self):
+        self.client = airtable
+        self.shortlister = ApplicantShortlister()
+
+    def _load(self):
+        """Applicant IDs, their Compressed JSON and the child tables indexed by applicant"""
+        with tracer.span("simulate_load"):
+            applicants = self.client.applicants.all(fields=[NAME_FIELD, "Compressed JSON"])
+            if self.client.shard:
+                applicants = self.client.shard.filter(applicants)
+            indexes = [self.client.linked_index(table) for table in self.client.child_tables()]
+        payloads = [applicant.get("fields", {}).get("Compressed JSON") for applicant in applicants]
+        return [applicant["id"] for applicant in applicants], payloads, indexes
+
+    def run(self, grid=None, max_ids=100):
+        """Simulate `grid` ({threshold: [values]}; missing thresholds stay at their current value)"""
+        rules = reference_data.get()
+        baseline = {name: getattr(rules, name) for name in THRESHOLDS}
+        grid = {name: sorted((grid or {}).get(name) or [baseline[name]]) for name in THRESHOLDS}
+
+        started = time.perf_counter()
+        applicant_ids, payloads, indexes = self._load()
+        loaded = time.perf_counter()
+        with tracer.span("simulate_extract", applicants=len(applicant_ids)):
+            inputs = RuleInputs.extract(
+                applicant_ids, lambda record_id: tuple(index.get(record_id, []) for index in indexes),
+                self.shortlister, compressed_json=payloads,
+            )
+        extracted = time.perf_counter()
+        with tracer.span("simulate_grid"):
+            report = simulate(inputs, grid, baseline, max_ids=max_ids)
+        finished = time.perf_counter()
+
+        return {
+            "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "applicants": len(applicant_ids),
+            "rules_version": rules.version,
+            **report,
+            "seconds": {"load": loaded - started, "extract": extracted - loaded, "simulate": finished - extracted},
+        }
@@ -0,0 +1,120 @@
+import json
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from config import *
+from utils.airtable_client import airtable
+from utils.profiling import tracer
+from processors.compressor import build_json_structure, child_fingerprint
+
+# Below this many applicants the compare runs in-process; worker start-up would cost more than it saves
+PARALLEL_MIN_APPLICANTS = 2000
+
+def _role_key(role):
+    return json.dumps(role, sort_keys=True, ensure_ascii=False)
+
+def json_drift(stored, expected):
+    """Differences between a stored and a rebuilt Compressed JSON.
+
+    Personal and salary keys are compared one by one. Roles are compared as a
+    multiset, since row order in a scan is not meaningful.
+    """
+    diff = []
+    for section in ("personal", "salary"):
+        old, new = stored.get(section) or {}, expected.get(section) or {}
+        for key in sorted(set(old) | set(new)):
+            if old.get(key) != new.get(key):
+                diff.append({"field": f"{section}.{key}", "stored": old.get(key), "expected": new.get(key)})
+
+    stored_roles = sorted(_role_key(role) for role in stored.get("experience") or [])
+    expected_roles = sorted(_role_key(role) for role in expected.get("experience") or [])
+    if stored_roles != expected_roles:
+        unexpected = list(stored_roles)
+        missing = []
+        for role in expected_roles:
+            if role in unexpected:
+                unexpected.remove(role)
+            else:
+                missing.append(role)
+        diff += [{"field": "experience", "stored": None, "expected": json.loads(role)} for role in missing]
+        diff += [{"field": "experience", "stored": json.loads(role), "expected": None} for role in unexpected]
+    return diff
+
+def compare_applicant(task):
+    """Drift entry for one (record_id, stored JSON, stored fingerprint, personal, experience, salary) task, or None"""
+    record_id, stored_json, stored_fingerprint, personal, experience, salary = task
+    has_children = bool(personal or experience or salary)
+    expected = build_json_structure(personal, experience, salary)
+    fingerprint_stale = has_children and stored_fingerprint != child_fingerprint(personal, experience, salary)
+
+    if not stored_json:
+        if not has_children:
+            return None
+        return {"record_id": record_id, "status": "missing_json", "diff": [], "fingerprint_stale": fingerprint_stale}
+    try:
+        stored = json.loads(stored_json)
+    except ValueError as e:
+        return {"record_id": record_id, "status": "invalid_json", "error": str(e), "diff": [],
+                "fingerprint_stale": fingerprint_stale}
+
+    diff = json_drift(stored, expected)
+    if diff:
+        return {"record_id": record_id, "status": "drift", "diff": diff, "fingerprint_stale": fingerprint_stale}
+    if fingerprint_stale:
+        # Content matches but the next run would still recompress it
+        return {"record_id": record_id, "status": "stale_fingerprint", "diff": [], "fingerprint_stale": True}
+    return None
+
+class ConsistencyVerifier:
+    """Read-only bulk check of every applicant's Compressed JSON against its child rows"""
+    def __init__(self):
+        self.client = airtable
+
+    def _load(self):
+        """Applicants (only the fields the check needs) and the child tables indexed by applicant"""
+        with tracer.span("verify_load"):
+            applicants = self.client.applicants.all(fields=[NAME_FIELD, "Compressed JSON", FINGERPRINT_FIELD])
+            if self.client.shard:
+                applicants = self.client.shard.filter(applicants)
+            indexes = [self.client.linked_index(table, unlinked=True) for table in self.client.child_tables()]
+        return applicants, indexes
+
+    def verify(self, workers=VERIFY_WORKERS):
+        """Compare every applicant; returns the drift report (JSON-serialisable)"""
+        applicants, indexes = self._load()
+        tasks = [
+            (
+                applicant["id"],
+                applicant.get("fields", {}).get("Compressed JSON"),
+                applicant.get("fields", {}).get(FINGERPRINT_FIELD),
+                *(index.get(applicant["id"], []) for index in indexes),
+            )
+            for applicant in applicants
+        ]
+
+        with tracer.span("verify_compare", applicants=len(tasks)):
+            if workers > 1 and len(tasks) >= PARALLEL_MIN_APPLICANTS:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    entries = list(pool.map(compare_applicant, tasks, chunksize=chunksize))
+            else:
+                entries = [compare_applicant(task) for task in tasks]
+        drift = [entry for entry in entries if entry]
+
+        # Child rows linked to no live applicant (or to none at all) are never compressed into anything
+        known = {applicant["id"] for applicant in applicants}
+        orphans = {}
+        if not self.client.shard:
+            for table, index in zip(self.client.child_tables(), indexes):
+                rows = sorted(r.id for applicant_id, records in index.items() if applicant_id not in known for r in records)
+                if rows:
+                    orphans[table.name] = rows
+
+        counts = {"applicants": len(applicants), "consistent": len(applicants) - len(drift)}
+        for entry in drift:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {
+            "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "counts": counts,
+            "drift": drift,
+            "orphans": orphans,
+        }
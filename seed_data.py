@@ -1,83 +1,147 @@
-import os, random
-from dotenv import load_dotenv
-from pyairtable import Api
-import datetime
-
-load_dotenv()
+"""Seed (or clear) the Airtable base with synthetic applicants.
 
-AIRTABLE_TOKEN = os.environ["AIRTABLE_TOKEN"]
-BASE_ID = os.environ["AIRTABLE_BASE_ID"]
+    python seed_data.py [--count N] [--seed S] [--no-clear | --clear-only] [--workers W]
 
-T_APPLICANTS = os.environ.get("APPLICANTS_TABLE", "Applicants")
-T_PERSONAL = os.environ.get("PERSONAL_TABLE", "Personal Details")
-T_EXPERIENCE = os.environ.get("EXPERIENCE_TABLE", "Work Experience")
-T_SALARY = os.environ.get("SALARY_TABLE", "Salary Preferences")
-LINK_FIELD = os.environ.get("APPLICANT_LINK_FIELD", "Applicant ID")
+Records are created and deleted 10 per request (Airtable's batch limit), with
+several requests in flight under the shared per-base rate limiter. Applicants
+go first; their child rows follow in a second wave that links to the returned
+record IDs. Clearing runs the waves in reverse.
+"""
+import time
+import random
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from utils.airtable_client import airtable
 
-api = Api(AIRTABLE_TOKEN)
-applicants = api.table(BASE_ID, T_APPLICANTS)
-personal = api.table(BASE_ID, T_PERSONAL)
-experience = api.table(BASE_ID, T_EXPERIENCE)
-salary = api.table(BASE_ID, T_SALARY)
+# Airtable accepts at most 10 records per create/delete request
+BATCH_SIZE = 10
 
 TIER1 = ["Google", "Meta", "OpenAI", "Microsoft", "Apple"]
 OTHERS = ["StartupX", "LocalSoft", "EduTech", "RetailCorp", "BankInc"]
 LOCATIONS = ["US", "Canada", "Germany", "UK",
              "India", "France", "Australia"]
 
-def clear_all():
-    print("Clearing existing records...")
-    # delete children first, then parents
-    for tbl in [personal, experience, salary, applicants]:
-        for r in tbl.all():
-            tbl.delete(r["id"])
-
-def seed():
-    print("Creating mock applicants...")
-    for i in range(1, 12):
-        app = applicants.create({"Applicant ID": f"APP{i:03}"})
-        app_id = app["id"]
-
-        personal.create({
-            LINK_FIELD: [app_id],
+def generate(count, seed=None, today=None):
+    """[(applicant fields, {child table name: [fields, ...]}), ...]; the same seed and day give the same rows"""
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    plan = []
+    for i in range(1, count + 1):
+        children = {T_PERSONAL: [{
             "Full Name": f"Candidate {i}",
             "Email": f"candidate{i}@example.com",
-            "Location": random.choice(LOCATIONS),
+            "Location": rng.choice(LOCATIONS),
             "LinkedIn": f"https://linkedin.com/in/candidate{i}"
-        })
+        }], T_EXPERIENCE: [], T_SALARY: []}
 
-        for _ in range(random.randint(1, 3)):
-            company = random.choice(TIER1 + OTHERS)
-            years = random.randint(3, 8)
-            today = datetime.date.today()
-            end_date = today - datetime.timedelta(days=random.randint(0, 365))  # up to ~1 year ago
+        for _ in range(rng.randint(1, 3)):
+            years = rng.randint(3, 8)
+            end_date = today - datetime.timedelta(days=rng.randint(0, 365))  # up to ~1 year ago
             start_date = end_date - datetime.timedelta(days=years * 365)
-            title = random.choice(["SWE", "Engineer", "Data Scientist", "Product Dev"])
-            experience.create({
-                LINK_FIELD: [app_id],
-                "Company": company,
-                "Title": title,
+            children[T_EXPERIENCE].append({
+                "Company": rng.choice(TIER1 + OTHERS),
+                "Title": rng.choice(["SWE", "Engineer", "Data Scientist", "Product Dev"]),
                 "Start": start_date.isoformat(),
                 "End": end_date.isoformat(),
-                "Technologies": random.choice(["Python", "JS", "C++", "Go"])
+                "Technologies": rng.choice(["Python", "JS", "C++", "Go"])
             })
 
-        pref_rate = random.choice([50, 60, 65, 70, 75, 80, 90, 100, 120, 150])
-        avail = random.choice([15, 20, 25, 30, 35])
-        currency = random.choice(["USD"])
-        salary.create({
-            LINK_FIELD: [app_id],
+        pref_rate = rng.choice([50, 60, 65, 70, 75, 80, 90, 100, 120, 150])
+        children[T_SALARY].append({
             "Preferred Rate": pref_rate,
             "Minimum Rate": max(50, pref_rate - 20),
-            "Currency": currency,
-            "Availability (hrs/wk)": avail
+            "Currency": "USD",
+            "Availability (hrs/wk)": rng.choice([15, 20, 25, 30, 35])
         })
-        print(f"  - Created applicant APP{i:03}")
-    print("✅ Seed complete: 10 applicants created.")
+        plan.append(({NAME_FIELD: f"APP{i:03}"}, children))
+    return plan
+
+def _in_batches(fn, items, workers):
+    """Call fn on each BATCH_SIZE slice of items concurrently; returns [(slice, result or exception), ...] in order"""
+    batches = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+
+    def run(batch):
+        try:
+            return batch, fn(batch)
+        except Exception as e:
+            return batch, e
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, batches))
+
+def create_wave(table, rows, workers=AIRTABLE_MAX_CONCURRENCY):
+    """Batch-create rows in `table`; returns the created record IDs aligned with rows (None where a batch failed)"""
+    ids = []
+    for batch, result in _in_batches(table.batch_create, rows, workers):
+        if isinstance(result, Exception):
+            print(f"  ❌ {table.name}: {len(batch)} rows not created: {result}")
+            ids += [None] * len(batch)
+        else:
+            ids += [record["id"] for record in result]
+    return ids
+
+def delete_wave(table, record_ids, workers=AIRTABLE_MAX_CONCURRENCY):
+    """Batch-delete record IDs from `table`; returns how many were deleted"""
+    deleted = 0
+    for batch, result in _in_batches(table.batch_delete, record_ids, workers):
+        if isinstance(result, Exception):
+            print(f"  ❌ {table.name}: {len(batch)} rows not deleted: {result}")
+        else:
+            deleted += len(batch)
+    return deleted
+
+def clear_all(workers=AIRTABLE_MAX_CONCURRENCY):
+    print("Clearing existing records...")
+    # delete children first, then parents
+    counts = {}
+    for table, field in [(airtable.personal, LINK_FIELD), (airtable.experience, LINK_FIELD),
+                         (airtable.salary, LINK_FIELD), (airtable.applicants, NAME_FIELD)]:
+        record_ids = [r["id"] for r in table.all(fields=[field])]
+        counts[table.name] = delete_wave(table, record_ids, workers)
+        print(f"  - Deleted {counts[table.name]}/{len(record_ids)} {table.name} rows")
+    return counts
+
+def seed(count=11, seed=None, workers=AIRTABLE_MAX_CONCURRENCY):
+    print(f"Creating {count} mock applicants (seed {seed})...")
+    started = time.perf_counter()
+    plan = generate(count, seed)
+
+    # Wave 1: parents, so wave 2 can link to their record IDs
+    applicant_ids = create_wave(airtable.applicants, [fields for fields, _ in plan], workers)
+    counts = {T_APPLICANTS: sum(1 for record_id in applicant_ids if record_id)}
+
+    # Wave 2: every child table, skipping applicants whose batch failed
+    for table in airtable.child_tables():
+        rows = [
+            {LINK_FIELD: [applicant_id], **fields}
+            for applicant_id, (_, children) in zip(applicant_ids, plan) if applicant_id
+            for fields in children[table.name]
+        ]
+        counts[table.name] = sum(1 for record_id in create_wave(table, rows, workers) if record_id)
+
+    elapsed = time.perf_counter() - started
+    created = sum(counts.values())
+    print(f"✅ Seed complete: {counts[T_APPLICANTS]} applicants, {created} rows in {elapsed:.1f}s "
+          f"({created / max(elapsed, 1e-9):.0f} rows/s)")
+    return counts
 
 def main():
-    clear_all()
-    seed()
+    parser = argparse.ArgumentParser(description="Seed the Airtable base with synthetic applicants")
+    parser.add_argument("--count", type=int, default=11, help="Applicants to create")
+    parser.add_argument("--seed", type=int, help="RNG seed for reproducible rows")
+    parser.add_argument("--workers", type=int, default=AIRTABLE_MAX_CONCURRENCY,
+                        help="Batches in flight (still capped by the Airtable rate limit)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--no-clear", action="store_true", help="Keep existing records")
+    group.add_argument("--clear-only", action="store_true", help="Delete all records and stop")
+    args = parser.parse_args()
+
+    if not args.no_clear:
+        clear_all(args.workers)
+    if not args.clear_only:
+        seed(args.count, args.seed, args.workers)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Keep local state (journal, queue, caches) out of the working tree
+os.environ.setdefault("PIPELINE_STATE_DIR", tempfile.mkdtemp(prefix="pipeline-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,37 @@
+import json
+import threading
+import requests
+import config
+from utils import airtable_client
+
+def _response(payload):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode()
+    return response
+
+def test_long_formula_post_fallback_takes_one_slot(monkeypatch):
+    monkeypatch.setattr(config, "AIRTABLE_TOKEN", "pat_test")
+    monkeypatch.setattr(airtable_client.airtable_concurrency, "window", 1.0)
+    api = airtable_client._build_api()
+    sent = []
+
+    def send(prepared, **kwargs):
+        sent.append((prepared.method, prepared.url))
+        return _response({"records": [{"id": "rec1", "createdTime": "2025-01-01T00:00:00.000Z", "fields": {}}]})
+
+    monkeypatch.setattr(api.session, "send", send)
+    # Long enough for pyairtable to switch the GET to a POST to /listRecords
+    formula = "OR(" + ", ".join(f"RECORD_ID() = 'rec{n:014d}'" for n in range(400)) + ")"
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(records=api.table("appTEST", "Applicants").all(formula=formula)), daemon=True
+    )
+    worker.start()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive(), "nested request deadlocked on the concurrency slot"
+    assert [method for method, _ in sent] == ["POST"]
+    assert sent[0][1].endswith("/listRecords")
+    assert [r["id"] for r in result["records"]] == ["rec1"]
+    assert airtable_client.airtable_concurrency.in_flight == 0
@@ -0,0 +1,37 @@
+from utils.dedup import DedupIndex
+
+def _profile(email=None, linkedin=None, rate=80):
+    personal = {"name": "Ada", "location": "Berlin, Germany"}
+    if email:
+        personal["email"] = email
+    if linkedin:
+        personal["linkedin"] = linkedin
+    return {
+        "personal": personal,
+        "experience": [{"company": "Google", "title": "Software Engineer", "start": "2015-01-01",
+                        "end": "2020-01-01", "technologies": "Go, Kubernetes"}],
+        "salary": {"preferred_rate": rate, "currency": "USD", "availability": 30},
+    }
+
+def test_exact_key_matches_normalised():
+    index = DedupIndex()
+    index.add("rec1", _profile(email="Ada+jobs@Example.com"), {"score": 8})
+    match = index.find("rec2", _profile(email="ada@example.com"))
+    assert match["record_id"] == "rec1" and match["match"] == "duplicate" and match["via"] == "email"
+
+def test_near_match_without_identity_keys():
+    index = DedupIndex()
+    index.add("rec1", _profile(), {"score": 8})
+    match = index.find("rec2", _profile(rate=90))
+    assert match["match"] == "near" and match["via"].startswith("simhash:")
+
+def test_conflicting_identity_rejects_near_match():
+    index = DedupIndex()
+    index.add("rec1", _profile(email="ada@example.com"), {"score": 8})
+    assert index.find("rec2", _profile(email="bob@example.com")) is None
+    # One side lacking the key is not a conflict
+    assert index.find("rec3", _profile(linkedin="linkedin.com/in/bob"))["record_id"] == "rec1"
+
+    index = DedupIndex()
+    index.add("rec1", _profile(linkedin="linkedin.com/in/ada"), {"score": 8})
+    assert index.find("rec2", _profile(linkedin="https://www.linkedin.com/in/bob/")) is None
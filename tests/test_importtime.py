@@ -0,0 +1,4 @@
+from utils.importtime import check_import_budgets
+
+def test_entry_points_within_import_budget():
+    assert check_import_budgets() == []
@@ -0,0 +1,55 @@
+import os
+import socket
+import pytest
+from utils.job_queue import JobQueue, PRIORITY_SHORTLISTED, PRIORITY_DEFAULT
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    yield queue
+    queue.close()
+
+def test_lease_order_priority_then_newest(queue):
+    queue.enqueue("old", PRIORITY_DEFAULT, 1.0, "h")
+    queue.enqueue("new", PRIORITY_DEFAULT, 2.0, "h")
+    queue.enqueue("lead", PRIORITY_SHORTLISTED, 0.5, "h")
+    assert [queue.lease("w"), queue.lease("w"), queue.lease("w")] == ["lead", "new", "old"]
+    assert queue.lease("w") is None
+    assert queue.counts() == {"leased": 3}
+
+def test_done_job_requeued_only_when_input_changes(queue):
+    queue.enqueue("rec1", PRIORITY_DEFAULT, 1.0, "h1")
+    queue.lease("w")
+    queue.complete("rec1")
+    assert queue.enqueue("rec1", PRIORITY_DEFAULT, 1.0, "h1", needs_work=False) is False
+    assert queue.enqueue("rec1", PRIORITY_DEFAULT, 1.0, "h2", needs_work=False) is True
+    assert queue.lease("w") == "rec1"
+
+def test_expired_lease_is_leased_again(queue):
+    queue.enqueue("rec1", PRIORITY_DEFAULT, 1.0, "h")
+    assert queue.lease("a", lease_seconds=-1) == "rec1"
+    assert queue.lease("b") == "rec1"
+
+def test_fail_requeues_until_max_attempts(queue):
+    queue.enqueue("rec1", PRIORITY_DEFAULT, 1.0, "h")
+    queue.lease("w")
+    assert queue.fail("rec1", "boom", max_attempts=2) == "pending"
+    queue.lease("w")
+    assert queue.fail("rec1", "boom", max_attempts=2) == "failed"
+    assert queue.lease("w") is None
+
+def test_orphaned_leases_of_dead_local_processes_are_released(queue):
+    queue.enqueue("mine", PRIORITY_DEFAULT, 1.0, "h")
+    queue.enqueue("other", PRIORITY_DEFAULT, 2.0, "h")
+    queue.lease(f"{socket.gethostname()}:{os.getpid()}:0")
+    queue.lease(f"elsewhere:{os.getpid()}:0")
+    assert queue.release_orphaned_leases() == 1
+    assert queue.counts() == {"pending": 1, "leased": 1}
+
+def test_remove_drops_jobs_in_any_state(queue):
+    for n, record_id in enumerate(("rec1", "rec2", "rec3")):
+        queue.enqueue(record_id, PRIORITY_DEFAULT, float(n), "h")
+    assert queue.lease("w") == "rec3"
+    assert queue.remove(["rec1", "rec3", "recMissing"]) == 2
+    assert queue.counts() == {"pending": 1}
+    assert queue.lease("w") == "rec2"
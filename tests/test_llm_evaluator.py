@@ -0,0 +1,66 @@
+import json
+from types import SimpleNamespace
+from utils.llm_providers import LLMProvider, ProviderChain
+from processors.gating import EvaluationGate
+from processors.llm_evaluator import LLMEvaluator
+
+class ScriptedProvider(LLMProvider):
+    """Replies with the next scripted completion and records every request"""
+    kind = "scripted"
+
+    def __init__(self, name, replies):
+        super().__init__(name, "test-model")
+        self.replies = list(replies)
+        self.requests = []
+
+    def _send(self, **kwargs):
+        self.requests.append(kwargs)
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+
+class FakeAirtable:
+    def __init__(self):
+        self.updates = []
+
+    def update_applicant(self, record_id, fields):
+        self.updates.append((record_id, fields))
+
+def _evaluator(providers):
+    evaluator = LLMEvaluator.__new__(LLMEvaluator)
+    evaluator.client = FakeAirtable()
+    evaluator.gate = EvaluationGate(enabled=False)
+    evaluator.llm = ProviderChain(providers, hedging=False)
+    return evaluator
+
+APPLICANT = {"id": "rec1", "fields": {"Compressed JSON": json.dumps({
+    "personal": {"name": "Ada", "location": "Berlin, Germany"},
+    "experience": [{"company": "Google", "title": "Engineer", "start": "2015-01-01", "end": "2020-01-01"}],
+    "salary": {"preferred_rate": 80, "currency": "USD", "availability": 30},
+})}}
+
+def test_missing_fields_follow_up_is_one_call():
+    primary = ScriptedProvider("primary", ['{"summary": "Solid backend engineer", "sco', '{"score": 7}'])
+    secondary = ScriptedProvider("secondary", [])
+    evaluator = _evaluator([primary, secondary])
+
+    result = evaluator.evaluate_applicant(APPLICANT)
+
+    assert result["success"] and result["repair"] == "follow_up"
+    assert result["evaluation"]["summary"] == "Solid backend engineer"
+    assert result["evaluation"]["score"] == 7
+    # A partly usable reply is kept and completed by the follow-up, never failed over
+    assert len(primary.requests) == 2
+    assert len(secondary.requests) == 0
+    assert list(json.loads(primary.requests[1]["messages"][0]["content"])["output_schema"]) == ["score"]
+    assert evaluator.client.updates[0][1]["LLM Score"] == 7
+
+def test_reply_without_json_object_fails_over():
+    primary = ScriptedProvider("primary", ["I can't evaluate this candidate."])
+    secondary = ScriptedProvider("secondary", ['{"summary": "Solid backend engineer", "score": 8}'])
+    evaluator = _evaluator([primary, secondary])
+
+    result = evaluator.evaluate_applicant(APPLICANT)
+
+    assert result["success"] and result["evaluation"]["score"] == 8
+    assert len(primary.requests) == 1 and len(secondary.requests) == 1
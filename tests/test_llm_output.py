@@ -0,0 +1,51 @@
+import json
+from utils.llm_output import (
+    extract_json, close_truncated, coerce_evaluation, parse_evaluation, build_missing_fields_prompt,
+)
+
+def test_clean_reply_is_not_repaired():
+    evaluation, missing, repaired = parse_evaluation(
+        '{"summary": "Strong", "score": 8, "issues": [], "follow_ups": ["Why?"]}'
+    )
+    assert evaluation == {"summary": "Strong", "score": 8, "issues": [], "follow_ups": ["Why?"]}
+    assert missing == []
+    assert not repaired
+
+def test_fenced_reply_is_extracted():
+    text = 'Here you go:\n```json\n{"summary": "Ok", "score": 6}\n```'
+    assert extract_json(text) == '{"summary": "Ok", "score": 6}'
+    evaluation, missing, repaired = parse_evaluation(text)
+    assert evaluation["score"] == 6 and missing == [] and repaired
+
+def test_truncated_string_and_brackets_are_closed():
+    assert close_truncated('{"summary": "Good eng') == {"summary": "Good eng"}
+    assert close_truncated('{"a": [1, 2') == {"a": [1, 2]}
+    assert close_truncated('{"a": 1, "b') == {"a": 1}
+    assert close_truncated('{"a": 1}') is None
+
+def test_truncation_after_summary_reports_missing_score():
+    evaluation, missing, repaired = parse_evaluation('{"summary": "Solid backend engineer", "sco')
+    assert evaluation["summary"] == "Solid backend engineer"
+    assert missing == ["score"]
+    assert repaired
+
+def test_types_are_coerced():
+    evaluation, missing = coerce_evaluation({
+        "summary": ["Good", "fit"], "score": "Score: 12/10",
+        "issues": "- one\n- two", "follow_ups": ["a", "b", "c", "d"],
+    })
+    assert evaluation == {"summary": "Good fit", "score": 10, "issues": ["one", "two"], "follow_ups": ["a", "b", "c"]}
+    assert missing == []
+
+def test_boolean_score_is_missing():
+    assert coerce_evaluation({"summary": "x", "score": True})[1] == ["score"]
+
+def test_unparseable_reply():
+    evaluation, missing, repaired = parse_evaluation("no json here")
+    assert missing == ["summary", "score"] and repaired
+    assert evaluation == {"issues": [], "follow_ups": []}
+
+def test_missing_fields_prompt_asks_only_for_missing():
+    prompt = json.loads(build_missing_fields_prompt({"personal": {}}, {"summary": "Ok", "issues": []}, ["score"]))
+    assert list(prompt["output_schema"]) == ["score"]
+    assert prompt["partial_evaluation"] == {"summary": "Ok"}
@@ -0,0 +1,114 @@
+import json
+import pytest
+from utils.search_index import SearchIndex, document, _years
+
+def _payload(name, company, tech, location, rate, hours, start="2015-01-01", end="2020-01-01", currency="USD"):
+    return json.dumps({
+        "personal": {"name": name, "location": location},
+        "experience": [{"company": company, "title": "Software Engineer", "start": start, "end": end,
+                        "technologies": tech}],
+        "salary": {"preferred_rate": rate, "currency": currency, "availability": hours},
+    })
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "index.json"))
+    index.update("rec1", _payload("Ada", "Google", "Go, Kubernetes", "Berlin, Germany", 70, 40))
+    index.update("rec2", _payload("Bob", "Acme Corp", "Python", "Toronto, Canada", 90, 20, start="2019-01-01"))
+    index.update("rec3", _payload("Cy", "Stripe", "Go", "London, UK", 120, 30, currency="GBP"))
+    return index
+
+def test_document_tokens_and_columns():
+    doc = document(json.loads(_payload("Ada", "Google", "Go, Kubernetes", "Berlin, Germany", 70, 40)))
+    assert {"tech:go", "tech:kubernetes", "company:google", "title:software", "loc:germany", "loc:berlin",
+            "currency:usd", "flag:tier1"} <= set(doc["tokens"])
+    assert doc["rate"] == 70 and doc["availability"] == 40 and doc["years"] == pytest.approx(5.0, abs=0.01)
+
+def test_tier1_matches_like_the_shortlister():
+    doc = document(json.loads(_payload("Ada", "Google LLC", "Go", "Berlin, Germany", 70, 40)))
+    assert "flag:tier1" in doc["tokens"]
+    doc = document(json.loads(_payload("Bob", "Acme Corp", "Go", "Berlin, Germany", 70, 40)))
+    assert "flag:tier1" not in doc["tokens"]
+
+def test_prefixed_bare_and_keyword_terms(index):
+    assert index.search("tech:go") == {"rec1", "rec3"}
+    assert index.search("germany") == {"rec1"}
+    assert index.search("tier1") == {"rec1", "rec3"}
+    assert index.search('company:"acme corp"') == {"rec2"}
+
+def test_boolean_operators_and_parentheses(index):
+    assert index.search("tech:go AND loc:germany") == {"rec1"}
+    assert index.search("tech:go loc:uk") == {"rec3"}
+    assert index.search("loc:germany OR loc:canada") == {"rec1", "rec2"}
+    assert index.search("NOT tech:go") == {"rec2"}
+    assert index.search("-tech:go") == {"rec2"}
+    assert index.search("(loc:uk OR loc:canada) AND NOT currency:gbp") == {"rec2"}
+    assert index.search("") == {"rec1", "rec2", "rec3"}
+
+def test_ranges(index):
+    assert index.search("rate<90") == {"rec1"}
+    assert index.search("rate<=90") == {"rec1", "rec2"}
+    assert index.search("rate>90") == {"rec3"}
+    assert index.search("avail=20") == {"rec2"}
+    assert index.search("years>=4") == {"rec1", "rec3"}
+
+def test_bad_queries(index):
+    for query in ("foo:bar", "size>3", "(tech:go", "tech:go )"):
+        with pytest.raises(ValueError):
+            index.search(query)
+
+def test_remove_and_reindex(index):
+    assert index.remove("rec1")
+    assert not index.remove("rec1")
+    assert index.search("rate<80") == set()
+    assert "tech:kubernetes" not in index.postings
+    assert index.update("rec3", "") is False
+    assert index.search("tech:go") == set()
+
+def test_save_and_load_round_trip(index):
+    index.save()
+    loaded = SearchIndex.load(index.path)
+    assert loaded.docs == index.docs
+    assert loaded.search("tech:go AND rate<100") == {"rec1"}
+
+def test_ongoing_roles_count_up_to_query_time(index):
+    import datetime
+    doc = document(json.loads(_payload("Dee", "Acme", "Go", "Paris, France", 70, 40, start="2020-01-01", end=None)))
+    assert doc["ongoing_starts"] and doc["closed_days"] == 0
+    assert _years(doc, datetime.date(2022, 1, 1)) == pytest.approx(2.0, abs=0.01)
+    assert _years(doc, datetime.date(2019, 1, 1)) == 0
+    index.update("rec4", _payload("Dee", "Acme", "Go", "Paris, France", 70, 40, start="2020-01-01", end=None))
+    index.docs["rec4"]["years"] = 0.5  # as if indexed long ago
+    index.save()
+    loaded = SearchIndex.load(index.path)
+    assert loaded.docs["rec4"]["years"] == _years(doc) and "rec4" in loaded.search("years>=4")
+
+class FakeApplicants:
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def all(self, formula=None, fields=None):
+        self.calls.append(formula)
+        return self.records if formula is None else []
+
+def test_rules_change_forces_rebuild(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from utils.reference_data import RuleSet, config_defaults, reference_data
+    applicants = FakeApplicants([{"id": "rec1", "fields": {
+        "Compressed JSON": _payload("Ada", "Hooli", "Go", "Berlin, Germany", 70, 40)}}])
+    client = SimpleNamespace(applicants=applicants)
+    monkeypatch.setattr(reference_data, "get", lambda: RuleSet(config_defaults(), "v1"))
+
+    index = SearchIndex(str(tmp_path / "index.json"))
+    index.refresh(client)
+    index.refresh(client)
+    assert applicants.calls[0] is None and applicants.calls[1] is not None
+    assert index.search("tier1") == set()
+
+    monkeypatch.setattr(reference_data, "get", lambda: RuleSet({"tier1_companies": ["Hooli"]}, "v2"))
+    index = SearchIndex.load(index.path)
+    index.refresh(client)
+    assert applicants.calls[2] is None
+    assert index.search("tier1") == {"rec1"}
+    assert SearchIndex.load(index.path).rules_version == "v2"
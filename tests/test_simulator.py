@@ -0,0 +1,74 @@
+import random
+import pytest
+from processors.simulator import RuleInputs, parse_values, threshold_masks, members, simulate
+
+def _bits(flags):
+    return sum(1 << i for i, flag in enumerate(flags) if flag)
+
+def test_parse_values():
+    assert parse_values("80,90,80") == [80.0, 90.0]
+    assert parse_values("60:80:10,100") == [60.0, 70.0, 80.0, 100.0]
+    assert parse_values("0.5:1.5:0.5") == [0.5, 1.0, 1.5]
+    with pytest.raises(ValueError):
+        parse_values("10:5:1")
+
+def test_threshold_masks():
+    values = [5, None, 10, 3]
+    assert threshold_masks(values, [4, 10], at_least=True) == {4: 0b0101, 10: 0b0100}
+    assert threshold_masks(values, [3, 5], at_least=False) == {3: 0b1000, 5: 0b1001}
+
+def test_members():
+    ids = [f"rec{i}" for i in range(20)]
+    bits = _bits(i in (1, 9, 17) for i in range(20))
+    assert members(bits, ids) == ["rec1", "rec9", "rec17"]
+    assert members(bits, ids, limit=2) == ["rec1", "rec9"]
+    assert members(0, ids) == []
+
+def test_simulate_matches_brute_force():
+    rng = random.Random(3)
+    n = 500
+    tier1 = [rng.random() < 0.2 for _ in range(n)]
+    location = [rng.random() < 0.7 for _ in range(n)]
+    compressed = [rng.random() < 0.9 for _ in range(n)]
+    inputs = RuleInputs(
+        [f"rec{i}" for i in range(n)],
+        [rng.uniform(0, 10) for _ in range(n)],
+        [rng.choice([None, 50, 80, 100, 120, 150]) for _ in range(n)],
+        [rng.choice([None, 10, 20, 30]) for _ in range(n)],
+        _bits(tier1), _bits(location), _bits(compressed),
+    )
+    grid = {"max_hourly_rate": [80.0, 100.0, 130.0], "min_availability": [10.0, 20.0], "min_experience_years": [2.0, 4.0, 6.0]}
+    baseline = {"max_hourly_rate": 100.0, "min_availability": 20.0, "min_experience_years": 4.0}
+
+    def brute(rate, hours, years):
+        return {
+            inputs.ids[i] for i in range(n)
+            if inputs.rates[i] is not None and inputs.rates[i] <= rate
+            and inputs.availability[i] is not None and inputs.availability[i] >= hours
+            and location[i] and compressed[i] and (inputs.years[i] >= years or tier1[i])
+        }
+
+    report = simulate(inputs, grid, baseline, max_ids=None)
+    base = brute(100.0, 20.0, 4.0)
+    assert report["baseline"]["eligible"] == len(base)
+    assert len(report["combinations"]) == 18
+    for row in report["combinations"]:
+        expected = brute(row["max_hourly_rate"], row["min_availability"], row["min_experience_years"])
+        assert row["eligible"] == len(expected)
+        assert set(row["gained_ids"]) == expected - base
+        assert set(row["lost_ids"]) == base - expected
+
+def test_extract_masks_missing_or_invalid_compressed_json():
+    from types import SimpleNamespace
+    shortlister = SimpleNamespace(_check_tier1_experience=lambda experience: (True, "Google"),
+                                  _evaluate_location=lambda personal: {"meets_criteria": True})
+    salary = [SimpleNamespace(preferred_rate=50, currency="USD", availability=40)]
+    ids = ["rec0", "rec1", "rec2", "rec3"]
+    inputs = RuleInputs.extract(ids, lambda record_id: ([], [], salary), shortlister,
+                                compressed_json=['{"personal": {}}', None, "", "{not json"])
+    assert inputs.compressed == 0b0001
+    baseline = {"max_hourly_rate": 100.0, "min_availability": 20.0, "min_experience_years": 4.0}
+    grid = {name: [value] for name, value in baseline.items()}
+    report = simulate(inputs, grid, baseline)
+    assert report["baseline"]["eligible"] == 1
+    assert RuleInputs.extract(ids, lambda record_id: ([], [], salary), shortlister).compressed == 0b1111
@@ -1,31 +1,263 @@
-from pyairtable import Api
+import re
+import time
+import threading
+from functools import cached_property, partialmethod
+from urllib.parse import urlparse
 from config import *
+from utils.helpers import formula_string
+from utils.profiling import tracer
+from utils.retry import airtable_policy, is_rate_limited
+from utils.ratelimit import airtable_limiter
+from utils.concurrency import airtable_concurrency
+from utils.metrics import metrics
+from utils.records import typed_records
+
+# RECORD_ID() terms per OR formula; keeps filterByFormula well inside URL length limits
+RECORD_ID_CHUNK = 50
+# Set while a thread is inside TracedApi._send
+_in_request = threading.local()
+
+def _build_api():
+    """Import pyairtable and build the traced Api (deferred until first use)"""
+    from pyairtable import Api
+
+    class TracedApi(Api):
+        """pyairtable Api that traces every HTTP request and retries it under airtable_policy"""
+        def request(self, method, url, *args, **kwargs):
+            if getattr(_in_request, "active", False):
+                # pyairtable re-enters request() to turn a GET with an over-long URL into
+                # a POST before anything is sent; the outer call already holds the
+                # rate-limit token and concurrency slot for that one HTTP request
+                return super().request(method, url, *args, **kwargs)
+            path = urlparse(url).path.rsplit("/", 1)[-1]
+            # Creates are not idempotent: only resend them when Airtable rejected
+            # the request outright (429), never after a 5xx or timeout.
+            creates = method.upper() == "POST" and path != "listRecords"
+            with tracer.span(f"airtable {method} {path}", cat="api", url=url):
+                return airtable_policy.call(
+                    self._send, method, url, *args,
+                    retry_on=is_rate_limited if creates else None, **kwargs
+                )
+
+        def _send(self, *args, **kwargs):
+            airtable_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with airtable_concurrency.slot():
+                    _in_request.active = True
+                    try:
+                        result = super().request(*args, **kwargs)
+                    finally:
+                        _in_request.active = False
+            except Exception:
+                metrics["airtable"].record(time.perf_counter() - started, error=True)
+                raise
+            metrics["airtable"].record(time.perf_counter() - started)
+            return result
+
+        # Api binds these to its own request(); rebind them to the override
+        get = partialmethod(request, "GET")
+        post = partialmethod(request, "POST")
+        patch = partialmethod(request, "PATCH")
+        delete = partialmethod(request, "DELETE")
+
+    # pyairtable's built-in urllib3 retries are disabled; airtable_policy owns retries
+    return TracedApi(require_setting("AIRTABLE_TOKEN"), retry_strategy=None)
 
 class AirtableClient:
+    """Airtable access; the API session and table handles are built on first use"""
+    # Set via utils.sharding.apply_shard to restrict applicant sweeps to one shard
+    shard = None
+    
     def __init__(self):
-        self.api = Api(AIRTABLE_TOKEN)
-        self.applicants = self.api.table(BASE_ID, T_APPLICANTS)
-        self.personal = self.api.table(BASE_ID, T_PERSONAL)
-        self.experience = self.api.table(BASE_ID, T_EXPERIENCE)
-        self.salary = self.api.table(BASE_ID, T_SALARY)
-        self.shortlisted = self.api.table(BASE_ID, T_SHORTLISTED)
+        # Last known fields per applicant, used to drop writes that change nothing
+        self._known = {}
+        self._stats_lock = threading.Lock()
+        self.write_stats = {"sent": 0, "elided": 0, "fields_elided": 0}
+    
+    @cached_property
+    def api(self):
+        return _build_api()
+
+    def _table(self, name):
+        return self.api.table(require_setting("BASE_ID"), name)
+
+    @cached_property
+    def applicants(self):
+        return self._table(T_APPLICANTS)
+
+    @cached_property
+    def personal(self):
+        return self._table(T_PERSONAL)
+
+    @cached_property
+    def experience(self):
+        return self._table(T_EXPERIENCE)
+
+    @cached_property
+    def salary(self):
+        return self._table(T_SALARY)
+
+    @cached_property
+    def shortlisted(self):
+        return self._table(T_SHORTLISTED)
     
     def get_all_applicants(self):
-        """Get all applicants"""
-        return self.applicants.all()
+        """Get all applicants (only this process's shard when sharded)"""
+        applicants = self.applicants.all()
+        if self.shard:
+            applicants = self.shard.filter(applicants)
+        for applicant in applicants:
+            self._remember(applicant)
+        return applicants
     
     def get_applicant(self, record_id):
         """Get single applicant by record ID"""
-        return self.applicants.get(record_id)
+        return self._remember(self.applicants.get(record_id))
+    
+    def recent_applicants(self, limit, fields, formula=None):
+        """Newest applicants first, fetching at most `limit` records and only `fields`.
+
+        Sorting server-side needs the CREATED_FIELD created-time field. Without
+        it every matching record is fetched and sorted on createdTime locally.
+        Requested fields the table does not have are dropped with a warning.
+        """
+        options = {"formula": formula} if formula else {}
+        fields = list(fields)
+        sort = [f"-{CREATED_FIELD}"]
+        while True:
+            try:
+                if sort:
+                    return self.applicants.all(
+                        sort=sort, max_records=limit, page_size=min(limit, 100), fields=fields, **options
+                    )
+                records = self.applicants.all(fields=fields, **options)
+                return sorted(records, key=lambda r: (r["createdTime"], r["id"]), reverse=True)[:limit]
+            except Exception as e:
+                missing = _unknown_field(e)
+                if missing == CREATED_FIELD and sort:
+                    print(f"⚠️  No {CREATED_FIELD!r} field on {T_APPLICANTS}; sorting locally (fetches every match)")
+                    sort = None
+                elif missing in fields:
+                    print(f"⚠️  No {missing!r} field on {T_APPLICANTS}; listing without it")
+                    fields.remove(missing)
+                else:
+                    raise
+
+    def cached_applicant(self, record_id):
+        """Applicant as last seen by this client, fetching it only if never seen"""
+        if record_id in self._known:
+            return {"id": record_id, "fields": dict(self._known[record_id])}
+        return self.get_applicant(record_id)
     
     def update_applicant(self, record_id, fields):
-        """Update applicant record"""
-        return self.applicants.update(record_id, fields)
+        """Update applicant record, sending only fields that differ from its last known state.
+        
+        Returns None when every field already holds the intended value and the
+        write was dropped.
+        """
+        known = self._known.get(record_id)
+        changed = fields
+        if known is not None:
+            changed = {k: v for k, v in fields.items() if not _same_value(known.get(k), v)}
+        
+        with self._stats_lock:
+            self.write_stats["fields_elided"] += len(fields) - len(changed)
+            if not changed:
+                self.write_stats["elided"] += 1
+            else:
+                self.write_stats["sent"] += 1
+        if not changed:
+            return None
+        return self._remember(self.applicants.update(record_id, changed))
+    
+    def _remember(self, record):
+        if record and "id" in record:
+            self._known[record["id"]] = dict(record.get("fields", {}))
+        return record
     
     def linked_records(self, table, applicant_rec_id):
-        """Get records linked to specific applicant"""
-        recs = table.all()
-        return [r for r in recs if applicant_rec_id in r.get("fields", {}).get(LINK_FIELD, [])]
+        """Get records linked to specific applicant (as typed records)"""
+        with tracer.span("linked_records", table=table.name, applicant=applicant_rec_id):
+            recs = table.all()
+        return typed_records(table.name, [r for r in recs if applicant_rec_id in r.get("fields", {}).get(LINK_FIELD, [])])
+    
+    def child_tables(self):
+        return (self.personal, self.experience, self.salary)
+    
+    def records_by_id(self, table, record_ids):
+        """Fetch exactly `record_ids` from `table` (typed), chunking the OR(RECORD_ID()=...) formula"""
+        record_ids = list(dict.fromkeys(record_ids))
+        records = []
+        for start in range(0, len(record_ids), RECORD_ID_CHUNK):
+            chunk = record_ids[start:start + RECORD_ID_CHUNK]
+            formula = "OR(" + ", ".join(f"RECORD_ID() = {formula_string(r)}" for r in chunk) + ")"
+            records.extend(table.all(formula=formula))
+        return typed_records(table.name, records)
+    
+    def linked_children(self, applicant):
+        """(personal, experience, salary) typed rows linked to an applicant record.
+        
+        The rows are fetched by ID from the applicant's reverse-link fields, one
+        request per table. Applicant records without any reverse-link field fall
+        back to scanning the child tables.
+        """
+        record_id = applicant["id"]
+        fields = applicant.get("fields", {})
+        if not any(field in fields for field in REVERSE_LINK_FIELDS.values()):
+            return tuple(self.linked_records(table, record_id) for table in self.child_tables())
+        
+        with tracer.span("linked_children", applicant=record_id):
+            return tuple(
+                self.records_by_id(table, fields.get(REVERSE_LINK_FIELDS[table.name], []))
+                for table in self.child_tables()
+            )
+    
+    def delete_records(self, table, record_ids):
+        """Delete records in batches of 10 per request (Airtable's limit)"""
+        record_ids = list(dict.fromkeys(record_ids))
+        if not record_ids:
+            return []
+        with tracer.span("delete_records", table=table.name, count=len(record_ids)):
+            deleted = table.batch_delete(record_ids)
+        if table.name == T_APPLICANTS:
+            for record_id in record_ids:
+                self._known.pop(record_id, None)
+        return deleted
+
+    def linked_index(self, table, link_field=LINK_FIELD, unlinked=False):
+        """Map applicant record ID -> linked typed records, from a single scan of `table`.
+
+        With `unlinked`, rows whose link field is empty are kept under the key None.
+        """
+        index = {}
+        with tracer.span("linked_index", table=table.name):
+            raws = table.all()
+            for raw, record in zip(raws, typed_records(table.name, raws)):
+                applicant_rec_ids = raw.get("fields", {}).get(link_field) or ([None] if unlinked else [])
+                for applicant_rec_id in applicant_rec_ids:
+                    index.setdefault(applicant_rec_id, []).append(record)
+        return index
+
+def _unknown_field(error):
+    """Field name from Airtable's 422 UNKNOWN_FIELD_NAME error, or None for any other error"""
+    response = getattr(error, "response", None)
+    if response is None or response.status_code != 422:
+        return None
+    try:
+        details = response.json().get("error", {})
+    except ValueError:
+        return None
+    if not isinstance(details, dict) or details.get("type") != "UNKNOWN_FIELD_NAME":
+        return None
+    match = re.search(r'"([^"]+)"', details.get("message", ""))
+    return match.group(1) if match else None
+
+def _same_value(current, intended):
+    """Compare field values the way Airtable stores them (empty values are omitted)"""
+    if current in (None, "", []) and intended in (None, "", []):
+        return True
+    return current == intended
 
 # Global client instance
 airtable = AirtableClient()
\ No newline at end of file
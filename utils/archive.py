@@ -0,0 +1,134 @@
+import os
+import gzip
+import json
+import datetime
+import threading
+from config import ARCHIVE_DIR, ARCHIVE_COMPRESSION
+
+INDEX_FILE = "index.jsonl"
+SEGMENT_EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+def _codec(name):
+    """(compress, decompress) functions for an archive codec"""
+    if name == "gzip":
+        return gzip.compress, gzip.decompress
+    if name == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("ARCHIVE_COMPRESSION=zstd needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unknown ARCHIVE_COMPRESSION {name!r}; expected gzip or zstd")
+
+def _codec_for(segment):
+    for name, extension in SEGMENT_EXTENSIONS.items():
+        if segment.endswith(extension):
+            return name
+    raise ValueError(f"Unknown archive segment type: {segment}")
+
+class ColdArchive:
+    """Local cold tier for applicants removed from the hot Airtable tables.
+
+    Entries are JSON lines in append-only segment files, one compressed frame
+    per entry, so a segment stays a valid .jsonl.gz/.jsonl.zst stream while
+    any single entry can be read by seeking to its offset. `index.jsonl` maps
+    record IDs to (segment, offset, length); its last line per ID wins, which
+    is how restores are recorded.
+    """
+    def __init__(self, directory=ARCHIVE_DIR, compression=ARCHIVE_COMPRESSION):
+        self.directory = directory
+        self.compression = compression
+        self.index = {}
+        self._segment = None
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                self.index[entry["id"]] = {**self.index.get(entry["id"], {}), **entry}
+
+    def __contains__(self, record_id):
+        entry = self.index.get(record_id)
+        return bool(entry) and not entry.get("restored_as")
+
+    def archived_ids(self):
+        return [record_id for record_id in self.index if record_id in self]
+
+    def _open_segment(self):
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            self._segment = f"applicants-{stamp}{SEGMENT_EXTENSIONS[self.compression]}"
+        return self._segment
+
+    def write(self, applicant, children):
+        """Append one applicant (with its child rows by table name) and index it.
+
+        Both the frame and its index line are fsynced before returning, so a
+        record is only deleted from Airtable once it is durably archived.
+        """
+        compress, _ = _codec(self.compression)
+        record_id = applicant["id"]
+        if record_id in self:
+            # The index keeps the last entry per ID, so a second write would hide the first
+            raise ValueError(f"{record_id} is already archived")
+        entry = {
+            "id": record_id,
+            "archived_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "applicant": applicant,
+            "children": children,
+        }
+        frame = compress((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        with self._lock:
+            segment = self._open_segment()
+            with open(os.path.join(self.directory, segment), "ab") as f:
+                offset = f.tell()
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            self._append_index({
+                "id": record_id, "segment": segment, "offset": offset, "length": len(frame),
+                "archived_at": entry["archived_at"], "restored_as": None,
+            })
+
+    def _append_index(self, entry):
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.index[entry["id"]] = {**self.index.get(entry["id"], {}), **entry}
+
+    def read(self, record_id):
+        """Archived entry {"id", "archived_at", "applicant", "children"} for a record ID"""
+        location = self.index.get(record_id)
+        if not location or "segment" not in location:
+            raise KeyError(f"{record_id} is not in the archive")
+        _, decompress = _codec(_codec_for(location["segment"]))
+        with open(os.path.join(self.directory, location["segment"]), "rb") as f:
+            f.seek(location["offset"])
+            frame = f.read(location["length"])
+        return json.loads(decompress(frame))
+
+    def mark_restoring(self, record_id, new_record_id):
+        """Record the applicant a restore has created, so an interrupted restore resumes into it"""
+        with self._lock:
+            self._append_index({"id": record_id, "restoring_as": new_record_id})
+
+    def mark_restored(self, record_id, new_record_id):
+        """Record that an archived applicant is live again (under its new record ID)"""
+        with self._lock:
+            self._append_index({
+                "id": record_id, "restored_as": new_record_id,
+                "restored_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            })
@@ -0,0 +1,99 @@
+import time
+import threading
+from contextlib import contextmanager
+from config import (
+    AIRTABLE_MAX_CONCURRENCY, LLM_WORKERS, AIMD_DECREASE_FACTOR, AIMD_LATENCY_SPIKE_FACTOR,
+)
+from utils.profiling import tracer
+from utils.retry import is_transient
+from utils.metrics import metrics
+
+# Smoothing of the latency baseline that spikes are measured against
+LATENCY_EWMA_ALPHA = 0.2
+# Slowdowns smaller than this are jitter, not congestion, however fast the baseline
+MIN_SPIKE_SECONDS = 0.05
+
+class AIMDController:
+    """Adaptive in-flight request window (additive increase, multiplicative decrease).
+
+    Every healthy response grows the window by 1/window, i.e. by about one
+    slot per window's worth of round trips. A 429/5xx/timeout, or a latency
+    above `spike_factor` times the smoothed baseline, multiplies it by
+    `decrease` - at most once per baseline latency, so a burst of failures
+    from requests that were already in flight counts as one congestion signal.
+    """
+    def __init__(self, name, max_window, initial=1.0, min_window=1.0,
+                 decrease=AIMD_DECREASE_FACTOR, spike_factor=AIMD_LATENCY_SPIKE_FACTOR):
+        self.name = name
+        self.max_window = float(max(min_window, max_window))
+        self.min_window = float(min_window)
+        self.window = min(max(initial, self.min_window), self.max_window)
+        self.peak_window = self.window
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.baseline = None
+        self.in_flight = 0
+        self.cuts = 0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    def set_max_window(self, max_window):
+        with self._cond:
+            self.max_window = float(max(self.min_window, max_window))
+            self.window = min(self.window, self.max_window)
+
+    def acquire(self):
+        """Block until a slot within the current window is free"""
+        with self._cond:
+            if self.in_flight >= int(self.window):
+                with tracer.span(f"{self.name} concurrency wait", cat="ratelimit", window=int(self.window)):
+                    while self.in_flight >= int(self.window):
+                        self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency, error=None):
+        """Free a slot and adapt the window to how the request went"""
+        with self._cond:
+            self.in_flight -= 1
+            congested = error is not None and is_transient(error)
+            spiked = (
+                error is None and self.baseline is not None
+                and latency > self.spike_factor * self.baseline
+                and latency - self.baseline > MIN_SPIKE_SECONDS
+            )
+            if congested or spiked:
+                now = time.monotonic()
+                if now - self._last_cut >= (self.baseline or 0.0):
+                    self.window = max(self.min_window, self.window * self.decrease)
+                    self.cuts += 1
+                    self._last_cut = now
+            elif error is None:
+                self.window = min(self.max_window, self.window + 1.0 / self.window)
+                self.peak_window = max(self.peak_window, self.window)
+
+            if error is None:
+                self.baseline = latency if self.baseline is None else (
+                    (1 - LATENCY_EWMA_ALPHA) * self.baseline + LATENCY_EWMA_ALPHA * latency
+                )
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot around a request"""
+        self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.release(time.perf_counter() - started, error=e)
+            raise
+        self.release(time.perf_counter() - started)
+
+    def summary(self):
+        return {"window": round(self.window, 2), "peak_window": round(self.peak_window, 2), "window_cuts": self.cuts}
+
+# One controller per backend; LLM_WORKERS threads bound the Groq window
+airtable_concurrency = AIMDController("airtable", AIRTABLE_MAX_CONCURRENCY)
+groq_concurrency = AIMDController("groq", LLM_WORKERS)
+metrics["airtable"].controller = airtable_concurrency
+metrics["groq"].controller = groq_concurrency
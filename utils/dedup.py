@@ -0,0 +1,168 @@
+import re
+import hashlib
+import threading
+from urllib.parse import urlparse
+from config import DEDUP_SIMHASH_DISTANCE
+
+SIMHASH_BITS = 64
+
+def normalise_email(email):
+    """Lower-cased address with any +tag removed from the local part"""
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    local, domain = email.rsplit("@", 1)
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+def normalise_linkedin(url):
+    """Profile slug from a LinkedIn URL (scheme, www, query and trailing slash ignored)"""
+    url = (url or "").strip().lower()
+    if not url:
+        return None
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    path = parsed.path.rstrip("/")
+    return path.rsplit("/", 1)[-1] or None
+
+def experience_tokens(experience):
+    """Character 4-gram shingles of each role (company, title, technologies, start month).
+
+    Shingles rather than words give short sections enough features for their
+    SimHash to move only a few bits on a small edit.
+    """
+    tokens = []
+    for role in experience:
+        text = " ".join(str(role.get(key) or "").lower() for key in ("company", "title", "technologies"))
+        text = re.sub(r"\s+", " ", f"{text} {str(role.get('start') or '')[:7]}").strip()
+        tokens += [text[i:i + 4] for i in range(max(1, len(text) - 3))]
+    return tokens
+
+def simhash(tokens, bits=SIMHASH_BITS):
+    """SimHash signature of a token list; similar lists differ in few bits"""
+    weights = [0] * bits
+    for token in tokens:
+        h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if (h >> i) & 1 else -1
+    return sum(1 << i for i in range(bits) if weights[i] > 0)
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def _conflicts(identity, other):
+    """True when both profiles have the same kind of identity key with different values"""
+    return any(other.get(kind) not in (None, value) for kind, value in identity.items())
+
+def flatten_profile(json_data):
+    """Compressed JSON as {path: value}, with roles in start order and identity keys normalised"""
+    flat = {}
+    personal = dict(json_data.get("personal", {}))
+    if "email" in personal:
+        personal["email"] = normalise_email(personal["email"])
+    if "linkedin" in personal:
+        personal["linkedin"] = normalise_linkedin(personal["linkedin"])
+    for key, value in personal.items():
+        flat[f"personal.{key}"] = value
+    roles = sorted(json_data.get("experience", []), key=lambda role: str(role.get("start") or ""))
+    for n, role in enumerate(roles):
+        for key, value in role.items():
+            flat[f"experience[{n}].{key}"] = value
+    for key, value in json_data.get("salary", {}).items():
+        flat[f"salary.{key}"] = value
+    return flat
+
+def profile_diff(before, after):
+    """Fields that differ between two Compressed JSON payloads"""
+    old, new = flatten_profile(before), flatten_profile(after)
+    return [
+        {"field": path, "before": old.get(path), "after": new.get(path)}
+        for path in sorted(set(old) | set(new))
+        if old.get(path) != new.get(path)
+    ]
+
+class DedupIndex:
+    """In-memory index of evaluated applicants for duplicate lookups.
+
+    Exact keys are the normalised email and LinkedIn slug. Near matches use a
+    SimHash of the experience section, split into `max_distance + 1` bands so
+    that (by pigeonhole) any signature within `max_distance` bits shares at
+    least one band exactly and is found without a full scan. A near match is
+    rejected when both profiles carry an email or LinkedIn and they differ.
+    """
+    def __init__(self, max_distance=DEDUP_SIMHASH_DISTANCE):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._entries = {}
+        self._exact = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _identity(self, json_data):
+        """Normalised identity keys present in the profile, as {kind: value}"""
+        personal = json_data.get("personal", {})
+        identity = {
+            "email": normalise_email(personal.get("email")),
+            "linkedin": normalise_linkedin(personal.get("linkedin")),
+        }
+        return {kind: value for kind, value in identity.items() if value}
+
+    def _keys(self, json_data):
+        return [f"{kind}:{value}" for kind, value in self._identity(json_data).items()]
+
+    def _bands(self, signature):
+        mask = (1 << self.band_bits) - 1
+        return [(n, (signature >> (n * self.band_bits)) & mask) for n in range(self.bands)]
+
+    def add(self, record_id, json_data, evaluation):
+        """Index an applicant whose `evaluation` can be reused by its duplicates"""
+        experience = json_data.get("experience", [])
+        signature = simhash(experience_tokens(experience)) if experience else None
+        with self._lock:
+            self._entries[record_id] = {"json": json_data, "evaluation": evaluation, "signature": signature,
+                                        "identity": self._identity(json_data)}
+            for key in self._keys(json_data):
+                self._exact.setdefault(key, []).append(record_id)
+            if signature is not None:
+                for band in self._bands(signature):
+                    self._buckets.setdefault(band, []).append(record_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def find(self, record_id, json_data):
+        """Best earlier applicant matching `json_data`, or None.
+
+        Returns {"record_id", "match": "duplicate"|"near", "via", "diff",
+        "evaluation"}; "duplicate" means the profiles are identical once
+        normalised, so the evaluation can be copied as is.
+        """
+        experience = json_data.get("experience", [])
+        signature = simhash(experience_tokens(experience)) if experience else None
+        identity = self._identity(json_data)
+        candidates = {}
+        with self._lock:
+            for key in self._keys(json_data):
+                for other in self._exact.get(key, []):
+                    candidates.setdefault(other, key.split(":", 1)[0])
+            if signature is not None:
+                for band in self._bands(signature):
+                    for other in self._buckets.get(band, []):
+                        entry = self._entries[other]
+                        distance = hamming(signature, entry["signature"])
+                        # Similar experience is not enough when an email or LinkedIn says it's someone else
+                        if distance <= self.max_distance and not _conflicts(identity, entry["identity"]):
+                            candidates.setdefault(other, f"simhash:{distance}")
+            entries = {other: self._entries[other] for other in candidates if other != record_id}
+
+        best = None
+        for other, entry in entries.items():
+            diff = profile_diff(entry["json"], json_data)
+            if best is None or len(diff) < len(best["diff"]):
+                best = {
+                    "record_id": other,
+                    "match": "near" if diff else "duplicate",
+                    "via": candidates[other],
+                    "diff": diff,
+                    "evaluation": entry["evaluation"],
+                }
+        return best
@@ -1,54 +1,43 @@
-import time
 import datetime
-from functools import wraps
-from dateutil import parser as dtparser
-
-def retry_with_backoff(max_retries=3, backoff_factor=2):
-    """Decorator for retry logic with exponential backoff"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise e
-                    wait_time = backoff_factor ** attempt
-                    print(f"  ⚠️  Attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-            return None
-        return wrapper
-    return decorator
+from utils.profiling import tracer
 
 def safe_get_field(record, field_name, default=None):
     """Safely get field value from Airtable record"""
     return record.get("fields", {}).get(field_name, default)
 
+def formula_string(value):
+    """Quote a value as an Airtable formula string literal"""
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
 def parse_date_safe(date_str):
     """Safely parse date string"""
     if not date_str:
         return None
+    # Airtable date fields are ISO (YYYY-MM-DD); dateutil only for free-form text
+    try:
+        return datetime.date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        pass
+    from dateutil import parser as dtparser
     try:
         return dtparser.parse(date_str).date()
     except Exception:
         return None
 
 def calculate_experience_years(exp_records):
-    """Calculate total years of experience"""
+    """Calculate total years of experience from WorkExperience records"""
     total_days = 0
     today = datetime.date.today()
     
-    for record in exp_records:
-        start_str = safe_get_field(record, "Start")
-        end_str = safe_get_field(record, "End")
-        
-        start_date = parse_date_safe(start_str)
-        if not start_date:
-            continue
-            
-        end_date = parse_date_safe(end_str) if end_str else today
-        if end_date >= start_date:
-            total_days += (end_date - start_date).days
+    with tracer.span("parse_dates", roles=len(exp_records)):
+        for record in exp_records:
+            # Dates are parsed once per record and cached on it
+            start_date, end_date = record.dates()
+            if not start_date:
+                continue
+                
+            end_date = end_date or today
+            if end_date >= start_date:
+                total_days += (end_date - start_date).days
     
     return total_days / 365.25
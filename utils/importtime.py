@@ -0,0 +1,61 @@
+"""Import-time budget check for the CLI entry points.
+
+Run with `python -m utils.importtime`; exits non-zero when an entry point
+imports slower than its budget or eagerly pulls in a heavy client library.
+"""
+import sys
+import subprocess
+
+# Cumulative import time allowed per entry point, in milliseconds
+IMPORT_BUDGETS_MS = {
+    "main": 60,
+    "manual_tools": 60,
+}
+
+# Libraries that must only be imported once a command actually needs them
+LAZY_MODULES = ("pyairtable", "groq", "dateutil")
+
+def measure_import(module):
+    """Import `module` in a fresh interpreter; return (cumulative ms, imported names)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        imported.add(name)
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, imported
+
+def check_import_budgets(budgets=None):
+    """Return a list of budget violations (empty when everything is within budget)"""
+    failures = []
+    for module, budget_ms in (budgets or IMPORT_BUDGETS_MS).items():
+        elapsed_ms, imported = measure_import(module)
+        print(f"  • {module}: {elapsed_ms:.1f} ms (budget {budget_ms} ms)")
+        if elapsed_ms > budget_ms:
+            failures.append(f"{module} took {elapsed_ms:.1f} ms > {budget_ms} ms")
+        eager = sorted(m for m in LAZY_MODULES if m in imported)
+        if eager:
+            failures.append(f"{module} eagerly imports {', '.join(eager)}")
+    return failures
+
+def main():
+    print("⏱️  Import-time budgets")
+    failures = check_import_budgets()
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("  ✅ All entry points within budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+from config import JOB_QUEUE_PATH, LLM_LEASE_SECONDS, LLM_MAX_ATTEMPTS
+
+# Lower priority values are leased first
+PRIORITY_SHORTLISTED = 0
+PRIORITY_DEFAULT = 1
+
+class JobQueue:
+    """Durable SQLite-backed queue of LLM evaluation jobs, one row per applicant.
+
+    Jobs are leased with a timeout rather than popped, so a job held by a
+    crashed worker becomes available again once its lease expires.
+    """
+    def __init__(self, path=JOB_QUEUE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                record_id TEXT PRIMARY KEY,
+                priority INTEGER NOT NULL,
+                created REAL NOT NULL,
+                input_hash TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_until REAL,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_order ON jobs (status, priority, created DESC)")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def enqueue(self, record_id, priority, created, input_hash, needs_work=True):
+        """Add or refresh a job; returns False when an identical job is already done.
+
+        A finished job is re-queued only when its input changed or `needs_work`
+        says the stored result is missing.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT status, input_hash FROM jobs WHERE record_id = ?", (record_id,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO jobs (record_id, priority, created, input_hash) VALUES (?, ?, ?, ?)",
+                        (record_id, priority, created, input_hash),
+                    )
+                    queued = True
+                elif row[0] == "done" and row[1] == input_hash and not needs_work:
+                    queued = False
+                elif row[0] == "leased":
+                    # Leave the lease alone; just pick up a new priority
+                    self._conn.execute("UPDATE jobs SET priority = ? WHERE record_id = ?", (priority, record_id))
+                    queued = True
+                else:
+                    self._conn.execute(
+                        """UPDATE jobs SET priority = ?, created = ?, input_hash = ?, status = 'pending',
+                           attempts = CASE WHEN status = 'pending' THEN attempts ELSE 0 END,
+                           lease_owner = NULL, lease_until = NULL
+                           WHERE record_id = ?""",
+                        (priority, created, input_hash, record_id),
+                    )
+                    queued = True
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return queued
+
+    def lease(self, owner, lease_seconds=LLM_LEASE_SECONDS):
+        """Atomically lease the highest-priority available job; returns its record ID or None"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """SELECT record_id FROM jobs
+                       WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                       ORDER BY priority, created DESC LIMIT 1""",
+                    (now,),
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        """UPDATE jobs SET status = 'leased', lease_owner = ?, lease_until = ?,
+                           attempts = attempts + 1 WHERE record_id = ?""",
+                        (owner, now + lease_seconds, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0] if row else None
+
+    def release_orphaned_leases(self):
+        """Re-queue jobs leased by processes on this host that are no longer running.
+
+        Lease owners are "host:pid:worker"; leases held by other hosts are left
+        to expire normally.
+        """
+        host = socket.gethostname()
+        released = 0
+        rows = self._execute("SELECT record_id, lease_owner FROM jobs WHERE status = 'leased'").fetchall()
+        for record_id, owner in rows:
+            owner_host, _, rest = (owner or "").partition(":")
+            pid = rest.partition(":")[0]
+            if owner_host != host or not pid.isdigit() or _pid_alive(int(pid)):
+                continue
+            self._execute(
+                "UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_until = NULL WHERE record_id = ? AND lease_owner = ?",
+                (record_id, owner),
+            )
+            released += 1
+        return released
+
+    def remove(self, record_ids):
+        """Drop the jobs of applicants that no longer exist; returns how many were removed"""
+        record_ids = list(record_ids)
+        removed = 0
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(record_ids), 500):
+            chunk = record_ids[start:start + 500]
+            removed += self._execute(
+                f"DELETE FROM jobs WHERE record_id IN ({', '.join('?' * len(chunk))})", chunk
+            ).rowcount
+        return removed
+
+    def complete(self, record_id):
+        self._execute(
+            "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_until = NULL, last_error = NULL WHERE record_id = ?",
+            (record_id,),
+        )
+
+    def fail(self, record_id, error, max_attempts=LLM_MAX_ATTEMPTS):
+        """Return a failed job to the queue, or park it as 'failed' after max_attempts.
+
+        Returns the job's new status.
+        """
+        self._execute(
+            """UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+               lease_owner = NULL, lease_until = NULL, last_error = ? WHERE record_id = ?""",
+            (max_attempts, str(error), record_id),
+        )
+        row = self._execute("SELECT status FROM jobs WHERE record_id = ?", (record_id,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self):
+        """Number of jobs per status"""
+        return dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        self._conn.close()
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return False  # a lease we hold from before this run started can't still be in use
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
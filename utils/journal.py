@@ -0,0 +1,97 @@
+import os
+import json
+import uuid
+import hashlib
+import datetime
+import threading
+from config import JOURNAL_PATH
+
+def hash_inputs(value):
+    """Stable hash of any JSON-serialisable stage input"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+class RunJournal:
+    """Append-only JSON Lines journal of completed (applicant, stage, input hash) steps.
+
+    Every line is flushed and fsynced before the step is reported as done, so
+    after a crash the journal holds exactly the steps that finished. A new run
+    truncates the file; `resume=True` reloads the interrupted run and continues it.
+    """
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.run_id = None
+        self.completed = set()
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._file = None
+
+    def start(self, resume=False):
+        """Open the journal for a new run, or continue the last unfinished one"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            run_id, completed, finished = self._load()
+            if run_id and not finished:
+                self.run_id = run_id
+                self.completed = completed
+                self.resumed = True
+                self._file = open(self.path, "a", encoding="utf-8")
+                print(f"♻️  Resuming run {run_id}: {len(completed)} completed steps will be skipped")
+                return self
+            print("♻️  No interrupted run to resume; starting a new run")
+
+        self.run_id = uuid.uuid4().hex[:12]
+        self.completed = set()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._append({"event": "run_start", "run": self.run_id})
+        return self
+
+    def _load(self):
+        run_id, completed, finished = None, set(), False
+        if not os.path.exists(self.path):
+            return run_id, completed, finished
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                event = entry.get("event")
+                if event == "run_start":
+                    run_id, completed, finished = entry["run"], set(), False
+                elif event == "step":
+                    completed.add((entry["applicant"], entry["stage"], entry["input_hash"]))
+                elif event == "run_end":
+                    finished = True
+        return run_id, completed, finished
+
+    def _append(self, entry):
+        entry["ts"] = datetime.datetime.now().isoformat()
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def is_done(self, applicant_id, stage, input_hash):
+        """True when this exact step already completed in the current run"""
+        return (applicant_id, stage, input_hash) in self.completed
+
+    def record(self, applicant_id, stage, input_hash, **details):
+        """Durably record a completed step"""
+        self._append({
+            "event": "step", "run": self.run_id, "applicant": applicant_id,
+            "stage": stage, "input_hash": input_hash, **details,
+        })
+        with self._lock:
+            self.completed.add((applicant_id, stage, input_hash))
+
+    def finish(self):
+        """Mark the run complete so a later --resume starts fresh"""
+        if self._file is None:
+            return
+        self._append({"event": "run_end", "run": self.run_id})
+        self._file.close()
+        self._file = None
@@ -0,0 +1,146 @@
+import re
+import json
+
+# Fields of an LLM evaluation; summary and score can't be made up locally
+REQUIRED_FIELDS = ("summary", "score")
+LIST_FIELDS = ("issues", "follow_ups")
+MAX_FOLLOW_UPS = 3
+SCORE_RANGE = (1, 10)
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+def extract_json(text):
+    """The JSON object inside a reply: fenced block contents, or from the first `{`"""
+    text = (text or "").strip()
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    start = text.find("{")
+    return text[start:] if start >= 0 else text
+
+def _scan(text):
+    """Open brackets and string state at the end of `text`, plus the offsets of top-level-safe commas"""
+    stack = []
+    in_string = escaped = False
+    commas = []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+        elif ch == ",":
+            commas.append(i)
+    return stack, in_string, escaped, commas
+
+def close_truncated(text):
+    """Parse JSON cut off mid-output by closing the open string and brackets.
+
+    If the cut fell inside a key or before a value, the trailing member is
+    dropped by retrying from the last comma back. Returns None when no
+    prefix can be closed into valid JSON.
+    """
+    stack, in_string, escaped, commas = _scan(text)
+    if not stack and not in_string:
+        return None
+    tail = text[:-1] if escaped else text
+    candidates = [tail + ('"' if in_string else "")] + [text[:i] for i in reversed(commas)]
+    for candidate in candidates:
+        stack, in_string, _, _ = _scan(candidate)
+        if in_string:
+            continue
+        try:
+            return json.loads(candidate.rstrip().rstrip(",:") + "".join(reversed(stack)), strict=False)
+        except ValueError:
+            continue
+    return None
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.splitlines()
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return [_BULLET.sub("", str(item)).strip() for item in value if str(item).strip()]
+
+def _as_score(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = value
+    else:
+        # "7", "7.5", "7/10", "Score: 7"
+        found = _NUMBER.search(str(value or ""))
+        if not found:
+            return None
+        number = float(found.group())
+    low, high = SCORE_RANGE
+    return min(high, max(low, int(round(number))))
+
+def coerce_evaluation(data):
+    """Evaluation fields coerced to the output schema; returns (evaluation, missing required fields)"""
+    evaluation = {}
+    summary = data.get("summary")
+    if isinstance(summary, list):
+        summary = " ".join(str(part) for part in summary)
+    if summary is not None and str(summary).strip():
+        evaluation["summary"] = str(summary).strip()
+    score = _as_score(data.get("score"))
+    if score is not None:
+        evaluation["score"] = score
+    for field in LIST_FIELDS:
+        evaluation[field] = _as_list(data.get(field))
+    evaluation["follow_ups"] = evaluation["follow_ups"][:MAX_FOLLOW_UPS]
+    missing = [field for field in REQUIRED_FIELDS if field not in evaluation]
+    return evaluation, missing
+
+def load_json(text):
+    """Parse a reply, stripping fences and closing truncation if needed; returns (data, repaired)"""
+    raw = (text or "").strip()
+    try:
+        return json.loads(raw, strict=False), False
+    except ValueError:
+        candidate = extract_json(raw)
+        try:
+            return json.loads(candidate, strict=False), True
+        except ValueError:
+            return close_truncated(candidate), True
+
+def parse_evaluation(text):
+    """Validate (and locally repair) an LLM reply against the evaluation schema.
+
+    Returns (evaluation, missing, repaired): `missing` lists the required
+    fields that couldn't be recovered, `repaired` says whether the reply
+    needed fencing stripped, truncation closed or types coerced.
+    """
+    data, repaired = load_json(text)
+    if not isinstance(data, dict):
+        return {field: [] for field in LIST_FIELDS}, list(REQUIRED_FIELDS), True
+
+    evaluation, missing = coerce_evaluation(data)
+    if not repaired:
+        repaired = any(data.get(field) != evaluation.get(field) for field in (*REQUIRED_FIELDS, *LIST_FIELDS))
+    return evaluation, missing, repaired
+
+def build_missing_fields_prompt(json_data, partial, missing):
+    """Minimal re-ask for the fields a reply was missing, with what was recovered as context"""
+    schema = {"summary": "string (<= 75 words)", "score": "integer (1-10)"}
+    prompt = {
+        "task": "Recruiting analyst: complete a candidate evaluation. Return ONLY the missing fields.",
+        "rules": ["Output ONLY valid JSON matching output_schema."],
+        "output_schema": {field: schema[field] for field in missing},
+        "partial_evaluation": {k: v for k, v in partial.items() if v},
+        "input": json_data,
+    }
+    return json.dumps(prompt, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,257 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import cached_property
+from types import SimpleNamespace
+from config import *
+from utils.retry import RetryPolicy, groq_policy
+from utils.ratelimit import TokenBucket, groq_limiter
+from utils.concurrency import AIMDController, groq_concurrency
+from utils.metrics import metrics, BackendMetrics
+from utils.profiling import tracer
+
+OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+class ProviderHTTPError(Exception):
+    """Non-2xx response from an OpenAI-compatible endpoint (carries status_code/response for utils.retry)"""
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__(f"HTTP {response.status_code}: {response.text[:200]}")
+
+def _namespace(value):
+    """JSON payload as nested attribute objects, shaped like the SDK response types"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_namespace(v) for v in value]
+    return value
+
+class LLMProvider:
+    """One chat-completions backend with its own rate limit, AIMD window, retry policy and metrics"""
+    kind = None
+
+    def __init__(self, name, model, policy=None, limiter=None, concurrency=None, requests_per_minute=None):
+        self.name = name
+        self.model = model
+        self.policy = policy or RetryPolicy(name)
+        self.limiter = limiter or TokenBucket(name, (requests_per_minute or GROQ_REQUESTS_PER_MINUTE) / 60.0)
+        self.concurrency = concurrency or AIMDController(name, LLM_WORKERS)
+        self.metrics = metrics.setdefault(name, BackendMetrics(name))
+        self.metrics.controller = self.concurrency
+
+    def __repr__(self):
+        return f"{self.kind}:{self.model}"
+
+    def _send(self, **kwargs):
+        raise NotImplementedError
+
+    def _attempt(self, **kwargs):
+        self.limiter.acquire()
+        started = time.perf_counter()
+        try:
+            with self.concurrency.slot():
+                response = self._send(model=self.model, **kwargs)
+        except Exception:
+            self.metrics.record(time.perf_counter() - started, error=True)
+            raise
+        usage = getattr(response, "usage", None)
+        self.metrics.record(
+            time.perf_counter() - started,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            prompt_chars=sum(len(m["content"]) for m in kwargs.get("messages", [])),
+        )
+        return response
+
+    def complete(self, **kwargs):
+        """One chat completion, retried under this provider's policy"""
+        with tracer.span(f"{self.name} chat.completions {self.model}", cat="api"):
+            return self.policy.call(self._attempt, **kwargs)
+
+class GroqProvider(LLMProvider):
+    kind = "groq"
+
+    @cached_property
+    def client(self):
+        """Groq client, imported and built on first LLM call"""
+        from groq import Groq
+        # SDK retries are disabled; the provider's policy retries the completion request only
+        return Groq(api_key=require_setting("GROQ_API_KEY"), max_retries=0, timeout=LLM_TIMEOUT_SECONDS)
+
+    def _send(self, **kwargs):
+        return self.client.chat.completions.create(**kwargs)
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any endpoint serving POST {base_url}/chat/completions (OpenAI, vLLM, llama.cpp, a local mock)"""
+    kind = "openai"
+
+    def __init__(self, name, model, base_url=OPENAI_DEFAULT_BASE_URL, api_key=None, **kwargs):
+        super().__init__(name, model, requests_per_minute=OPENAI_COMPAT_REQUESTS_PER_MINUTE, **kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+
+    @cached_property
+    def client(self):
+        import httpx
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return httpx.Client(base_url=self.base_url, headers=headers, timeout=LLM_TIMEOUT_SECONDS)
+
+    def _send(self, **kwargs):
+        response = self.client.post("/chat/completions", json=kwargs)
+        if response.status_code >= 400:
+            raise ProviderHTTPError(response)
+        return _namespace(response.json())
+
+def parse_provider_specs(specs=LLM_PROVIDERS):
+    """Parse "kind:model[@base_url]" entries (comma-separated) into provider settings"""
+    parsed = []
+    for spec in filter(None, (s.strip() for s in specs.split(","))):
+        kind, _, rest = spec.partition(":")
+        model, _, base_url = rest.partition("@")
+        if kind not in ("groq", "openai") or not model:
+            raise ValueError(f"Bad LLM provider {spec!r}; expected groq:<model> or openai:<model>[@<base_url>]")
+        parsed.append({"kind": kind, "model": model, "base_url": base_url or None})
+    return parsed
+
+def build_providers(specs=LLM_PROVIDERS):
+    """Providers in priority order; the first Groq entry shares the process-wide groq limiter/policy/window"""
+    providers = []
+    for spec in parse_provider_specs(specs):
+        if spec["kind"] == "groq":
+            if not any(p.name == "groq" for p in providers):
+                providers.append(GroqProvider(
+                    "groq", spec["model"], policy=groq_policy, limiter=groq_limiter, concurrency=groq_concurrency
+                ))
+            else:
+                providers.append(GroqProvider(f"groq:{spec['model']}", spec["model"]))
+        else:
+            providers.append(OpenAICompatibleProvider(
+                f"openai:{spec['model']}", spec["model"],
+                base_url=spec["base_url"] or OPENAI_DEFAULT_BASE_URL, api_key=OPENAI_COMPAT_API_KEY,
+            ))
+    return providers
+
+def _tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+class ProviderChain:
+    """Ordered providers with failover and tail-latency hedging.
+
+    The primary gets every request. If it hasn't answered within its p95
+    latency (LLM_HEDGE_INITIAL_DELAY until LLM_HEDGE_MIN_SAMPLES calls have
+    been seen), the same request goes to the next provider as well, and the
+    first valid response wins. Requests whose answer is discarded still
+    complete in the background; their tokens are counted as extra spend.
+    """
+    def __init__(self, providers, hedging=LLM_HEDGING):
+        self.providers = providers
+        self.hedging = hedging and len(providers) > 1
+        self.stats = {"hedged": 0, "hedge_wins": 0, "failovers": 0, "extra_tokens": 0, "extra_cost": 0.0}
+        self._lock = threading.Lock()
+        # Threads start on demand, so an unhedged chain never spawns any
+        self._pool = ThreadPoolExecutor(max_workers=max(2, LLM_WORKERS * len(providers)),
+                                        thread_name_prefix="llm-hedge")
+
+    @property
+    def primary(self):
+        return self.providers[0]
+
+    def hedge_delay(self):
+        """Seconds to wait on the primary before hedging"""
+        p95 = self.primary.metrics.percentile(0.95, min_samples=LLM_HEDGE_MIN_SAMPLES)
+        return LLM_HEDGE_INITIAL_DELAY if p95 is None else p95
+
+    def complete(self, validate=None, **kwargs):
+        """First valid completion across the chain; returns (provider, response).
+
+        A response failing `validate` is only returned when no provider gave a
+        valid one; when every provider errors the last error is raised.
+        """
+        if not self.hedging:
+            return self._failover(validate, **kwargs)
+
+        pending = {}
+        launched = 0
+        fallback = None
+        last_error = None
+
+        def launch():
+            nonlocal launched
+            provider = self.providers[launched]
+            pending[self._pool.submit(provider.complete, **kwargs)] = provider
+            launched += 1
+
+        launch()
+        hedge_at = time.monotonic() + self.hedge_delay()
+        while pending:
+            timeout = None
+            if launched < len(self.providers):
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                with self._lock:
+                    self.stats["hedged"] += 1
+                launch()
+                hedge_at = time.monotonic() + self.hedge_delay()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    response = None
+                if response is not None and (validate is None or validate(response)):
+                    if self.primary in pending.values():
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    for loser in pending:
+                        loser.add_done_callback(self._count_extra)
+                    return provider, response
+                if response is not None and fallback is None:
+                    fallback = (provider, response)
+                else:
+                    self._count_extra(future)
+            if not pending and launched < len(self.providers):
+                # Everything in flight failed: fail over without waiting for the hedge timer
+                with self._lock:
+                    self.stats["failovers"] += 1
+                launch()
+                hedge_at = time.monotonic() + self.hedge_delay()
+
+        if fallback:
+            return fallback
+        raise last_error
+
+    def _failover(self, validate, **kwargs):
+        fallback = None
+        last_error = None
+        for n, provider in enumerate(self.providers):
+            if n:
+                with self._lock:
+                    self.stats["failovers"] += 1
+            try:
+                response = provider.complete(**kwargs)
+            except Exception as e:
+                last_error = e
+                continue
+            if validate is None or validate(response):
+                return provider, response
+            fallback = fallback or (provider, response)
+        if fallback:
+            return fallback
+        raise last_error
+
+    def _count_extra(self, future):
+        """Account the tokens of a completion whose answer was not used"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        prompt_tokens, completion_tokens = _tokens(future.result())
+        with self._lock:
+            self.stats["extra_tokens"] += prompt_tokens + completion_tokens
+            self.stats["extra_cost"] += (
+                prompt_tokens * LLM_INPUT_COST_PER_MTOK + completion_tokens * LLM_OUTPUT_COST_PER_MTOK
+            ) / 1_000_000
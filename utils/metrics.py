@@ -0,0 +1,104 @@
+import os
+import json
+import threading
+from collections import deque
+from config import METRICS_PATH
+
+# Weight of the current run when folding its averages into the saved profile
+EWMA_WEIGHT = 0.3
+# Recent successful-call latencies kept for percentiles
+LATENCY_SAMPLES = 200
+
+class BackendMetrics:
+    """Running latency / error / token counters for one backend"""
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.prompt_chars = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        # AIMD controller whose window is reported alongside (see utils.concurrency)
+        self.controller = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, error=False, prompt_tokens=0, completion_tokens=0, prompt_chars=0):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.total_latency += latency
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.prompt_chars += prompt_chars
+            if not error:
+                self.latencies.append(latency)
+
+    def percentile(self, q, min_samples=1):
+        """Latency at quantile `q` over recent successful calls (None below `min_samples`)"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def summary(self):
+        """Per-call averages for this run (None when nothing was recorded)"""
+        if not self.calls:
+            return None
+        ok_calls = max(1, self.calls - self.errors)
+        result = {
+            "calls": self.calls,
+            "error_rate": self.errors / self.calls,
+            "avg_latency": self.total_latency / self.calls,
+        }
+        if self.latencies:
+            result["p95_latency"] = self.percentile(0.95)
+        if self.prompt_tokens:
+            result["avg_prompt_tokens"] = self.prompt_tokens / ok_calls
+            result["avg_completion_tokens"] = self.completion_tokens / ok_calls
+        if self.prompt_chars and self.prompt_tokens:
+            result["chars_per_token"] = self.prompt_chars / self.prompt_tokens
+        if self.controller:
+            result.update(self.controller.summary())
+        return result
+
+# One collector per backend
+metrics = {
+    "airtable": BackendMetrics("airtable"),
+    "groq": BackendMetrics("groq"),
+}
+
+def load_profile(path=METRICS_PATH):
+    """Saved per-backend averages from earlier runs ({} if none)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_profile(path=METRICS_PATH):
+    """Fold this run's averages into the saved profile (exponentially weighted)"""
+    profile = load_profile(path)
+    for name, backend in metrics.items():
+        current = backend.summary()
+        if not current:
+            continue
+        previous = profile.get(name, {})
+        merged = dict(previous)
+        for key, value in current.items():
+            if key == "calls":
+                merged[key] = previous.get(key, 0) + value
+            elif key in previous:
+                merged[key] = (1 - EWMA_WEIGHT) * previous[key] + EWMA_WEIGHT * value
+            else:
+                merged[key] = value
+        profile[name] = merged
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    return profile
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import threading
+import cProfile
+from contextlib import contextmanager
+
+class Tracer:
+    """Collects timed spans and writes them as Chrome trace-event JSON"""
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def start(self):
+        """Enable span collection, discarding anything recorded before"""
+        with self._lock:
+            self.events = []
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        """Disable span collection"""
+        self.enabled = False
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1_000_000
+
+    @contextmanager
+    def span(self, name, cat="pipeline", **args):
+        """Record a complete ("X") event around the wrapped block"""
+        if not self.enabled:
+            yield
+            return
+
+        start = self._now_us()
+        try:
+            yield
+        except Exception as e:
+            args["error"] = str(e)
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round(start, 3),
+                "dur": round(self._now_us() - start, 3),
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = {k: str(v) for k, v in args.items()}
+            with self._lock:
+                self.events.append(event)
+
+    def write(self, path):
+        """Write collected spans to `path` in Chrome trace-event format"""
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+# Global tracer instance
+tracer = Tracer()
+
+class Profiler:
+    """Runs cProfile and the span tracer together for one CLI invocation"""
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        tracer.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        tracer.stop()
+
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        prof_path = f"{self.prefix}.prof"
+        trace_path = f"{self.prefix}.trace.json"
+        self.profile.dump_stats(prof_path)
+        tracer.write(trace_path)
+
+        print(f"\n⏱️  Profile written to {prof_path} (open with snakeviz or pstats)")
+        print(f"⏱️  Trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+        return False
+
+def default_profile_prefix(command):
+    """Build a timestamped output prefix for a profiling run"""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join("profiles", f"{command}-{stamp}")
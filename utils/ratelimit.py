@@ -0,0 +1,42 @@
+import time
+import threading
+from config import AIRTABLE_REQUESTS_PER_SECOND, GROQ_REQUESTS_PER_MINUTE
+from utils.profiling import tracer
+
+class TokenBucket:
+    """Blocking token-bucket rate limiter shared by all threads of a process"""
+    def __init__(self, name, rate, burst=None):
+        self.name = name
+        self.rate = rate  # tokens per second
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """Change the refill rate (e.g. a fair share of a per-base limit)"""
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1.0, rate)
+            self.tokens = min(self.tokens, self.burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            with tracer.span(f"{self.name} rate wait", cat="ratelimit"):
+                time.sleep(wait_time)
+
+# Airtable enforces its limit per base; Groq per API key
+airtable_limiter = TokenBucket("airtable", AIRTABLE_REQUESTS_PER_SECOND)
+groq_limiter = TokenBucket("groq", GROQ_REQUESTS_PER_MINUTE / 60.0)
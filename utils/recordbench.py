@@ -0,0 +1,179 @@
+"""Memory and speed of typed child records versus raw pyairtable dicts.
+
+Run with `python -m utils.recordbench [--applicants N]`. Synthetic child
+rows go through a JSON round-trip (as they would arriving from the API), then
+each path is measured for retained memory, ingest time, passes of the
+shortlist rule reads, and child-row fingerprinting over every applicant.
+"""
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from config import LINK_FIELD, T_PERSONAL, T_EXPERIENCE, T_SALARY, TIER1_COMPANIES
+from utils.helpers import parse_date_safe, safe_get_field
+from utils.journal import hash_inputs
+from utils.records import typed_records
+from processors.compressor import child_fingerprint
+
+COMPANIES = ["Google", "Meta", "Stripe", "Shopify", "Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Staff Engineer", "Data Engineer", "Engineering Manager"]
+TECHNOLOGIES = ["Python, Django", "Go, Kubernetes", "TypeScript, React", "Rust", "Java, Spring", "Python, Airflow"]
+LOCATIONS = ["San Francisco, US", "London, UK", "Toronto, Canada", "Berlin, Germany", "Bangalore, India"]
+CURRENCIES = ["USD", "USD", "USD", "EUR", "GBP"]
+
+def synthetic_rows(applicants, seed=7):
+    """{table name: raw pyairtable rows} for `applicants` applicants, as fresh JSON-decoded dicts"""
+    rng = random.Random(seed)
+    rows = {T_PERSONAL: [], T_EXPERIENCE: [], T_SALARY: []}
+    for n in range(applicants):
+        applicant_id = f"recA{n:013d}"
+        link = {LINK_FIELD: [applicant_id]}
+        rows[T_PERSONAL].append({"id": f"recP{n:013d}", "createdTime": "2025-01-01T00:00:00.000Z", "fields": {
+            **link, "Full Name": f"Candidate {n}", "Email": f"candidate{n}@example.com",
+            "Location": rng.choice(LOCATIONS), "LinkedIn": f"https://linkedin.com/in/candidate{n}",
+        }})
+        for role in range(rng.randint(1, 4)):
+            start_year = rng.randint(2008, 2022)
+            fields = {
+                **link, "Company": rng.choice(COMPANIES), "Title": rng.choice(TITLES),
+                "Start": f"{start_year}-{rng.randint(1, 12):02d}-01", "Technologies": rng.choice(TECHNOLOGIES),
+            }
+            if role:
+                fields["End"] = f"{min(start_year + rng.randint(1, 4), 2025)}-06-30"
+            rows[T_EXPERIENCE].append({"id": f"recE{n:011d}{role:02d}", "createdTime": "2025-01-01T00:00:00.000Z",
+                                       "fields": fields})
+        rows[T_SALARY].append({"id": f"recS{n:013d}", "createdTime": "2025-01-01T00:00:00.000Z", "fields": {
+            **link, "Preferred Rate": rng.choice([60, 80, 95, 120, 150]), "Minimum Rate": 50,
+            "Currency": rng.choice(CURRENCIES), "Availability (hrs/wk)": rng.choice([10, 20, 30, 40]),
+        }})
+    # No shared string objects, just like a decoded HTTP response
+    return json.loads(json.dumps(rows))
+
+def _index(rows):
+    """Applicant ID -> rows, the shape linked_index() returns"""
+    index = {}
+    for row in rows:
+        for applicant_id in row["fields"].get(LINK_FIELD, []) if isinstance(row, dict) else row.applicant_ids:
+            index.setdefault(applicant_id, []).append(row)
+    return index
+
+def _dict_rules(personal, experience, salary):
+    """The shortlist rule reads as done on raw dicts: every field looked up and every date parsed per pass"""
+    total_days = 0
+    tier1 = False
+    for rec in experience:
+        start = parse_date_safe(safe_get_field(rec, "Start"))
+        end_str = safe_get_field(rec, "End")
+        end = parse_date_safe(end_str) if end_str else None
+        if start and end and end >= start:
+            total_days += (end - start).days
+        company = safe_get_field(rec, "Company", "").strip().lower()
+        tier1 = tier1 or any(t in company for t in TIER1_COMPANIES)
+    rate_ok = bool(salary) and safe_get_field(salary[0], "Currency", "").strip().upper() == "USD" and (
+        safe_get_field(salary[0], "Preferred Rate") or 0) <= 100 and (
+        safe_get_field(salary[0], "Availability (hrs/wk)") or 0) >= 20
+    location = safe_get_field(personal[0], "Location", "").strip().lower() if personal else ""
+    return total_days, tier1, rate_ok, location
+
+def _typed_rules(personal, experience, salary):
+    """The same reads on typed records: attributes, with dates parsed once per record"""
+    total_days = 0
+    tier1 = False
+    for rec in experience:
+        start, end = rec.dates()
+        if start and end and end >= start:
+            total_days += (end - start).days
+        company = (rec.company or "").strip().lower()
+        tier1 = tier1 or any(t in company for t in TIER1_COMPANIES)
+    rate_ok = bool(salary) and (salary[0].currency or "").strip().upper() == "USD" and (
+        salary[0].preferred_rate or 0) <= 100 and (salary[0].availability or 0) >= 20
+    location = (personal[0].location or "").strip().lower() if personal else ""
+    return total_days, tier1, rate_ok, location
+
+def _dict_fingerprint(personal, experience, salary):
+    rows = sorted(
+        (table, record["id"], hash_inputs(record.get("fields", {})))
+        for table, records in ((T_PERSONAL, personal), (T_EXPERIENCE, experience), (T_SALARY, salary))
+        for record in records
+    )
+    return hash_inputs(rows)
+
+def _retained(build):
+    """Bytes still allocated by the result of `build()`"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+def run(applicants, passes=3):
+    """Measurements for both paths: {"dict": {...}, "typed": {...}}"""
+    raw_json = json.dumps(synthetic_rows(applicants))
+    tables = (T_PERSONAL, T_EXPERIENCE, T_SALARY)
+
+    def ingest_dicts():
+        rows = json.loads(raw_json)
+        return [_index(rows[name]) for name in tables]
+
+    def ingest_typed():
+        rows = json.loads(raw_json)
+        return [_index(typed_records(name, rows.pop(name))) for name in tables]
+
+    paths = {
+        "dict": (ingest_dicts, _dict_rules, _dict_fingerprint),
+        "typed": (ingest_typed, _typed_rules, child_fingerprint),
+    }
+    results = {}
+    for label, (ingest, rules, fingerprint) in paths.items():
+        retained = _retained(ingest)
+        gc.collect()
+        started = time.perf_counter()
+        indexes = ingest()
+        ingest_seconds = time.perf_counter() - started
+
+        children = [[index.get(applicant_id, []) for index in indexes] for applicant_id in indexes[0]]
+        rule_seconds = []
+        for _ in range(passes):
+            started = time.perf_counter()
+            for rows in children:
+                rules(*rows)
+            rule_seconds.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for rows in children:
+            fingerprint(*rows)
+        results[label] = {
+            "rows": sum(len(records) for index in indexes for records in index.values()),
+            "retained_mb": retained / 1e6,
+            "ingest_s": ingest_seconds,
+            "first_pass_s": rule_seconds[0],
+            "repeat_pass_s": min(rule_seconds[1:] or rule_seconds),
+            "fingerprint_s": time.perf_counter() - started,
+        }
+        del indexes, children
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typed records vs raw dicts: memory and speed")
+    parser.add_argument("--applicants", type=int, default=20000)
+    parser.add_argument("--passes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"🧪 Record model benchmark ({args.applicants} applicants, Python {sys.version.split()[0]})")
+    results = run(args.applicants, args.passes)
+    for label, r in results.items():
+        print(f"  • {label:5}: {r['rows']} rows, {r['retained_mb']:.1f} MB retained, ingest {r['ingest_s']:.2f}s, "
+              f"rules {r['first_pass_s']:.2f}s first / {r['repeat_pass_s']:.2f}s repeat, "
+              f"fingerprints {r['fingerprint_s']:.2f}s")
+    dict_r, typed_r = results["dict"], results["typed"]
+    print(f"  📉 typed vs dict: memory x{dict_r['retained_mb'] / typed_r['retained_mb']:.2f} smaller, "
+          f"repeat rule passes x{dict_r['repeat_pass_s'] / typed_r['repeat_pass_s']:.1f} faster, "
+          f"ingest x{typed_r['ingest_s'] / dict_r['ingest_s']:.1f} slower")
+
+if __name__ == "__main__":
+    main()
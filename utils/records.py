@@ -0,0 +1,133 @@
+"""Typed, slotted records for Airtable rows.
+
+Rows are parsed once at ingest into `__slots__` dataclasses; the strings
+that repeat across a base (companies, titles, technologies, locations,
+currencies, linked record IDs) are interned, so 100k rows share one copy of
+"Google" instead of holding 100k. Fields without a typed attribute are kept
+in `extra`, and `fields()` rebuilds the exact Airtable field dict, so
+hashes and fingerprints match the ones computed from raw pyairtable dicts.
+"""
+import sys
+from dataclasses import dataclass, field
+from config import LINK_FIELD, SHORTLIST_LINK_FIELD, T_PERSONAL, T_EXPERIENCE, T_SALARY, T_SHORTLISTED
+from utils.helpers import parse_date_safe
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _intern_ids(values):
+    return tuple(sys.intern(v) for v in values) if values else ()
+
+@dataclass(slots=True)
+class Record:
+    """Base for typed rows; subclasses map Airtable field names to attributes in FIELDS"""
+    FIELDS = {}
+    LINKS = {}
+    INTERNED = ()
+
+    id: str
+    created_time: str = None
+    extra: dict = None
+
+    @classmethod
+    def from_airtable(cls, raw):
+        """Typed record from a pyairtable {"id", "createdTime", "fields"} dict"""
+        values = {}
+        extra = {}
+        for name, value in raw.get("fields", {}).items():
+            attr = cls.FIELDS.get(name) or cls.LINKS.get(name)
+            if attr is None:
+                extra[name] = value
+            elif name in cls.LINKS:
+                values[attr] = _intern_ids(value)
+            else:
+                values[attr] = _intern(value) if attr in cls.INTERNED else value
+        return cls(id=raw["id"], created_time=raw.get("createdTime"), extra=extra or None, **values)
+
+    def fields(self):
+        """Airtable-shaped field dict (empty fields omitted, as Airtable does)"""
+        fields = dict(self.extra or {})
+        for name, attr in self.FIELDS.items():
+            value = getattr(self, attr)
+            if value is not None:
+                fields[name] = value
+        for name, attr in self.LINKS.items():
+            value = getattr(self, attr)
+            if value:
+                fields[name] = list(value)
+        return fields
+
+    def to_airtable(self):
+        """The record as a pyairtable dict"""
+        return {"id": self.id, "createdTime": self.created_time, "fields": self.fields()}
+
+@dataclass(slots=True)
+class PersonalDetails(Record):
+    FIELDS = {"Full Name": "full_name", "Email": "email", "Location": "location", "LinkedIn": "linkedin"}
+    LINKS = {LINK_FIELD: "applicant_ids"}
+    INTERNED = ("location",)
+
+    applicant_ids: tuple = ()
+    full_name: str = None
+    email: str = None
+    location: str = None
+    linkedin: str = None
+
+@dataclass(slots=True)
+class WorkExperience(Record):
+    FIELDS = {"Company": "company", "Title": "title", "Start": "start", "End": "end", "Technologies": "technologies"}
+    LINKS = {LINK_FIELD: "applicant_ids"}
+    INTERNED = ("company", "title", "start", "end", "technologies")
+
+    applicant_ids: tuple = ()
+    company: str = None
+    title: str = None
+    start: str = None
+    end: str = None
+    technologies: str = None
+    # Parsed on first use, then kept: (start date, end date or None)
+    _dates: tuple = field(default=None, repr=False, compare=False)
+
+    def dates(self):
+        if self._dates is None:
+            self._dates = (parse_date_safe(self.start), parse_date_safe(self.end) if self.end else None)
+        return self._dates
+
+@dataclass(slots=True)
+class SalaryPreference(Record):
+    FIELDS = {
+        "Preferred Rate": "preferred_rate", "Minimum Rate": "minimum_rate",
+        "Currency": "currency", "Availability (hrs/wk)": "availability",
+    }
+    LINKS = {LINK_FIELD: "applicant_ids"}
+    INTERNED = ("currency",)
+
+    applicant_ids: tuple = ()
+    preferred_rate: float = None
+    minimum_rate: float = None
+    currency: str = None
+    availability: float = None
+
+@dataclass(slots=True)
+class ShortlistedLead(Record):
+    FIELDS = {"Compressed JSON": "compressed_json", "Score Reason": "score_reason"}
+    LINKS = {SHORTLIST_LINK_FIELD: "applicant_ids"}
+
+    applicant_ids: tuple = ()
+    compressed_json: str = None
+    score_reason: str = None
+
+# Typed record class per table
+RECORD_TYPES = {
+    T_PERSONAL: PersonalDetails,
+    T_EXPERIENCE: WorkExperience,
+    T_SALARY: SalaryPreference,
+    T_SHORTLISTED: ShortlistedLead,
+}
+
+def typed_records(table_name, raw_records):
+    """Typed records for rows of `table_name` (raw dicts for tables without a record type)"""
+    record_type = RECORD_TYPES.get(table_name)
+    if record_type is None:
+        return raw_records
+    return [record_type.from_airtable(raw) for raw in raw_records]
@@ -0,0 +1,247 @@
+"""Business-rule reference tables: Tier-1 companies, allowed locations and
+their aliases, FX rates and shortlisting thresholds.
+
+Tables come from REFERENCE_DATA_SOURCE (config.py defaults, a JSON file, an
+http(s) URL or an Airtable table) and are cached in memory and on disk for
+REFERENCE_DATA_TTL seconds. Once the TTL lapses, the source is revalidated
+against the version tag of the cached copy (file mtime/size, HTTP ETag, or a
+content hash for Airtable). Matchers are recompiled only when that tag changes.
+Every processor shares the module-level `reference_data`, so a lookup per
+record costs one clock read.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from config import *
+
+THRESHOLDS = ("max_hourly_rate", "min_availability", "min_experience_years")
+# Airtable reference table: one row per entry, `Kind` picks the table it belongs to
+AIRTABLE_FIELDS = ("Kind", "Key", "Value")
+
+def config_defaults():
+    """Reference data as hard-coded in config.py"""
+    return {
+        "tier1_companies": sorted(TIER1_COMPANIES),
+        "allowed_locations": sorted(ALLOWED_LOCATIONS),
+        "location_aliases": dict(LOCATION_ALIASES),
+        "fx_rates": dict(FX_RATES_TO_USD),
+        "thresholds": {
+            "max_hourly_rate": MAX_HOURLY_RATE,
+            "min_availability": MIN_AVAILABILITY,
+            "min_experience_years": MIN_EXPERIENCE_YEARS,
+        },
+    }
+
+def _content_tag(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+def _alternation(needles):
+    """Regex matching any needle as a substring (longest first), or None when there are none"""
+    needles = sorted({n for n in needles if n}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(n) for n in needles)) if needles else None
+
+class RuleSet:
+    """Compiled, read-only view of one version of the reference data"""
+    def __init__(self, data, version):
+        defaults = config_defaults()
+        data = {**defaults, **{k: v for k, v in data.items() if v is not None}}
+        thresholds = {**defaults["thresholds"], **data["thresholds"]}
+
+        self.version = version
+        self.data = data
+        self.tier1 = frozenset(c.strip().lower() for c in data["tier1_companies"])
+        self.allowed_locations = frozenset(l.strip().lower() for l in data["allowed_locations"])
+        # Needle -> allowed location; aliases pointing at a location that is not allowed are ignored
+        self._regions = {loc: loc for loc in self.allowed_locations}
+        for alias, location in data["location_aliases"].items():
+            if location.strip().lower() in self.allowed_locations:
+                self._regions[alias.strip().lower()] = location.strip().lower()
+        self.fx_rates = {c.strip().upper(): float(r) for c, r in data["fx_rates"].items()}
+        self.fx_rates.setdefault("USD", 1.0)
+        self.max_hourly_rate = float(thresholds["max_hourly_rate"])
+        self.min_availability = float(thresholds["min_availability"])
+        self.min_experience_years = float(thresholds["min_experience_years"])
+
+        self._tier1_re = _alternation(self.tier1)
+        self._region_re = _alternation(self._regions)
+
+    def is_tier1(self, company):
+        """True when a Tier-1 name occurs in `company` (case-insensitive)"""
+        return bool(self._tier1_re and company and self._tier1_re.search(company.strip().lower()))
+
+    def region(self, location):
+        """The allowed location (or alias) occurring in `location`, as its allowed name; None if none does"""
+        if not (self._region_re and location):
+            return None
+        match = self._region_re.search(location.strip().lower())
+        return self._regions[match.group()] if match else None
+
+    def to_usd(self, amount, currency):
+        """`amount` in `currency` converted to USD; None when the currency has no rate"""
+        rate = self.fx_rates.get((currency or "").strip().upper())
+        return None if rate is None else float(amount) * rate
+
+    def summary(self):
+        return {
+            "version": self.version,
+            "tier1_companies": len(self.tier1),
+            "allowed_locations": len(self.allowed_locations),
+            "location_aliases": len(self._regions) - len(self.allowed_locations),
+            "fx_rates": len(self.fx_rates),
+            **{name: getattr(self, name) for name in THRESHOLDS},
+        }
+
+def _from_airtable_rows(rows):
+    """Reference data from rows of an Airtable table with Kind / Key / Value fields"""
+    data = {"tier1_companies": [], "allowed_locations": [], "location_aliases": {}, "fx_rates": {}, "thresholds": {}}
+    for row in rows:
+        fields = row.get("fields", {})
+        kind = str(fields.get("Kind") or "").strip().lower()
+        key, value = str(fields.get("Key") or "").strip(), fields.get("Value")
+        if not key:
+            continue
+        if kind == "tier1":
+            data["tier1_companies"].append(key)
+        elif kind == "location":
+            data["allowed_locations"].append(key)
+        elif kind == "alias" and value:
+            data["location_aliases"][key] = str(value)
+        elif kind == "fx" and value not in (None, ""):
+            data["fx_rates"][key] = float(value)
+        elif kind == "threshold" and key in THRESHOLDS and value not in (None, ""):
+            data["thresholds"][key] = float(value)
+    # An empty list means "none of that kind in the table", so keep config defaults for it
+    return {k: v for k, v in data.items() if v}
+
+class ReferenceData:
+    """Reference data from one source, behind a memory + disk cache with a TTL"""
+    def __init__(self, source=REFERENCE_DATA_SOURCE, ttl=REFERENCE_DATA_TTL, cache_path=REFERENCE_DATA_CACHE_PATH):
+        self.source = source
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self._rules = None
+        self._tag = None
+        self._checked = 0.0  # monotonic time of the last (re)validation
+        self._lock = threading.Lock()
+        self.stats = {"fetches": 0, "not_modified": 0, "compiles": 0, "errors": 0}
+
+    def get(self):
+        """Current compiled rules, revalidating against the source once the TTL has lapsed"""
+        rules = self._rules
+        if rules is not None and time.monotonic() - self._checked < self.ttl:
+            return rules
+        with self._lock:
+            if self._rules is None or time.monotonic() - self._checked >= self.ttl:
+                self._refresh()
+            return self._rules
+
+    def refresh(self):
+        """Revalidate now, regardless of the TTL; returns the current rules"""
+        with self._lock:
+            self._refresh(force=True)
+            return self._rules
+
+    def _refresh(self, force=False):
+        if self._rules is None and not force and self._load_disk():
+            return
+        try:
+            fetched = self._fetch(self._tag)
+            self.stats["fetches"] += 1
+            if fetched is None:
+                self.stats["not_modified"] += 1
+                data = self._rules.data
+            else:
+                data, tag = fetched
+                if tag != self._tag or self._rules is None:
+                    self._compile(data, tag)
+            self._save_disk(data)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️  Reference data refresh from {self.source or 'config.py'} failed ({e}); "
+                  f"using {'cached' if self._rules else 'config.py'} rules")
+            if self._rules is None:
+                self._compile(config_defaults(), "config")
+        self._checked = time.monotonic()
+
+    def _compile(self, data, tag):
+        self._rules = RuleSet(data, tag)
+        self._tag = tag
+        self.stats["compiles"] += 1
+
+    # ---- sources ----
+
+    def _fetch(self, tag):
+        """(data, version tag), or None when the source still matches `tag`"""
+        if not self.source:
+            data = config_defaults()
+            new_tag = _content_tag(data)
+            return None if new_tag == tag and self._rules is not None else (data, new_tag)
+        if self.source.startswith(("http://", "https://")):
+            return self._fetch_url(tag)
+        if self.source.startswith("airtable:"):
+            return self._fetch_airtable(tag)
+        return self._fetch_file(tag)
+
+    def _fetch_file(self, tag):
+        stat = os.stat(self.source)
+        new_tag = f"file:{stat.st_mtime_ns}-{stat.st_size}"
+        if new_tag == tag and self._rules is not None:
+            return None
+        with open(self.source, encoding="utf-8") as f:
+            return json.load(f), new_tag
+
+    def _fetch_url(self, tag):
+        import httpx
+        headers = {"If-None-Match": tag} if tag and self._rules is not None else {}
+        response = httpx.get(self.source, headers=headers, timeout=10.0, follow_redirects=True)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag") or _content_tag(response.json())
+
+    def _fetch_airtable(self, tag):
+        from utils.airtable_client import airtable
+        rows = airtable._table(self.source.split(":", 1)[1]).all(fields=list(AIRTABLE_FIELDS))
+        data = _from_airtable_rows(rows)
+        new_tag = _content_tag(data)
+        return None if new_tag == tag and self._rules is not None else (data, new_tag)
+
+    # ---- disk cache ----
+
+    def _load_disk(self):
+        """Adopt the on-disk copy when it is from this source; True when it is also within the TTL"""
+        if not self.source:
+            return False
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cached.get("source") != self.source:
+            return False
+        self._compile(cached["data"], cached["tag"])
+        age = time.time() - cached.get("fetched_at", 0)
+        # Pretend the copy was checked `age` seconds ago, so the TTL keeps counting from the fetch
+        self._checked = time.monotonic() - age
+        return age < self.ttl
+
+    def _save_disk(self, data):
+        """Write the current copy with a fresh fetch time (config.py defaults are never cached)"""
+        if not self.source:
+            return
+        directory = os.path.dirname(self.cache_path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"source": self.source, "tag": self._tag, "fetched_at": time.time(), "data": data}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️  Could not cache reference data: {e}")
+
+# Shared by every processor in this process
+reference_data = ReferenceData()
@@ -0,0 +1,140 @@
+import time
+import random
+import threading
+import email.utils
+from config import MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+from utils.profiling import tracer
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while its circuit breaker is open"""
+
+def error_status(error):
+    """HTTP status code carried by a requests/httpx/SDK exception, if any"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+def is_transient(error):
+    """True for rate limits, 5xx responses, timeouts and dropped connections"""
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # requests.Timeout / ConnectionError and the Groq SDK's APITimeoutError /
+    # APIConnectionError don't share a base class, so match by name.
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+def retry_after_seconds(error):
+    """Parse a Retry-After header (delta-seconds or HTTP date) from an error response"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+class CircuitBreaker:
+    """Opens after N consecutive transient failures; lets one trial through after a cool-down"""
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._trial_in_flight):
+                raise CircuitOpenError(f"{self.name} circuit open after {self.failures} consecutive failures")
+            if state == "half-open":
+                self._trial_in_flight = True
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"  🔌 {self.name} circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+class RetryPolicy:
+    """Per-backend retry policy: classify errors, honour Retry-After, full jitter, circuit breaker"""
+    def __init__(self, name, max_attempts=MAX_RETRIES, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = CircuitBreaker(name)
+        self.retries = 0
+
+    def backoff(self, attempt, error):
+        """Delay before the next attempt: Retry-After if given, else full jitter"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, *args, retry_on=None, **kwargs):
+        """Call `fn`, retrying transient failures.
+
+        `retry_on` narrows which transient errors are retried; use it for
+        non-idempotent requests that are only safe to resend when the backend
+        rejected them outright (e.g. 429).
+        """
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    # The backend answered; a 4xx says nothing about its health
+                    self.breaker.on_success()
+                    raise
+                self.breaker.on_failure()
+                if attempt == self.max_attempts - 1 or (retry_on and not retry_on(e)):
+                    raise
+                wait_time = self.backoff(attempt, e)
+                self.retries += 1
+                print(f"  ⚠️  {self.name} attempt {attempt + 1} failed: {e}. Retrying in {wait_time:.1f}s...")
+                with tracer.span(f"{self.name} retry wait", cat="retry", attempt=attempt + 1):
+                    time.sleep(wait_time)
+            else:
+                self.breaker.on_success()
+                return result
+
+def is_rate_limited(error):
+    return error_status(error) == 429
+
+# One policy (and circuit breaker) per backend
+airtable_policy = RetryPolicy("airtable")
+groq_policy = RetryPolicy("groq")
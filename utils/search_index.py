@@ -0,0 +1,327 @@
+import os
+import re
+import json
+import bisect
+import datetime
+from config import SEARCH_INDEX_PATH
+from utils.records import WorkExperience
+from utils.reference_data import reference_data
+
+# Numeric columns kept sorted for range queries
+NUMERIC_FIELDS = ("rate", "availability", "years")
+# Query prefixes -> token namespaces (a bare word matches any of them)
+PREFIXES = {
+    "tech": "tech", "technology": "tech",
+    "company": "company", "co": "company",
+    "title": "title",
+    "loc": "loc", "location": "loc",
+    "currency": "currency",
+}
+NUMERIC_ALIASES = {"rate": "rate", "availability": "availability", "avail": "availability",
+                   "years": "years", "experience": "years"}
+KEYWORDS = {"tier1": "flag:tier1"}
+
+# Sorts after any record ID, for inclusive/exclusive bounds on (value, record ID) pairs
+MAX_ID = "\uffff"
+
+_WORD = re.compile(r"[a-z0-9+#.]+")
+_RANGE = re.compile(r"^([a-z]+)(<=|>=|<|>|=)(-?\d+(?:\.\d+)?)$")
+_QUERY_TOKEN = re.compile(r'\(|\)|[^\s()"]*"[^"]*"|[^\s()]+')
+
+def _words(text):
+    return [w.strip(".") for w in _WORD.findall(str(text or "").lower()) if w.strip(".")]
+
+def _phrase(text):
+    return " ".join(_words(text))
+
+def _loads(compressed_json):
+    try:
+        return json.loads(compressed_json) if compressed_json else None
+    except ValueError:
+        return None
+
+def _experience_spans(roles):
+    """(days in ended roles, start ordinals of ongoing roles) for Compressed JSON roles.
+
+    Ongoing roles keep growing, so their years are worked out against today
+    whenever the index is loaded instead of being frozen at index time.
+    """
+    closed_days, ongoing = 0, []
+    for role in roles:
+        start, end = WorkExperience(id="", start=role.get("start"), end=role.get("end")).dates()
+        if not start:
+            continue
+        if end is None:
+            ongoing.append(start.toordinal())
+        elif end >= start:
+            closed_days += (end - start).days
+    return closed_days, ongoing
+
+def _years(doc, today=None):
+    """Experience years as of `today`, matching calculate_experience_years()"""
+    today = (today or datetime.date.today()).toordinal()
+    days = doc["closed_days"] + sum(today - start for start in doc["ongoing_starts"] if today >= start)
+    return round(days / 365.25, 2)
+
+def document(json_data):
+    """Searchable document for one applicant's Compressed JSON: tokens plus numeric columns"""
+    personal = json_data.get("personal", {})
+    salary = json_data.get("salary", {})
+    roles = json_data.get("experience", [])
+    rules = reference_data.get()
+    tokens = set()
+    for role in roles:
+        for tech in re.split(r"[,/;|]", str(role.get("technologies") or "")):
+            if _phrase(tech):
+                tokens.add(f"tech:{_phrase(tech)}")
+        company = _phrase(role.get("company"))
+        if company:
+            tokens.add(f"company:{company}")
+            tokens.update(f"company:{w}" for w in company.split())
+        if rules.is_tier1(role.get("company")):
+            tokens.add("flag:tier1")
+        title = _phrase(role.get("title"))
+        if title:
+            tokens.add(f"title:{title}")
+            tokens.update(f"title:{w}" for w in title.split())
+    for part in str(personal.get("location") or "").split(","):
+        if _phrase(part):
+            tokens.add(f"loc:{_phrase(part)}")
+            tokens.update(f"loc:{w}" for w in _words(part))
+    if salary.get("currency"):
+        tokens.add(f"currency:{_phrase(salary['currency'])}")
+
+    closed_days, ongoing = _experience_spans(roles)
+    doc = {
+        "name": personal.get("name"),
+        "location": personal.get("location"),
+        "currency": salary.get("currency"),
+        "tokens": sorted(tokens),
+        "rate": salary.get("preferred_rate"),
+        "availability": salary.get("availability"),
+        "closed_days": closed_days,
+        "ongoing_starts": ongoing,
+    }
+    doc["years"] = _years(doc)
+    return doc
+
+class SearchIndex:
+    """Local inverted index over applicants' Compressed JSON.
+
+    Postings map tokens ("tech:go", "company:google", "loc:germany",
+    "flag:tier1", ...) to record-ID sets. Rate, availability and experience
+    years are kept as sorted (value, record ID) columns, so a range is two
+    bisects. Only the documents are persisted; postings and columns are
+    rebuilt on load, when `years` is also recomputed for today from the
+    stored role spans. The reference-data version the documents were built
+    with is saved too, so a change to the Tier-1 table triggers a rebuild.
+    """
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = path
+        self.docs = {}
+        self.synced_at = None
+        self.rules_version = None
+        self.postings = {}
+        self.columns = {field: [] for field in NUMERIC_FIELDS}
+
+    @classmethod
+    def load(cls, path=SEARCH_INDEX_PATH):
+        index = cls(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            index.synced_at = state.get("synced_at")
+            index.rules_version = state.get("rules_version")
+            today = datetime.date.today()
+            for record_id, doc in state.get("docs", {}).items():
+                if "ongoing_starts" not in doc:
+                    # Written before role spans were stored; the next refresh rebuilds it
+                    index.synced_at = None
+                else:
+                    doc["years"] = _years(doc, today)
+                index._add(record_id, doc, bulk=True)
+            index._sort_columns()
+        return index
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"synced_at": self.synced_at, "rules_version": self.rules_version, "docs": self.docs}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _add(self, record_id, doc, bulk=False):
+        """Index a document; `bulk` appends to the columns, which `_sort_columns()` must then sort"""
+        self.docs[record_id] = doc
+        for token in doc["tokens"]:
+            self.postings.setdefault(token, set()).add(record_id)
+        for field in NUMERIC_FIELDS:
+            if isinstance(doc.get(field), (int, float)):
+                if bulk:
+                    self.columns[field].append((doc[field], record_id))
+                else:
+                    bisect.insort(self.columns[field], (doc[field], record_id))
+
+    def _sort_columns(self):
+        for column in self.columns.values():
+            column.sort()
+
+    def remove(self, record_id):
+        doc = self.docs.pop(record_id, None)
+        if doc is None:
+            return False
+        for token in doc["tokens"]:
+            ids = self.postings.get(token)
+            if ids:
+                ids.discard(record_id)
+                if not ids:
+                    del self.postings[token]
+        for field in NUMERIC_FIELDS:
+            if isinstance(doc.get(field), (int, float)):
+                column = self.columns[field]
+                i = bisect.bisect_left(column, (doc[field], record_id))
+                if i < len(column) and column[i] == (doc[field], record_id):
+                    del column[i]
+        return True
+
+    def update(self, record_id, compressed_json):
+        """Index (or re-index) one applicant; an empty or invalid payload removes it"""
+        self.remove(record_id)
+        json_data = _loads(compressed_json)
+        if not json_data:
+            return False
+        self._add(record_id, document(json_data))
+        return True
+
+    def refresh(self, client, rebuild=False):
+        """Bring the index up to date; returns the number of applicants (re)indexed.
+
+        After the first full build only applicants modified since the last
+        sync are fetched (a few seconds of overlap absorb clock skew).
+        Deletions are only picked up by a rebuild, or by `remove()` from the
+        archiver. A new reference-data version forces a rebuild, since the
+        `flag:tier1` tokens depend on it.
+        """
+        started = datetime.datetime.now(datetime.timezone.utc)
+        fields = ["Compressed JSON"]
+        version = reference_data.get().version
+        if self.synced_at and self.rules_version != version and not rebuild:
+            print(f"♻️  Business rules changed ({self.rules_version} -> {version}); rebuilding the search index")
+            rebuild = True
+        self.rules_version = version
+        if rebuild or not self.synced_at:
+            self.docs, self.postings = {}, {}
+            self.columns = {field: [] for field in NUMERIC_FIELDS}
+            records = client.applicants.all(fields=fields)
+            for record in records:
+                json_data = _loads(record.get("fields", {}).get("Compressed JSON"))
+                if json_data:
+                    self._add(record["id"], document(json_data), bulk=True)
+            self._sort_columns()
+        else:
+            since = datetime.datetime.strptime(self.synced_at, "%Y-%m-%dT%H:%M:%S.000Z") - datetime.timedelta(seconds=5)
+            formula = f"IS_AFTER(LAST_MODIFIED_TIME(), '{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}')"
+            records = client.applicants.all(formula=formula, fields=fields)
+            for record in records:
+                self.update(record["id"], record.get("fields", {}).get("Compressed JSON"))
+        self.synced_at = started.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        self.save()
+        return len(records)
+
+    # ---- queries ----
+
+    def _term(self, term):
+        term = term.strip('"').lower()
+        if term in KEYWORDS:
+            return set(self.postings.get(KEYWORDS[term], ()))
+        ranged = _RANGE.match(term)
+        if ranged:
+            name, op, value = ranged.groups()
+            if name not in NUMERIC_ALIASES:
+                raise ValueError(f"Unknown numeric field {name!r}; use one of {', '.join(sorted(NUMERIC_ALIASES))}")
+            return self._range(NUMERIC_ALIASES[name], op, float(value))
+        prefix, sep, value = term.partition(":")
+        if sep:
+            if prefix not in PREFIXES:
+                raise ValueError(f"Unknown field {prefix!r}; use one of {', '.join(sorted(PREFIXES))}")
+            return set(self.postings.get(f"{PREFIXES[prefix]}:{_phrase(value)}", ()))
+        phrase = _phrase(term)
+        matches = set()
+        for namespace in set(PREFIXES.values()):
+            matches |= self.postings.get(f"{namespace}:{phrase}", set())
+        return matches
+
+    def _range(self, field, op, value):
+        column = self.columns[field]
+        lo, hi = 0, len(column)
+        if op in (">", ">="):
+            lo = (bisect.bisect_right if op == ">" else bisect.bisect_left)(column, (value, MAX_ID if op == ">" else ""))
+        elif op in ("<", "<="):
+            hi = (bisect.bisect_left if op == "<" else bisect.bisect_right)(column, (value, "" if op == "<" else MAX_ID))
+        else:
+            lo = bisect.bisect_left(column, (value, ""))
+            hi = bisect.bisect_right(column, (value, MAX_ID))
+        return {record_id for _, record_id in column[lo:hi]}
+
+    def search(self, query):
+        """Record IDs matching a query.
+
+        Terms are `field:value` (tech, company, title, loc, currency), a bare
+        word (any text field), `tier1`, or a range such as `rate<80` or
+        `years>=4`. Terms combine with AND (the default between terms), OR,
+        NOT (or a leading `-`) and parentheses.
+        """
+        tokens = _QUERY_TOKEN.findall(query)
+        position = 0
+
+        def peek():
+            return tokens[position].upper() if position < len(tokens) else None
+
+        def take():
+            nonlocal position
+            position += 1
+            return tokens[position - 1]
+
+        def parse_or():
+            result = parse_and()
+            while peek() == "OR":
+                take()
+                result = result | parse_and()
+            return result
+
+        def parse_and():
+            result = parse_not()
+            while peek() not in (None, "OR", ")"):
+                if peek() == "AND":
+                    take()
+                result = result & parse_not()
+            return result
+
+        def parse_not():
+            if peek() == "NOT":
+                take()
+                return set(self.docs) - parse_not()
+            token = take() if peek() is not None else None
+            if token is None:
+                raise ValueError("Query ended unexpectedly")
+            if token == "(":
+                result = parse_or()
+                if peek() != ")":
+                    raise ValueError("Missing closing parenthesis")
+                take()
+                return result
+            if token.startswith("-") and len(token) > 1:
+                return set(self.docs) - self._term(token[1:])
+            return self._term(token)
+
+        if not tokens:
+            return set(self.docs)
+        result = parse_or()
+        if position < len(tokens):
+            raise ValueError(f"Unexpected {tokens[position]!r} in query")
+        return result
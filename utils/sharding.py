@@ -0,0 +1,49 @@
+import os
+import hashlib
+from config import AIRTABLE_REQUESTS_PER_SECOND, GROQ_REQUESTS_PER_MINUTE
+from utils.ratelimit import airtable_limiter, groq_limiter
+
+def shard_of(record_id, count):
+    """Stable shard index for a record ID (independent of process and Python hash seed)"""
+    digest = hashlib.sha1(record_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+class Shard:
+    """One partition `index` of `count`, selected by a stable hash of the record ID"""
+    def __init__(self, index, count):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index}/{count}: expected 0 <= i < N")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse an "i/N" shard spec (0-based index)"""
+        try:
+            index, count = (int(part) for part in spec.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard spec {spec!r}: expected i/N, e.g. 0/4")
+        return cls(index, count)
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    def contains(self, record_id):
+        return shard_of(record_id, self.count) == self.index
+
+    def filter(self, records):
+        """Keep only records (Airtable dicts) that belong to this shard"""
+        return [r for r in records if self.contains(r["id"])]
+
+    def state_path(self, path):
+        """Per-shard variant of a local state file so workers on one host don't collide"""
+        if self.count == 1:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}-{self.index}of{self.count}{ext}"
+
+def apply_shard(client, shard):
+    """Restrict `client` to one shard and give it a fair share of the rate limits"""
+    client.shard = shard
+    airtable_limiter.set_rate(AIRTABLE_REQUESTS_PER_SECOND / shard.count)
+    groq_limiter.set_rate(GROQ_REQUESTS_PER_MINUTE / 60.0 / shard.count)